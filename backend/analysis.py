@@ -0,0 +1,32 @@
+from video_engine import iter_row_batches
+from timeseries import Timeseries, detect_flags, compute_metrics
+
+
+def run_analysis(video_path, fps_target=1, on_rows=None, should_cancel=None, timeseries=None):
+    """Emotion pass of /analyze for one uploaded video: timeseries, flags and metrics.
+
+    `on_rows(rows, processed_s)` is called after every batch of sampled
+    frames so callers can publish partial timeseries; `should_cancel()` is
+    polled between batches; a cancelled run returns None. A `timeseries`
+    already known (from the result cache) is not recomputed.
+
+    The transcript is not produced here: JobManager runs it on the Whisper
+    pool that every job shares (audio.process_transcription).
+    """
+    if timeseries is None:
+        timeseries = []
+        for processed_s, rows in iter_row_batches(video_path, fps_target):   # 1 fps for speed
+            if should_cancel and should_cancel():
+                return None
+            timeseries.extend(rows)
+            if on_rows:
+                on_rows(rows, processed_s)
+    elif on_rows and timeseries:
+        on_rows(timeseries, timeseries[-1]["t_s"])
+
+    columns = Timeseries.from_items(timeseries)   # columnar once, shared by both detectors
+    return {
+        "timeseries": timeseries,
+        "flags": detect_flags(columns),
+        "metrics": compute_metrics(columns),
+    }
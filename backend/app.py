@@ -1,81 +1,64 @@
 import os
+import sys
+import gzip
+import json
 import tempfile
-import whisper
-import subprocess
-import cv2
-import numpy as np
-import mediapipe as mp
-from fer.fer import FER
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from collections import defaultdict
-import concurrent.futures
-from pydub import AudioSegment
+from jobs import JobManager, QueueFull
+from result_cache import file_sha256
+from models import MODEL_WARMUP
+from config import (LIVE_PUSH_INTERVAL_S, REPO_DIR, MASTER_DATA_FILE, DATA_SLICE_LIMIT, TIMESERIES_MAX_POINTS,
+                    GZIP_MIN_BYTES)
+from sync_store import SyncStore
+
+# The record schema helpers and the master-file index format are shared with scripts/
+# (session_log.py, Host.py builds the index)
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+from live import LiveAggregator
+from time_index import TimeIndex, index_path
 
 app = Flask(__name__)
 CORS(app)
 
-# Control audio enhancement via environment variable (default: off)
-ENHANCE_AUDIO = os.getenv("ENHANCE_AUDIO", "false").lower() == "true"
-
-print("Loading Whisper model (this may take a while on first run)...")
-whisper_model = whisper.load_model("base")   # faster than "medium"
-print("Whisper model loaded.")
-
-# ---------- AUDIO HELPERS ----------
-def extract_audio(video_path, audio_path):
-    cmd = [
-        'ffmpeg', '-i', video_path,
-        '-vn', '-acodec', 'pcm_s16le',
-        '-ar', '16000', '-ac', '1', audio_path,
-        '-y'
-    ]
-    try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
-    except subprocess.CalledProcessError as e:
-        if "Output file is empty" in e.stderr:
-            return  # No audio track – skip
-        raise Exception(f"FFmpeg error: {e.stderr}")
-
-def enhance_audio(input_path, output_path):
-    audio = AudioSegment.from_file(input_path)
-    enhanced = audio + 10   # 10dB gain
-    enhanced.export(output_path, format="wav")
-
-def transcribe_audio(audio_path):
-    result = whisper_model.transcribe(audio_path, language="en")
-    return result["text"], result.get("segments", [])
-# ------------------------------------
-
-# ... (rest of your emotion detection code remains the same) ...
-
-def process_emotions(video_path):
-    timeseries = process_video(video_path, fps_target=1)   # 1 fps for speed
-    flags = detect_flags(timeseries)
-    metrics = compute_metrics(timeseries)
-    return timeseries, flags, metrics
-
-def process_transcription(video_path):
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_audio:
-        audio_path = tmp_audio.name
-    enhanced_audio_path = None
+# Created on first use so spawned worker processes (which re-import this module) don't start pools
+_job_manager = None
+
+def get_job_manager():
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+    return _job_manager
+
+live = LiveAggregator()
+sync_store = SyncStore()
+_time_index = (None, None)   # (sidecar mtime, TimeIndex)
+
+def get_time_index():
+    """TimeIndex of the master file, reloaded whenever Host.py rewrites the sidecar; None if not built yet."""
+    global _time_index
     try:
-        extract_audio(video_path, audio_path)
-        if ENHANCE_AUDIO:
-            enhanced_audio_path = audio_path.replace('.wav', '_enhanced.wav')
-            enhance_audio(audio_path, enhanced_audio_path)
-            return transcribe_audio(enhanced_audio_path)
-        else:
-            return transcribe_audio(audio_path)
-    finally:
-        if os.path.exists(audio_path):
-            os.unlink(audio_path)
-        if enhanced_audio_path and os.path.exists(enhanced_audio_path):
-            os.unlink(enhanced_audio_path)
-
-# ---------- API Endpoint ----------
+        mtime = os.path.getmtime(index_path(MASTER_DATA_FILE))
+    except OSError:
+        return None
+    if _time_index[0] != mtime:
+        _time_index = (mtime, TimeIndex.open(MASTER_DATA_FILE))
+    return _time_index[1]
+
+def compact_json(payload):
+    """JSON without whitespace, gzip-compressed when the client accepts it."""
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("Accept-Encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, mimetype="application/json", headers=headers)
+
+# ---------- API Endpoints ----------
 @app.route('/analyze', methods=['POST'])
-def analyze():
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue an uploaded video for analysis; poll the returned URLs for progress and results."""
     if 'video' not in request.files:
         return jsonify({"error": "No video file provided"}), 400
 
@@ -85,26 +68,144 @@ def analyze():
         video_path = tmp_video.name
 
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            emotion_future = executor.submit(process_emotions, video_path)
-            transcript_future = executor.submit(process_transcription, video_path)
-
-            timeseries, flags, metrics = emotion_future.result()
-            transcript_text, transcript_segments = transcript_future.result()
-
-        return jsonify({
-            "timeseries": timeseries,
-            "flags": flags,
-            "metrics": metrics,
-            "transcript": transcript_text,
-            "transcript_segments": transcript_segments
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
+        # Content hash of the upload: re-uploads of the same recording reuse cached stage results
+        job = get_job_manager().submit(video_path, fps_target=1, video_hash=file_sha256(video_path))   # 1 fps for speed
+    except QueueFull as e:
         os.unlink(video_path)
-
-# ... (keep your emotion processing functions) ...
+        return jsonify({"error": f"Server busy: {e}. Try again shortly."}), 429, {"Retry-After": "30"}
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_status())
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Timeseries rows from `?since=<n>` onward (partial while running), plus flags/metrics/transcript once done."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    since = request.args.get('since', default=0, type=int)
+    return compact_json(job.to_result(since))
+
+@app.route('/jobs/<job_id>/timeseries', methods=['GET'])
+def job_timeseries(job_id):
+    """Min/mean/max per bucket at the finest resolution that fits ?points= buckets in ?start=&end= (seconds).
+
+    Meant for charts: zoomed out a long session comes back as a few hundred
+    buckets, zooming in returns finer levels down to the raw 1 s samples.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    points = request.args.get('points', default=TIMESERIES_MAX_POINTS, type=int)
+    if points <= 0:
+        return jsonify({"error": "points must be positive"}), 400
+    return compact_json(job.to_level(request.args.get('start', type=float), request.args.get('end', type=float),
+                                     points))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_status())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_job_manager().cache.stats())
+
+@app.route('/models/metrics', methods=['GET'])
+def model_metrics():
+    """Model load times and memory, as last reported by each analysis worker."""
+    return jsonify({"workers": list(get_job_manager().worker_metrics.values())})
+
+# ---------- Live ingest (during the talk) ----------
+@app.route('/live/records', methods=['POST'])
+def live_ingest():
+    """Batch of interval records from emotion_logger.py clients: a JSON list or {"records": [...]}."""
+    body = request.get_json(silent=True)
+    records = body.get("records") if isinstance(body, dict) else body
+    if not isinstance(records, list):
+        return jsonify({"error": "Expected a list of records"}), 400
+    return jsonify({"accepted": live.ingest(records), "received": len(records)})
+
+@app.route('/live/snapshot', methods=['GET'])
+def live_snapshot():
+    return jsonify(live.snapshot())
+
+@app.route('/live/stream', methods=['GET'])
+def live_stream():
+    """Server-Sent Events stream of live snapshots for the dashboard."""
+    return Response(live.stream(LIVE_PUSH_INTERVAL_S), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ---------- Client log uploads ----------
+@app.route('/sync/batches', methods=['POST'])
+def sync_batch():
+    """One gzip-compressed batch of a client's log records (scripts/sync_backends.py)."""
+    status, payload = sync_store.receive(request.get_data(), request.headers.get('Content-Encoding'),
+                                         request.headers.get('Authorization'))
+    return jsonify(payload), status
+
+# ---------- Range queries over the merged dataset ----------
+def _range_args():
+    return {
+        "start": request.args.get('start', type=float),
+        "end": request.args.get('end', type=float),
+        "user": request.args.get('user'),
+        "session": request.args.get('session'),
+    }
+
+@app.route('/data/sessions', methods=['GET'])
+def data_sessions():
+    """Indexed sessions, filtered by ?user= and an overlapping ?start=&end= (epoch seconds)."""
+    index = get_time_index()
+    if index is None:
+        return jsonify({"error": "No index yet; run scripts/Host.py"}), 404
+    args = _range_args()
+    return jsonify({"sessions": index.sessions(args["user"], args["start"], args["end"])})
+
+@app.route('/data/slice', methods=['GET'])
+def data_slice():
+    """Raw records in [start, end) for an optional ?user= or ?session=, at most ?limit= of them."""
+    index = get_time_index()
+    if index is None:
+        return jsonify({"error": "No index yet; run scripts/Host.py"}), 404
+    limit = request.args.get('limit', default=DATA_SLICE_LIMIT, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+    limit = min(limit, DATA_SLICE_LIMIT)
+    try:
+        records = list(index.slice(**_range_args(), limit=limit + 1))
+    except KeyError:
+        return jsonify({"error": "Unknown session"}), 404
+    return jsonify({"records": records[:limit], "truncated": len(records) > limit})
+
+@app.route('/data/series', methods=['GET'])
+def data_series():
+    """Mean scores, pitch and distraction per ?step= seconds (default 30) over the same filters as /data/slice."""
+    index = get_time_index()
+    if index is None:
+        return jsonify({"error": "No index yet; run scripts/Host.py"}), 404
+    step = request.args.get('step', default=30.0, type=float)
+    if step <= 0:
+        return jsonify({"error": "step must be positive"}), 400
+    try:
+        return jsonify(index.series(step, **_range_args()))
+    except KeyError:
+        return jsonify({"error": "Unknown session"}), 404
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
\ No newline at end of file
+    if MODEL_WARMUP:
+        get_job_manager()   # spawn workers (and load their models) before serving
+    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False, threaded=True)
\ No newline at end of file
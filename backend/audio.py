@@ -0,0 +1,51 @@
+import subprocess
+import numpy as np
+from config import ENHANCE_AUDIO
+from transcription import transcribe_chunked
+
+SAMPLE_RATE = 16000   # Whisper's native rate
+ENHANCE_GAIN_DB = 10
+
+# ---------- AUDIO HELPERS ----------
+def load_audio(video_path):
+    """Decode the audio track straight into memory as 16 kHz mono float32 in [-1, 1].
+
+    ffmpeg writes raw s16le PCM to stdout, so no temporary WAV is written or
+    re-read. Returns None when the video has no audio track.
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-i', video_path,
+        '-vn', '-f', 's16le', '-acodec', 'pcm_s16le',
+        '-ar', str(SAMPLE_RATE), '-ac', '1', '-'
+    ]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0:
+        stderr = proc.stderr.decode(errors="replace")
+        if "does not contain any stream" in stderr or "Output file is empty" in stderr:
+            return None  # No audio track – skip
+        raise Exception(f"FFmpeg error: {stderr}")
+    if not proc.stdout:
+        return None
+    samples = np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
+
+def enhance_audio(samples, gain_db=ENHANCE_GAIN_DB):
+    """Apply a fixed gain in place, clipping like a 16-bit WAV would."""
+    samples *= 10 ** (gain_db / 20)
+    np.clip(samples, -1.0, 1.0, out=samples)
+    return samples
+
+# ------------------------------------
+
+def process_transcription(video_path, pool, should_cancel=None):
+    """(text, segments) of the video's speech, transcribed on the shared Whisper `pool`.
+
+    Returns None if `should_cancel()` turns True before the transcript is done.
+    """
+    samples = load_audio(video_path)
+    if samples is None or samples.size == 0:
+        return "", []
+    if ENHANCE_AUDIO:
+        enhance_audio(samples)
+    return transcribe_chunked(samples, pool, should_cancel=should_cancel)
\ No newline at end of file
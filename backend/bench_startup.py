@@ -0,0 +1,109 @@
+"""Startup benchmark: time from launching app.py to the first /analyze result.
+
+Usage: python bench_startup.py [--video clip.webm] [--warmup]
+Starts the server on a free port, then reports when it accepts connections,
+when the first upload is accepted and when its result is complete. Without
+--video a short synthetic clip is generated.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def synthetic_video(seconds=10, fps=15):
+    import cv2
+    import numpy as np
+    path = os.path.join(tempfile.gettempdir(), "bench_startup.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (320, 240))
+    for i in range(seconds * fps):
+        frame = np.full((240, 320, 3), 40, np.uint8)
+        cv2.circle(frame, (160 + int(20 * np.sin(i / fps)), 120), 50, (180, 170, 160), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+def post_video(url, path):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        payload = f.read()
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"video\"; "
+            f"filename=\"{os.path.basename(path)}\"\r\nContent-Type: application/octet-stream\r\n\r\n"
+            ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(url, data=body, method="POST",
+                                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+def get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="video to upload (default: synthetic 10 s clip)")
+    parser.add_argument("--warmup", action="store_true", help="start the server with MODEL_WARMUP=true")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    video = args.video or synthetic_video()
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, MODEL_WARMUP="true" if args.warmup else "false")
+    launcher = f"import app; app.app.run(host='127.0.0.1', port={port}, use_reloader=False)"
+    if args.warmup:
+        launcher = f"import app; app.get_job_manager(); app.app.run(host='127.0.0.1', port={port}, use_reloader=False)"
+
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", launcher], cwd=HERE, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                get_json(f"{base}/cache/stats")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if time.perf_counter() - start > args.timeout or server.poll() is not None:
+                    raise SystemExit("❌ Server did not start.")
+                time.sleep(0.05)
+        t_listen = time.perf_counter() - start
+
+        job = post_video(f"{base}/analyze", video)
+        t_accepted = time.perf_counter() - start
+
+        while True:
+            status = get_json(f"{base}{job['status_url']}")
+            if status["status"] not in ("queued", "running"):
+                break
+            if time.perf_counter() - start > args.timeout:
+                raise SystemExit("❌ Timed out waiting for the result.")
+            time.sleep(0.1)
+        t_result = time.perf_counter() - start
+
+        print(f"Mode:               {'warm-up' if args.warmup else 'lazy'}")
+        print(f"Server listening:   {t_listen:7.2f}s")
+        print(f"Upload accepted:    {t_accepted:7.2f}s")
+        print(f"First result ({status['status']}): {t_result:7.2f}s")
+        print(json.dumps(get_json(f"{base}/models/metrics"), indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
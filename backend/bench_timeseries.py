@@ -0,0 +1,52 @@
+"""Scaling benchmark for detect_flags / compute_metrics on synthetic sessions.
+
+Usage: python bench_timeseries.py [--max-samples 1000000]
+Prints time per call and ns/sample for 10k .. max samples; roughly constant
+ns/sample means the detectors scale linearly.
+"""
+import argparse
+import time
+import numpy as np
+from timeseries import Timeseries, EMOTIONS, detect_flags, compute_metrics
+
+
+def synthetic_session(n, seed=0):
+    rng = np.random.default_rng(seed)
+    emotions = rng.dirichlet(np.ones(len(EMOTIONS)), size=n).astype(np.float32)
+    # Occasional bursts so the spike detectors have work to do
+    bursts = rng.choice(n, size=max(1, n // 600), replace=False)
+    emotions[bursts, rng.integers(0, len(EMOTIONS), len(bursts))] += 0.6
+    distracted = (rng.random(n) < 0.1).astype(np.float32)
+    engagement = np.where(distracted > 0, 0.3, 0.85).astype(np.float32)
+    return Timeseries(np.arange(n, dtype=np.float64), engagement, distracted,
+                      rng.normal(-10, 5, n), emotions)
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-samples", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'samples':>10} {'flags':>6} {'detect_flags':>14} {'compute_metrics':>16} {'ns/sample':>10}")
+    n = 10_000
+    while n <= args.max_samples:
+        ts = synthetic_session(n)
+        t_flags = timed(detect_flags, ts)
+        t_metrics = timed(compute_metrics, ts)
+        flags = len(detect_flags(ts))
+        per_sample = (t_flags + t_metrics) / n * 1e9
+        print(f"{n:>10} {flags:>6} {t_flags * 1000:>12.1f}ms {t_metrics * 1000:>14.1f}ms {per_sample:>10.0f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
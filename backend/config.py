@@ -0,0 +1,41 @@
+import os
+
+# Control audio enhancement via environment variable (default: off)
+ENHANCE_AUDIO = os.getenv("ENHANCE_AUDIO", "false").lower() == "true"
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")   # faster than "medium"
+# Whisper runs in this many worker processes, shared by every /analyze job; audio longer
+# than one chunk is split at pauses so its chunks run in parallel
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+TRANSCRIBE_CHUNK_S = int(os.getenv("TRANSCRIBE_CHUNK_S", "120"))
+
+# Emotion pass: bump EMOTION_MODEL when the face/emotion pipeline changes so cached results are invalidated
+EMOTION_MODEL = "fer+facemesh-v1"
+MAX_FACES = int(os.getenv("MAX_FACES", "10"))
+
+# On-disk /analyze result cache
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"))
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "512"))
+
+# /jobs/<id>/timeseries: default chart resolution (buckets per response), and responses
+# smaller than this are not worth gzipping
+TIMESERIES_MAX_POINTS = int(os.getenv("TIMESERIES_MAX_POINTS", "1000"))
+GZIP_MIN_BYTES = 1024
+
+# Live ingest during the talk: bucket size, how much history is kept in memory, SSE push rate
+LIVE_BUCKET_S = int(os.getenv("LIVE_BUCKET_S", "5"))
+LIVE_WINDOW_S = int(os.getenv("LIVE_WINDOW_S", "600"))
+LIVE_USER_HISTORY = int(os.getenv("LIVE_USER_HISTORY", "120"))
+LIVE_PUSH_INTERVAL_S = float(os.getenv("LIVE_PUSH_INTERVAL_S", "1.0"))
+# How far ahead of the server clock a client record may be before it is dropped
+LIVE_MAX_SKEW_S = float(os.getenv("LIVE_MAX_SKEW_S", "30"))
+
+# Client log uploads (SYNC_BACKEND=http on the clients) land here, ready for scripts/Host.py to merge
+SYNC_DATA_DIR = os.getenv("SYNC_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_data"))
+# Shared secret the clients send as "Authorization: Bearer <token>"; uploads are refused while it is unset
+SYNC_TOKEN = os.getenv("SYNC_TOKEN")
+
+# Merged master log written by scripts/Host.py (and its .index.json sidecar) served by the /data/* range queries
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MASTER_DATA_FILE = os.getenv("MASTER_DATA_FILE", os.path.join(REPO_DIR, "master_emotion_data.jsonl"))
+# Largest slice /data/slice returns in one response
+DATA_SLICE_LIMIT = int(os.getenv("DATA_SLICE_LIMIT", "10000"))
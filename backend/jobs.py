@@ -0,0 +1,343 @@
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from result_cache import ResultCache, transcript_key, emotions_key
+from timeseries import Timeseries, detect_flags, compute_metrics, build_pyramid, pyramid_level, encode_level
+from config import TRANSCRIBE_WORKERS
+from models import registry, MODEL_WARMUP
+from audio import process_transcription
+from transcription import new_pool as new_transcription_pool
+
+ANALYZE_WORKERS = int(os.getenv("ANALYZE_WORKERS", "2"))
+ANALYZE_QUEUE_SIZE = int(os.getenv("ANALYZE_QUEUE_SIZE", "8"))
+JOB_TTL_S = 3600   # finished jobs are forgotten after an hour
+# Whisper only ever runs on the shared transcription pool, so analysis workers never load it
+ANALYSIS_MODELS = ("fer", "face_mesh")
+
+ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _init_worker():
+    """Runs once in every analysis worker process."""
+    if MODEL_WARMUP:
+        registry.warm_up(ANALYSIS_MODELS, background=True)
+
+def _spawn_worker(models):
+    """Warm-up task: returns the worker's ModelRegistry.metrics() once `models` are loaded."""
+    registry.warm_up(models, background=False)
+    return registry.metrics()
+
+
+def _run_job(job_id, video_path, fps_target, updates, cancel_event, cache_keys=None, cached=None):
+    """Worker-process entry point for the emotion pass; reports back through the `updates` queue.
+
+    `cached` holds stage results found in the result cache; a timeseries that
+    had to be computed is written back under `cache_keys`.
+    """
+    cached = cached or {}
+    def publish(kind, **payload):
+        updates.put((job_id, kind, payload))
+
+    try:
+        # Imported here so the Flask process never imports OpenCV or the analysis stack
+        from analysis import run_analysis
+        from video_engine import video_duration
+
+        publish("running", duration_s=video_duration(video_path))
+        result = run_analysis(
+            video_path, fps_target,
+            on_rows=lambda rows, processed_s: publish("rows", rows=rows, processed_s=processed_s),
+            should_cancel=cancel_event.is_set, timeseries=cached.get("emotions"))
+        if result is None:
+            publish("cancelled")
+            return
+        if cache_keys and "emotions" not in cached:
+            ResultCache().put("emotions", cache_keys["emotions"], result["timeseries"])
+        result.pop("timeseries")   # already streamed row by row
+        publish("worker", metrics=registry.metrics())
+        publish("done", result=result)
+    except Exception as e:
+        publish("error", error=str(e))
+
+
+class Job:
+    def __init__(self, job_id, video_path):
+        self.id = job_id
+        self.video_path = video_path
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.duration_s = None
+        self.processed_s = 0.0
+        self.timeseries = []
+        self.result = None
+        self.analysis = None     # flags and metrics from the emotion pass
+        self.transcript = None   # (text, segments)
+        self.pyramid = None   # level-of-detail pyramid, built once the timeseries is complete
+        self.error = None
+        self.future = None
+        self.cancel_event = None
+
+    def to_status(self):
+        progress = None
+        if self.status == "done":
+            progress = 1.0
+        elif self.duration_s:
+            progress = round(min(1.0, self.processed_s / self.duration_s), 3)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": progress,
+            "processed_s": self.processed_s,
+            "duration_s": self.duration_s,
+            "rows": len(self.timeseries),
+            "error": self.error,
+        }
+
+    def to_result(self, since=0):
+        """Status plus timeseries rows from index `since`; full result once done."""
+        body = self.to_status()
+        body["timeseries"] = self.timeseries[since:]
+        body["next"] = len(self.timeseries)
+        if self.status == "done":
+            body.update(self.result)
+        return body
+
+    def to_level(self, start=None, end=None, max_points=1000):
+        """Compact timeseries at the finest resolution with <= max_points buckets in [start, end).
+
+        Finished jobs use the precomputed pyramid; a running job's partial
+        timeseries is reduced on the fly.
+        """
+        pyramid = self.pyramid if self.pyramid is not None else build_pyramid(list(self.timeseries))
+        body = encode_level(*pyramid_level(pyramid, start, end, max_points))
+        body["status"] = self.status
+        return body
+
+
+class JobManager:
+    """Bounded /analyze job queue backed by two process pools.
+
+    At most `workers` jobs run their emotion pass at once and at most
+    `max_queued` more may wait; beyond that `submit` raises QueueFull.
+    Workers stream partial timeseries, progress and flags/metrics back over a
+    managed queue that a dispatcher thread applies to the in-memory Job table.
+    Every job's transcript is split into chunks on one shared Whisper pool of
+    TRANSCRIBE_WORKERS processes, whatever the number of jobs; a job is done
+    once both its stages are.
+    """
+
+    def __init__(self, workers=ANALYZE_WORKERS, max_queued=ANALYZE_QUEUE_SIZE, ttl_s=JOB_TTL_S):
+        # spawn: TensorFlow / MediaPipe do not survive fork() from a threaded server
+        self._ctx = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl_s = ttl_s
+        self._manager = self._ctx.Manager()
+        self._updates = self._manager.Queue()
+        self._pool = self._new_pool()
+        self._transcriber = new_transcription_pool()
+        self._jobs = {}
+        self.worker_metrics = {}   # pid -> ModelRegistry.metrics() reported by that worker
+        self._lock = threading.RLock()
+        self.cache = ResultCache()
+        threading.Thread(target=self._dispatch, daemon=True).start()
+        if MODEL_WARMUP:
+            # Start every worker now so models load before the first upload arrives
+            for _ in range(workers):
+                self._pool.submit(_spawn_worker, ANALYSIS_MODELS).add_done_callback(self._record_metrics)
+            for _ in range(TRANSCRIBE_WORKERS):
+                self._transcriber.submit(_spawn_worker, ["whisper"]).add_done_callback(self._record_metrics)
+
+    def _record_metrics(self, future):
+        if not future.cancelled() and future.exception() is None:
+            metrics = future.result()
+            self.worker_metrics[metrics["pid"]] = metrics
+
+    def _new_pool(self):
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx,
+                                                      initializer=_init_worker)
+
+    def _replace_pool(self, broken):
+        """Swap a pool broken by a dead worker (e.g. out of memory) for a fresh one.
+
+        The broken pool has already failed every future it held, so each of
+        its jobs is marked failed by `_on_exit`.
+        """
+        with self._lock:
+            if self._pool is broken:
+                self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _replace_transcriber(self, broken):
+        """Same as `_replace_pool` for the shared Whisper pool."""
+        with self._lock:
+            if self._transcriber is broken:
+                self._transcriber = new_transcription_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, video_path, fps_target=1, video_hash=None):
+        """Queue `video_path`; `video_hash` (sha256 of the upload) enables the result cache."""
+        cache_keys, cached = None, {}
+        if video_hash:
+            cache_keys = {"transcript": transcript_key(video_hash), "emotions": emotions_key(video_hash, fps_target)}
+            for stage, key in cache_keys.items():
+                value = self.cache.get(stage, key)
+                if value is not None:
+                    cached[stage] = value
+
+        with self._lock:
+            self._evict()
+            job = Job(uuid.uuid4().hex, video_path)
+            if cache_keys and len(cached) == len(cache_keys):
+                # Fully cached uploads never need a worker, so they bypass the queue limit
+                self._jobs[job.id] = job
+                self._complete_from_cache(job, cached)
+                return job
+            active = sum(1 for j in self._jobs.values() if j.status in ACTIVE)
+            if active >= self.workers + self.max_queued:
+                raise QueueFull(f"{active} analyses already queued or running")
+            self._jobs[job.id] = job
+            job.cancel_event = self._manager.Event()
+            args = (_run_job, job.id, video_path, fps_target, self._updates, job.cancel_event, cache_keys, cached)
+            pool = self._pool
+            try:
+                job.future = pool.submit(*args)
+            except BrokenProcessPool:
+                # A worker died since the last submit: retry this job on a fresh pool
+                self._replace_pool(pool)
+                pool = self._pool
+                job.future = pool.submit(*args)
+            job.future.add_done_callback(lambda future, job=job, pool=pool: self._on_exit(job, future, pool))
+            if "transcript" in cached:
+                job.transcript = cached["transcript"]
+            else:
+                threading.Thread(target=self._transcribe, args=(job, cache_keys), daemon=True).start()
+        return job
+
+    def _complete_from_cache(self, job, cached):
+        """Every stage was cached: only the cheap flag/metric pass is left."""
+        columns = Timeseries.from_items(cached["emotions"])
+        text, segments = cached["transcript"]
+        job.timeseries = cached["emotions"]
+        job.pyramid = build_pyramid(columns)
+        job.processed_s = job.duration_s = float(columns.t_s[-1]) if len(columns) else 0.0
+        job.result = {
+            "flags": detect_flags(columns),
+            "metrics": compute_metrics(columns),
+            "transcript": text,
+            "transcript_segments": segments,
+        }
+        self._finish(job, "done")
+
+    def _transcribe(self, job, cache_keys):
+        """Transcription thread of one job: its chunks run on the shared Whisper pool.
+
+        A cancelled or failed job stops between chunks, so its remaining
+        chunks never hold up other jobs' transcripts.
+        """
+        pool = self._transcriber
+        try:
+            transcript = process_transcription(
+                job.video_path, pool,
+                should_cancel=lambda: job.status not in ACTIVE or job.cancel_event.is_set())
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._replace_transcriber(pool)
+            with self._lock:
+                if job.status in ACTIVE:
+                    job.error = str(e)
+                    self._finish(job, "error")
+            return
+        if transcript is None:
+            return   # cancelled: the emotion pass or cancel() finishes the job
+        if cache_keys:
+            self.cache.put("transcript", cache_keys["transcript"], list(transcript))
+        with self._lock:
+            job.transcript = transcript
+            self._complete(job)
+
+    def _complete(self, job):
+        """Finish `job` once both the emotion pass and the transcript are in."""
+        if job.status not in ACTIVE or job.analysis is None or job.transcript is None:
+            return
+        text, segments = job.transcript
+        job.result = dict(job.analysis, transcript=text, transcript_segments=segments)
+        job.pyramid = build_pyramid(job.timeseries)
+        job.processed_s = job.duration_s or job.processed_s
+        self._finish(job, "done")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ACTIVE:
+                return job
+            if job.future.cancel() or job.future.done():
+                # Emotion pass never started or already over: no worker will report the cancel
+                self._finish(job, "cancelled")
+            else:
+                job.cancel_event.set()
+            return job
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        # No stage needs the upload any more (one still reading it keeps its open file)
+        if os.path.exists(job.video_path):
+            os.unlink(job.video_path)
+
+    def _on_exit(self, job, future, pool):
+        # A worker that died (e.g. out of memory) never reports back itself
+        if future.cancelled() or future.exception() is None:
+            return
+        if isinstance(future.exception(), BrokenProcessPool):
+            self._replace_pool(pool)
+        with self._lock:
+            if job.status in ACTIVE:
+                job.error = f"Worker failed: {future.exception()}"
+                self._finish(job, "error")
+
+    def _evict(self):
+        cutoff = time.time() - self.ttl_s
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def _dispatch(self):
+        while True:
+            try:
+                job_id, kind, payload = self._updates.get()
+            except (EOFError, OSError):
+                return   # manager shut down with the server
+            if kind == "worker":
+                self.worker_metrics[payload["metrics"]["pid"]] = payload["metrics"]
+                continue
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.status not in ACTIVE:
+                    continue
+                if kind == "running":
+                    job.status = "running"
+                    job.duration_s = payload["duration_s"]
+                elif kind == "rows":
+                    job.timeseries.extend(payload["rows"])
+                    job.processed_s = payload["processed_s"]
+                elif kind == "done":
+                    job.analysis = payload["result"]
+                    self._complete(job)
+                elif kind == "error":
+                    job.error = payload["error"]
+                    self._finish(job, "error")
+                elif kind == "cancelled":
+                    self._finish(job, "cancelled")
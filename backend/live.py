@@ -0,0 +1,128 @@
+import json
+import time
+import threading
+from collections import Counter, deque
+from config import LIVE_BUCKET_S, LIVE_WINDOW_S, LIVE_USER_HISTORY, LIVE_MAX_SKEW_S
+from session_log import EMOTION_ORDER, record_time_sec, record_emotion, record_scores   # scripts/, see app.py
+
+
+def record_emotion_score(record):
+    """(emotion, score) of the dominant emotion in any client schema."""
+    emotion = record_emotion(record)
+    if "emotion" in record:
+        return emotion, record.get("score", 1.0)
+    return emotion, record_scores(record)[EMOTION_ORDER.index(emotion)]
+
+
+class LiveAggregator:
+    """In-memory rolling aggregates of interval records posted while the talk runs.
+
+    Every user keeps a ring buffer of their last `user_history` records, and
+    the room keeps per-`bucket_s` counters for the last `window_s` seconds.
+    Older buckets and users silent for the whole window are dropped, so
+    memory stays bounded however long the talk is. Records at or before a
+    user's latest timestamp are ignored, which makes client retries idempotent.
+
+    The window is measured against the server clock: records more than
+    `max_skew_s` ahead of it, or already older than the window, are dropped,
+    so one client with a wrong clock cannot push everyone else out.
+    """
+
+    def __init__(self, bucket_s=LIVE_BUCKET_S, window_s=LIVE_WINDOW_S, user_history=LIVE_USER_HISTORY,
+                 max_skew_s=LIVE_MAX_SKEW_S):
+        self.bucket_s = bucket_s
+        self.window_buckets = max(1, window_s // bucket_s)
+        self.user_history = user_history
+        self.max_skew_s = max_skew_s
+        self.users = {}      # user -> deque of (t, emotion, score, distracted)
+        self.buckets = {}    # bucket index -> {"emotions": Counter, "distracted": int, "count": int}
+        self.version = 0
+        self._changed = threading.Condition()
+        self._snapshot = None   # (version, snapshot) shared by every dashboard stream
+
+    def _horizon(self, now):
+        """Earliest time still inside the window."""
+        return (int(now // self.bucket_s) - self.window_buckets + 1) * self.bucket_s
+
+    def ingest(self, records, now=None):
+        """Add a batch of records; returns how many were new."""
+        now = time.time() if now is None else now
+        oldest, newest = self._horizon(now), now + self.max_skew_s
+        accepted = 0
+        with self._changed:
+            for record in records:
+                try:
+                    t = record_time_sec(record)
+                    emotion, score = record_emotion_score(record)
+                    user = str(record.get("user", "unknown"))
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+                if not oldest <= t <= newest:
+                    continue
+                history = self.users.get(user)
+                if history is None:
+                    history = self.users[user] = deque(maxlen=self.user_history)
+                elif history and t <= history[-1][0]:
+                    continue
+                distracted = bool(record.get("distracted", False))
+                history.append((t, emotion, score, distracted))
+
+                bucket = self.buckets.get(int(t // self.bucket_s))
+                if bucket is None:
+                    bucket = self.buckets[int(t // self.bucket_s)] = {"emotions": Counter(), "distracted": 0, "count": 0}
+                bucket["emotions"][emotion] += 1
+                bucket["distracted"] += distracted
+                bucket["count"] += 1
+                accepted += 1
+            if accepted:
+                self._prune(now)
+                self.version += 1
+                self._changed.notify_all()
+        return accepted
+
+    def _prune(self, now):
+        horizon = self._horizon(now)
+        for index in [i for i in self.buckets if i * self.bucket_s < horizon]:
+            del self.buckets[index]
+        for user in [u for u, h in self.users.items() if h[-1][0] < horizon]:
+            del self.users[user]
+
+    def snapshot(self):
+        with self._changed:
+            if self._snapshot and self._snapshot[0] == self.version:
+                return self._snapshot[1]
+            timeline = []
+            for index in sorted(self.buckets):
+                bucket = self.buckets[index]
+                timeline.append({
+                    "start": index * self.bucket_s,
+                    "count": bucket["count"],
+                    "dominant_emotion": bucket["emotions"].most_common(1)[0][0],
+                    "distribution": {e: c / bucket["count"] for e, c in bucket["emotions"].items()},
+                    "distracted_ratio": bucket["distracted"] / bucket["count"],
+                })
+            users = {user: {"t": h[-1][0], "emotion": h[-1][1], "score": h[-1][2], "distracted": h[-1][3]}
+                     for user, h in self.users.items()}
+            snapshot = {"version": self.version, "bucket_s": self.bucket_s, "active_users": len(users),
+                        "users": users, "timeline": timeline}
+            self._snapshot = (self.version, snapshot)
+            return snapshot
+
+    def wait(self, version, timeout):
+        """Block until the version moves past `version` or `timeout` expires; returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def stream(self, push_interval, keepalive_s=15.0):
+        """Server-Sent Events: a snapshot whenever data changed, at most every `push_interval` seconds."""
+        version = -1
+        while True:
+            if self.wait(version, keepalive_s) == version:
+                yield ": keepalive\n\n"
+                continue
+            snapshot = self.snapshot()
+            version = snapshot["version"]
+            yield f"id: {version}\nevent: snapshot\ndata: {json.dumps(snapshot, separators=(',', ':'))}\n\n"
+            # Coalesce bursts of client posts into one push per interval
+            time.sleep(push_interval)
@@ -0,0 +1,92 @@
+import os
+import time
+import threading
+from config import WHISPER_MODEL, MAX_FACES
+
+# Preload every model in each worker process as soon as it starts
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "false").lower() == "true"
+
+
+def _rss_mb():
+    """Current resident set size of this process in MB (Linux), else peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ModelRegistry:
+    """Per-process registry that loads each model once, on first use.
+
+    Heavy imports (torch/whisper, TensorFlow/fer, mediapipe) happen inside the
+    loaders, so importing the backend costs nothing until a model is needed.
+    Load time and the RSS growth caused by each load are recorded.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._metrics = {}
+        self._locks = {}
+
+    def register(self, name, loader):
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            if name not in self._models:
+                rss_before, start = _rss_mb(), time.perf_counter()
+                print(f"[Models] Loading {name}...")
+                self._models[name] = self._loaders[name]()
+                self._metrics[name] = {
+                    "load_s": round(time.perf_counter() - start, 3),
+                    "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+                    "loaded_at": time.time(),
+                }
+                print(f"[Models] {name} loaded in {self._metrics[name]['load_s']}s")
+        return self._models[name]
+
+    def warm_up(self, names=None, background=True):
+        """Load `names` (default: all registered models) now, optionally on a daemon thread."""
+        names = list(names or self._loaders)
+        if not background:
+            for name in names:
+                self.get(name)
+            return None
+        thread = threading.Thread(target=self.warm_up, args=(names, False), daemon=True)
+        thread.start()
+        return thread
+
+    def metrics(self):
+        return {
+            "pid": os.getpid(),
+            "rss_mb": round(_rss_mb(), 1),
+            "models": {name: dict(self._metrics.get(name, {}), loaded=name in self._models)
+                       for name in self._loaders},
+        }
+
+
+def _load_whisper():
+    import whisper
+    return whisper.load_model(WHISPER_MODEL)
+
+def _load_fer():
+    from fer.fer import FER
+    return FER(mtcnn=False)
+
+def _load_face_mesh():
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=True, max_num_faces=MAX_FACES, refine_landmarks=False)
+
+
+registry = ModelRegistry()
+registry.register("whisper", _load_whisper)
+registry.register("fer", _load_fer)
+registry.register("face_mesh", _load_face_mesh)
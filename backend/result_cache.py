@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import threading
+from config import (ENHANCE_AUDIO, WHISPER_MODEL, TRANSCRIBE_CHUNK_S, EMOTION_MODEL, MAX_FACES,
+                    RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB)
+
+STAGES = ("transcript", "emotions")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _key(*parts):
+    return hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+
+def transcript_key(video_hash):
+    """Only settings that change the transcript are part of its key."""
+    return _key(video_hash, WHISPER_MODEL, ENHANCE_AUDIO, TRANSCRIBE_CHUNK_S)
+
+def emotions_key(video_hash, fps_target):
+    return _key(video_hash, EMOTION_MODEL, MAX_FACES, fps_target)
+
+
+class ResultCache:
+    """Content-addressed, size-bounded LRU cache of /analyze stage results.
+
+    Each stage result is one JSON file under `<root>/<stage>/`. A file's mtime
+    is its last use, so eviction removes the least recently used entries
+    until the cache fits in `max_bytes`. Writes go through a temp file and
+    os.replace, so worker processes can fill the cache concurrently.
+    """
+
+    def __init__(self, root=RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = dict.fromkeys(STAGES, 0)
+        self.misses = dict.fromkeys(STAGES, 0)
+        self._lock = threading.Lock()
+        for stage in STAGES:
+            os.makedirs(os.path.join(root, stage), exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.root, stage, f"{key}.json")
+
+    def get(self, stage, key):
+        path = self._path(stage, key)
+        try:
+            with open(path, "r") as f:
+                value = json.load(f)
+            os.utime(path)   # mark as recently used
+        except (OSError, json.JSONDecodeError):
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses[stage] += 1
+            else:
+                self.hits[stage] += 1
+        return value
+
+    def put(self, stage, key, value):
+        path = self._path(stage, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for stage in STAGES:
+            folder = os.path.join(self.root, stage)
+            for name in os.listdir(folder):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(folder, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, os.path.join(folder, name)))
+        return entries
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "entries": len(entries),
+                "size_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,149 @@
+"""Receiving side of the HTTP sync transport (scripts/sync_backends.py).
+
+Also runnable as a dependency-free stand-in server for testing clients:
+    SYNC_TOKEN=secret python sync_store.py [--port 8765] [--root /tmp/user_data]
+"""
+import os
+import gzip
+import hmac
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config import SYNC_DATA_DIR, SYNC_TOKEN
+
+
+class SyncStore:
+    """Appends uploaded batches to one JSONL file per client log under `root`.
+
+    A batch is identified by (user, source file, byte offset of its first
+    record in the client's log); batches already stored are acknowledged as
+    duplicates without writing, so client retries and resumed uploads never
+    duplicate records. A reset batch (the client's log was rewritten) starts
+    that file over and forgets its keys. Seen keys are kept in
+    `<root>/.sync_keys` so this holds across server restarts.
+
+    Files are stored flat under `root` (what Host.py merges), so each file
+    belongs to the first user who uploads it (`<root>/.sync_owners.json`);
+    another user's batches for the same filename are rejected rather than
+    mixed into, or truncating, the owner's log.
+
+    Only requests carrying `token` as a bearer token are accepted; with no
+    token configured every upload is refused.
+    """
+
+    def __init__(self, root=SYNC_DATA_DIR, token=SYNC_TOKEN):
+        self.root = root
+        self.token = token
+        os.makedirs(root, exist_ok=True)
+        self._keys_path = os.path.join(root, ".sync_keys")
+        self._owners_path = os.path.join(root, ".sync_owners.json")
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._owners = {}   # source filename -> user
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "r") as f:
+                self._keys = {line.strip() for line in f if line.strip()}
+        if os.path.exists(self._owners_path):
+            with open(self._owners_path, "r") as f:
+                self._owners = json.load(f)
+
+    def authorized(self, authorization):
+        """True if the Authorization header carries the shared sync token."""
+        if not self.token or not authorization:
+            return False
+        scheme, _, token = authorization.partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), self.token.encode())
+
+    def receive(self, body, encoding=None, authorization=None):
+        """Store one batch; returns (http_status, response_dict)."""
+        if not self.authorized(authorization):
+            return 401, {"error": "Missing or invalid sync token"}
+        try:
+            if encoding == "gzip":
+                body = gzip.decompress(body)
+            batch = json.loads(body)
+            user = batch["user"]
+            source = os.path.basename(batch["source"])
+            records = batch["records"]
+            key = f"{user}/{source}/{int(batch['offset'])}"
+        except (OSError, ValueError, KeyError, TypeError):
+            return 400, {"error": "Malformed batch"}
+        if not isinstance(user, str) or not user or "/" in user:
+            return 400, {"error": "Expected a user id without '/'"}
+        if not source.endswith(".jsonl") or not isinstance(records, list):
+            return 400, {"error": "Expected records for a .jsonl source"}
+
+        with self._lock:
+            owner = self._owners.get(source)
+            if owner is None:
+                self._owners[source] = user
+                self._save_owners()
+            elif owner != user:
+                return 409, {"error": f"{source} is already uploaded by another user"}
+            if batch.get("reset"):
+                # The client's log was rewritten: its offsets start over
+                prefix = key.rsplit("/", 1)[0] + "/"
+                self._keys = {k for k in self._keys if not k.startswith(prefix)}
+                self._save_keys()
+            elif key in self._keys:
+                return 200, {"status": "duplicate", "stored": 0}
+            mode = "w" if batch.get("reset") else "a"
+            with open(os.path.join(self.root, source), mode, encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._keys.add(key)
+            with open(self._keys_path, "a") as f:
+                f.write(key + "\n")
+        return 200, {"status": "stored", "stored": len(records)}
+
+    def _save_owners(self):
+        tmp_path = self._owners_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._owners, f)
+        os.replace(tmp_path, self._owners_path)
+
+    def _save_keys(self):
+        tmp_path = self._keys_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(key + "\n" for key in sorted(self._keys))
+        os.replace(tmp_path, self._keys_path)
+
+
+def serve(store, host="127.0.0.1", port=8765):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/sync/batches":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status, payload = store.receive(body, self.headers.get("Content-Encoding"),
+                                            self.headers.get("Authorization"))
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 128   # many clients finish at the same moment
+
+    server = Server((host, port), Handler)
+    print(f"[Sync] Stand-in server on http://{host}:{server.server_port}/sync/batches -> {store.root}")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in /sync/batches server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--root", default=SYNC_DATA_DIR)
+    args = parser.parse_args()
+    if not SYNC_TOKEN:
+        parser.error("set SYNC_TOKEN to the token the clients send")
+    serve(SyncStore(args.root), port=args.port).serve_forever()
@@ -0,0 +1,250 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Column order of TimeseriesItem emotions (src/types.ts)
+EMOTIONS = ["happy", "neutral", "sad", "anger", "fear", "surprise", "disgust"]
+
+# Detector tuning; windows are in samples (1 sample = 1 s at the default fps_target)
+SPIKE_WINDOW = 30          # trailing baseline for emotion z-scores
+SPIKE_Z = 3.0              # z-score that counts as an emotion spike
+SPIKE_MIN_DELTA = 0.1      # ignore statistically large but tiny absolute changes
+DROP_WINDOW = 10           # before/after window for engagement change-points
+DROP_MIN = 0.15            # engagement drop (0-1) that counts as a flag
+DISTRACTION_WINDOW = 5     # smoothing window for distracted_mean
+DISTRACTION_MIN = 0.5      # smoothed distraction level that counts as a spike
+MIN_FLAG_GAP = 10          # non-maximum suppression radius between flags of one type
+MAX_FLAGS = 20
+
+# Level-of-detail pyramid for the charts: bucket sizes in seconds (each divides the next) and the
+# TimeseriesItem fields summarised per bucket
+PYRAMID_BUCKETS = (1, 5, 15, 60, 300, 900)
+PYRAMID_FIELDS = EMOTIONS + ["engagement_mean", "distracted_mean"]
+
+
+class Timeseries:
+    """Columnar view of a TimeseriesItem list.
+
+    `emotions` is an (n, 7) float32 matrix in EMOTIONS order; every other field
+    is a 1-D array, so detectors work on whole columns at once.
+    """
+
+    def __init__(self, t_s, engagement, distracted, pitch, emotions):
+        self.t_s = np.asarray(t_s, dtype=np.float64)
+        self.engagement = np.asarray(engagement, dtype=np.float32)
+        self.distracted = np.asarray(distracted, dtype=np.float32)
+        self.pitch = np.asarray(pitch, dtype=np.float32)
+        self.emotions = np.asarray(emotions, dtype=np.float32).reshape(len(self.t_s), len(EMOTIONS))
+
+    def __len__(self):
+        return len(self.t_s)
+
+    @classmethod
+    def from_items(cls, items):
+        n = len(items)
+        return cls(
+            np.fromiter((r["t_s"] for r in items), np.float64, n),
+            np.fromiter((r["engagement_mean"] for r in items), np.float32, n),
+            np.fromiter((r["distracted_mean"] for r in items), np.float32, n),
+            np.fromiter((r.get("pitch", 0.0) for r in items), np.float32, n),
+            np.array([[r[e] for e in EMOTIONS] for r in items], dtype=np.float32).reshape(n, len(EMOTIONS)),
+        )
+
+    def to_items(self):
+        columns = [self.t_s.tolist(), self.engagement.tolist(), self.distracted.tolist(), self.pitch.tolist()]
+        emotions = self.emotions.tolist()
+        return [dict(t_s=t, engagement_mean=e, distracted_mean=d, pitch=p, **dict(zip(EMOTIONS, emo)))
+                for t, e, d, p, emo in zip(*columns, emotions)]
+
+
+def as_timeseries(timeseries):
+    return timeseries if isinstance(timeseries, Timeseries) else Timeseries.from_items(timeseries)
+
+
+# ---------- ROLLING WINDOWS (cumulative sums, O(n)) ----------
+def _cumsum0(x):
+    c = np.zeros((len(x) + 1,) + x.shape[1:], dtype=np.float64)
+    np.cumsum(x, axis=0, out=c[1:])
+    return c
+
+def trailing_mean_std(x, window):
+    """Mean/std of the `window` samples *before* each index (excluding it)."""
+    c, c2 = _cumsum0(x), _cumsum0(np.square(x, dtype=np.float64))
+    end = np.arange(len(x))
+    start = np.maximum(0, end - window)
+    count = np.maximum(end - start, 1).reshape((-1,) + (1,) * (x.ndim - 1))
+    mean = (c[end] - c[start]) / count
+    var = np.maximum((c2[end] - c2[start]) / count - mean ** 2, 0.0)
+    return mean, np.sqrt(var)
+
+def window_means(x, window):
+    """Means of the `window` samples before and from each index (change-point sides)."""
+    c = _cumsum0(x)
+    idx = np.arange(len(x))
+    lo, hi = np.maximum(0, idx - window), np.minimum(len(x), idx + window)
+    before = (c[idx] - c[lo]) / np.maximum(idx - lo, 1)
+    after = (c[hi] - c[idx]) / np.maximum(hi - idx, 1)
+    return before, after
+
+def centered_mean(x, window):
+    c = _cumsum0(x)
+    idx = np.arange(len(x))
+    lo, hi = np.maximum(0, idx - window // 2), np.minimum(len(x), idx + window // 2 + 1)
+    return (c[hi] - c[lo]) / (hi - lo)
+
+def local_peaks(score, threshold, radius=MIN_FLAG_GAP):
+    """Indices where `score` >= threshold and is the maximum within +-radius."""
+    if len(score) == 0:
+        return np.array([], dtype=np.int64)
+    padded = np.pad(score, radius, constant_values=-np.inf)
+    neighborhood_max = sliding_window_view(padded, 2 * radius + 1).max(axis=1)
+    peaks = np.flatnonzero((score >= threshold) & (score >= neighborhood_max))
+    # Plateaus: keep only the first index of equal neighbouring maxima
+    if len(peaks) > 1:
+        peaks = peaks[np.concatenate(([True], np.diff(peaks) > radius))]
+    return peaks
+# ------------------------------------
+
+
+# ---------- DETECTORS ----------
+def _emotion_spikes(ts):
+    mean, std = trailing_mean_std(ts.emotions, SPIKE_WINDOW)
+    delta = ts.emotions - mean
+    z = np.where(delta >= SPIKE_MIN_DELTA, delta / np.maximum(std, 0.02), 0.0)
+    z[:min(len(z), SPIKE_WINDOW // 3)] = 0.0  # no baseline yet
+    best = z.max(axis=1)
+    peaks = local_peaks(best, SPIKE_Z)
+    severity = np.clip((best[peaks] - SPIKE_Z) / (2 * SPIKE_Z), 0.0, 1.0) * 0.5 + 0.5
+    return peaks, severity
+
+def _engagement_drops(ts):
+    before, after = window_means(ts.engagement, DROP_WINDOW)
+    drop = before - after
+    drop[:min(len(drop), DROP_WINDOW // 2)] = 0.0
+    peaks = local_peaks(drop, DROP_MIN)
+    severity = np.clip(drop[peaks] / 0.5, 0.0, 1.0)
+    return peaks, severity
+
+def _distraction_spikes(ts):
+    smoothed = centered_mean(ts.distracted, DISTRACTION_WINDOW)
+    baseline = float(np.median(ts.distracted)) if len(ts) else 0.0
+    excess = smoothed - baseline
+    peaks = local_peaks(np.where(smoothed >= DISTRACTION_MIN, excess, -np.inf), 0.1)
+    severity = np.clip(smoothed[peaks], 0.0, 1.0)
+    return peaks, severity
+
+DETECTORS = {
+    "emotion_spike": _emotion_spikes,
+    "engagement_drop": _engagement_drops,
+    "distraction_spike": _distraction_spikes,
+}
+
+def detect_flags(timeseries, max_flags=MAX_FLAGS):
+    """Flag dicts (src/types.ts `Flag`) for a TimeseriesItem list or Timeseries."""
+    ts = as_timeseries(timeseries)
+    if len(ts) == 0:
+        return []
+
+    found = [(name, *detector(ts)) for name, detector in DETECTORS.items()]
+    index = np.concatenate([p for _, p, _ in found])
+    severity = np.concatenate([s for _, _, s in found])
+    kind = np.concatenate([np.full(len(p), name, dtype=object) for name, p, _ in found])
+
+    keep = np.argsort(-severity, kind="stable")[:max_flags]
+    keep = keep[np.argsort(index[keep], kind="stable")]
+
+    before, after = window_means(ts.engagement, DROP_WINDOW)
+    distracted_peak = sliding_window_view(
+        np.pad(ts.distracted, DROP_WINDOW // 2, mode="edge"), 2 * (DROP_WINDOW // 2) + 1).max(axis=1)
+    top3 = np.argsort(-ts.emotions[index[keep]], axis=1)[:, :3]
+
+    flags = []
+    for n, (k, order) in enumerate(zip(keep, top3), start=1):
+        i = index[k]
+        flags.append({
+            "flag_id": f"F_{n}",
+            "t_s": float(ts.t_s[i]),
+            "type": kind[k],
+            "severity_0_1": round(float(severity[k]), 3),
+            "top_emotions": [{"emotion": EMOTIONS[j], "value": round(float(ts.emotions[i, j]), 4)} for j in order],
+            "evidence": {
+                "engagement_before_0_1": round(float(before[i]), 4),
+                "engagement_after_0_1": round(float(after[i]), 4),
+                "distracted_peak_0_1": round(float(distracted_peak[i]), 4),
+            },
+        })
+    return flags
+
+def compute_metrics(timeseries):
+    """SessionMetrics dict; same formulas as computeSessionMetrics in src/data/mockData.ts."""
+    ts = as_timeseries(timeseries)
+    if len(ts) == 0:
+        return {
+            "duration_s": 0,
+            "avg_engagement_0_1": 0,
+            "distraction_rate_0_1": 0,
+            "dominant_emotion": "neutral",
+            "presentation_score_0_100": 0,
+        }
+    avg_engagement = float(ts.engagement.mean(dtype=np.float64))
+    avg_distraction = float(ts.distracted.mean(dtype=np.float64))
+    return {
+        "duration_s": float(ts.t_s[-1]),
+        "avg_engagement_0_1": round(avg_engagement, 4),
+        "distraction_rate_0_1": round(avg_distraction, 4),
+        "dominant_emotion": EMOTIONS[int(np.argmax(ts.emotions.sum(axis=0, dtype=np.float64)))],
+        "presentation_score_0_100": int(round(avg_engagement * 70 + (1 - avg_distraction) * 30)),
+    }
+# ------------------------------------
+
+
+# ---------- LEVEL-OF-DETAIL PYRAMID ----------
+def build_pyramid(timeseries, bucket_sizes=PYRAMID_BUCKETS):
+    """Min/mean/max of every PYRAMID_FIELDS column per bucket, for each size in `bucket_sizes`.
+
+    The finest level is reduced from the samples with np.*.reduceat over the
+    bucket boundaries and every coarser level from the one below it
+    (count-weighted means), so the whole pyramid is O(n). Samples must be in
+    time order. Returns {bucket_s: level}; a level holds `t` (bucket start),
+    `count` and (buckets, fields) `min`, `mean` and `max` arrays.
+    """
+    ts = as_timeseries(timeseries)
+    x = np.column_stack([ts.emotions, ts.engagement, ts.distracted]).astype(np.float64)
+    t, count, lo, total, hi = ts.t_s, np.ones(len(ts)), x, x, x
+    pyramid = {}
+    for size in sorted(bucket_sizes):
+        ids = np.floor(t / size).astype(np.int64)
+        starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1]))) if len(ids) else ids
+        if len(starts):
+            count = np.add.reduceat(count, starts)
+            lo = np.minimum.reduceat(lo, starts, axis=0)
+            hi = np.maximum.reduceat(hi, starts, axis=0)
+            total = np.add.reduceat(total, starts, axis=0)
+        t = ids[starts] * float(size)
+        pyramid[size] = {"t": t, "count": count, "min": lo, "mean": total / np.maximum(count, 1)[:, None],
+                         "max": hi}
+    return pyramid
+
+def pyramid_level(pyramid, start=None, end=None, max_points=1000):
+    """(bucket_s, level) of the finest level with at most `max_points` buckets overlapping [start, end).
+
+    The level's arrays are sliced to that range; if even the coarsest level
+    is too dense it is returned anyway.
+    """
+    for size in sorted(pyramid):
+        level = pyramid[size]
+        lo = 0 if start is None else int(np.searchsorted(level["t"], start - size, side="right"))
+        hi = len(level["t"]) if end is None else int(np.searchsorted(level["t"], end, side="left"))
+        if hi - lo <= max_points:
+            break
+    return size, {name: column[lo:hi] for name, column in level.items()}
+
+def encode_level(bucket_s, level, decimals=3):
+    """Compact column-major JSON form: one list per field instead of one object per bucket."""
+    return {
+        "bucket_s": bucket_s,
+        "fields": PYRAMID_FIELDS,
+        "t": level["t"].tolist(),
+        "count": level["count"].astype(np.int64).tolist(),
+        **{stat: np.round(level[stat].T, decimals).tolist() for stat in ("min", "mean", "max")},
+    }
+# ------------------------------------
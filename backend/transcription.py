@@ -0,0 +1,107 @@
+import concurrent.futures
+import multiprocessing
+import numpy as np
+from config import TRANSCRIBE_WORKERS, TRANSCRIBE_CHUNK_S
+from models import registry
+
+SAMPLE_RATE = 16000
+OVERLAP_S = 2.0          # context added on both sides of every chunk
+SEARCH_S = 10.0          # how far from the nominal cut point to look for silence
+FRAME_S = 0.03           # VAD analysis frame
+CANCEL_POLL_S = 0.5      # how often a waiting transcription checks for cancellation
+
+
+# ---------- SILENCE-AWARE CHUNKING ----------
+def frame_energy(samples, sr=SAMPLE_RATE, frame_s=FRAME_S):
+    """RMS energy per `frame_s` frame (vectorized over a reshaped view)."""
+    frame = int(sr * frame_s)
+    n = len(samples) // frame
+    frames = samples[:n * frame].reshape(n, frame)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+def chunk_bounds(samples, sr=SAMPLE_RATE, chunk_s=TRANSCRIBE_CHUNK_S, search_s=SEARCH_S):
+    """Split points (in samples) near every `chunk_s`, moved to the quietest nearby frame.
+
+    Cutting in a pause keeps words from being split between two chunks; the
+    overlap added around each chunk covers cuts that still land mid-speech.
+    Returns a list of (start, end) core ranges that tile the whole signal.
+    """
+    total = len(samples)
+    if total <= (chunk_s + search_s) * sr:
+        return [(0, total)]
+
+    energy = frame_energy(samples, sr)
+    frame = int(sr * FRAME_S)
+    # Short moving average so a single quiet frame inside a word doesn't count as a pause
+    smooth = np.convolve(energy, np.ones(5, dtype=np.float32) / 5, mode="same")
+
+    cuts = [0]
+    while total - cuts[-1] > (chunk_s + search_s) * sr:
+        nominal = (cuts[-1] + chunk_s * sr) // frame
+        lo = max(cuts[-1] // frame + 1, nominal - int(search_s / FRAME_S))
+        hi = min(len(smooth), nominal + int(search_s / FRAME_S))
+        cuts.append(int(lo + np.argmin(smooth[lo:hi])) * frame)
+    cuts.append(total)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+def stitch_segments(chunk_results):
+    """Merge per-chunk segments into one transcript_segments list.
+
+    `chunk_results` is [(core_start_s, core_end_s, segments)] with segment
+    times already absolute. A segment belongs to the chunk whose core range
+    contains its midpoint, which drops the duplicates from the overlaps.
+    """
+    segments = []
+    for core_start, core_end, chunk_segments in chunk_results:
+        for seg in chunk_segments:
+            mid = (seg["start"] + seg["end"]) / 2
+            if core_start <= mid < core_end:
+                segments.append(seg)
+    segments.sort(key=lambda s: s["start"])
+    for i, seg in enumerate(segments):
+        seg["id"] = i
+    return "".join(seg["text"] for seg in segments), segments
+# ------------------------------------
+
+
+# ---------- WORKER POOL (one Whisper model per process) ----------
+def _init_worker():
+    registry.warm_up(["whisper"], background=False)
+
+def _transcribe_chunk(samples, offset_s):
+    result = registry.get("whisper").transcribe(samples, language="en")
+    segments = result.get("segments", [])
+    for seg in segments:
+        seg["start"] = round(seg["start"] + offset_s, 3)
+        seg["end"] = round(seg["end"] + offset_s, 3)
+    return segments
+
+def new_pool(workers=TRANSCRIBE_WORKERS):
+    """A Whisper worker pool; JobManager owns the one every job's chunks share."""
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker)
+# ------------------------------------
+
+
+def transcribe_chunked(samples, pool, sr=SAMPLE_RATE, chunk_s=TRANSCRIBE_CHUNK_S, should_cancel=None):
+    """Transcribe audio as overlapping chunks on `pool`; audio up to one chunk long is a single chunk.
+
+    `should_cancel()` is polled while the chunks run; once it returns True the
+    chunks that have not started are dropped from the pool and None is
+    returned (a chunk already running finishes in the background).
+    """
+    overlap = int(OVERLAP_S * sr)
+    futures = []
+    for start, end in chunk_bounds(samples, sr, chunk_s):
+        lo, hi = max(0, start - overlap), min(len(samples), end + overlap)
+        future = pool.submit(_transcribe_chunk, samples[lo:hi], lo / sr)
+        futures.append((start / sr, end / sr, future))
+    pending = {f for _, _, f in futures}
+    while pending:
+        if should_cancel and should_cancel():
+            for future in pending:
+                future.cancel()
+            return None
+        _, pending = concurrent.futures.wait(pending, timeout=CANCEL_POLL_S if should_cancel else None)
+    return stitch_segments([(s, e, f.result()) for s, e, f in futures])
\ No newline at end of file
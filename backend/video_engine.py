@@ -0,0 +1,237 @@
+import os
+import sys
+import threading
+import cv2
+import numpy as np
+from config import REPO_DIR
+from models import registry
+from timeseries import EMOTIONS
+
+# Worker processes import this module directly, not through app.py
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+from head_pose import MODEL_POINTS, pitch_yaw
+
+# Output order of FER's emotion classifier; FER calls anger "angry"
+FER_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+FER_TO_TS = [EMOTIONS.index("anger" if e == "angry" else e) for e in FER_LABELS]
+FER_INPUT_SIZE = (64, 64)
+
+# Same engagement model as processRealData in src/data/mockData.ts
+ENGAGEMENT_FOCUSED, ENGAGEMENT_DISTRACTED = 0.85, 0.3
+DISTRACTED_PITCH = -20.0
+
+BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "16"))
+MAX_FRAME_WIDTH = 640
+# Seek instead of grab() when samples are this many frames apart (beyond typical keyframe spacing)
+SEEK_MIN_GAP_FRAMES = 120
+
+LANDMARK_IDS = [1, 152, 263, 33, 287, 57]
+
+
+# ---------- FRAME SAMPLING ----------
+def _resize(frame, max_width=MAX_FRAME_WIDTH):
+    h, w = frame.shape[:2]
+    if w <= max_width:
+        return frame
+    scale = max_width / w
+    return cv2.resize(frame, (max_width, int(h * scale)), interpolation=cv2.INTER_AREA)
+
+def sample_frames(video_path, fps_target=1.0):
+    """Yield (t_s, frame) at `fps_target` samples per second.
+
+    Frames that are not sampled are never converted to images: when the
+    container reports a usable frame rate and samples are far apart we seek
+    straight to each sampled frame, otherwise frames are skipped with grab()
+    and only the sampled ones are retrieve()d.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    period = 1.0 / fps_target
+    native_fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    try:
+        # Browser (MediaRecorder) webm files often report bogus fps / frame counts
+        if 0 < native_fps <= 240 and frame_count > 0 and native_fps * period >= SEEK_MIN_GAP_FRAMES:
+            yield from _sample_by_seek(cap, native_fps, int(frame_count), period)
+        else:
+            yield from _sample_by_grab(cap, period)
+    finally:
+        cap.release()
+
+def _sample_by_seek(cap, native_fps, frame_count, period):
+    t = 0.0
+    while True:
+        index = int(round(t * native_fps))
+        if index >= frame_count:
+            break
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ok, frame = cap.read()
+        if not ok:
+            break
+        yield round(index / native_fps, 3), _resize(frame)
+        t += period
+
+def _sample_by_grab(cap, period):
+    next_t = 0.0
+    while cap.grab():
+        t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if t + 1e-3 < next_t:
+            continue
+        ok, frame = cap.retrieve()
+        if ok:
+            yield round(t, 3), _resize(frame)
+        while next_t <= t + 1e-3:
+            next_t += period
+
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+# ------------------------------------
+
+
+# ---------- FACE / EMOTION MODELS ----------
+class VideoAnalyzer:
+    """FaceMesh + FER over batches of sampled frames.
+
+    FaceMesh finds every face (and its head pose) per frame; the face crops of
+    the whole batch are then classified by FER in one tensor call, skipping
+    FER's own face detector.
+    """
+
+    def __init__(self, detector, face_mesh):
+        self.detector = detector
+        self.face_mesh = face_mesh
+
+    def analyze_batch(self, batch):
+        """[(t_s, frame), ...] -> TimeseriesItem dicts (frames without faces are skipped)."""
+        crops, owners, pitches = [], [], []
+        for i, (_, frame) in enumerate(batch):
+            h, w = frame.shape[:2]
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            mesh_results = self.face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            for face in mesh_results.multi_face_landmarks or []:
+                points = np.array([(lm.x * w, lm.y * h) for lm in face.landmark], dtype=np.float32)
+                crop = _face_crop(gray, points)
+                if crop is None:
+                    continue
+                crops.append(crop)
+                owners.append(i)
+                pitches.append(estimate_pitch(points[LANDMARK_IDS], w, h))
+
+        rows = []
+        if not crops:
+            return rows
+        scores = self.classify(np.stack(crops))
+        owners, pitches = np.array(owners), np.array(pitches)
+        for i, (t_s, _) in enumerate(batch):
+            mask = owners == i
+            if not mask.any():
+                continue
+            distracted = pitches[mask] < DISTRACTED_PITCH
+            engagement = np.where(distracted, ENGAGEMENT_DISTRACTED, ENGAGEMENT_FOCUSED)
+            row = {
+                "t_s": t_s,
+                "engagement_mean": round(float(engagement.mean()), 4),
+                "distracted_mean": round(float(distracted.mean()), 4),
+                "pitch": round(float(pitches[mask].mean()), 2),
+            }
+            row.update(zip(EMOTIONS, np.round(scores[mask].mean(axis=0), 4).tolist()))
+            rows.append(row)
+        return rows
+
+    def classify(self, gray_faces):
+        """(N, 64, 64) uint8 crops -> (N, 7) scores in EMOTIONS order, in one model call.
+
+        `_classify_emotions` is private to FER; if a release drops it, each crop
+        goes through the public `detect_emotions` instead (slower, same scores).
+        """
+        classify_batch = getattr(self.detector, "_classify_emotions", None)
+        if classify_batch is None:
+            predictions = self._classify_each(gray_faces)
+        else:
+            x = (gray_faces.astype(np.float32) / 255.0 - 0.5) * 2.0
+            predictions = np.asarray(classify_batch(x[..., np.newaxis]))
+        scores = np.zeros((len(gray_faces), len(EMOTIONS)), dtype=np.float32)
+        scores[:, FER_TO_TS] = predictions
+        return scores
+
+    def _classify_each(self, gray_faces):
+        h, w = FER_INPUT_SIZE
+        predictions = np.zeros((len(gray_faces), len(FER_LABELS)), dtype=np.float32)
+        for i, face in enumerate(gray_faces):
+            # The crop is the whole face, so FER's own detector is skipped
+            faces = self.detector.detect_emotions(cv2.cvtColor(face, cv2.COLOR_GRAY2BGR), face_rectangles=[(0, 0, w, h)])
+            if faces:
+                predictions[i] = [faces[0]["emotions"].get(label, 0.0) for label in FER_LABELS]
+        return predictions
+
+def _face_crop(gray, points, margin=0.1):
+    h, w = gray.shape
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    mx, my = (x1 - x0) * margin, (y1 - y0) * margin
+    x0, y0 = max(0, int(x0 - mx)), max(0, int(y0 - my))
+    x1, y1 = min(w, int(x1 + mx)), min(h, int(y1 + my))
+    if x1 - x0 < 8 or y1 - y0 < 8:
+        return None
+    return cv2.resize(gray[y0:y1, x0:x1], FER_INPUT_SIZE)
+
+def estimate_pitch(image_points, w, h):
+    camera_matrix = np.array([[w, 0., w / 2], [0., w, h / 2], [0., 0., 1.]], dtype="double")
+    ok, rot_vec, _ = cv2.solvePnP(MODEL_POINTS, image_points, camera_matrix, np.zeros((4, 1)))
+    if not ok:
+        return 0.0
+    return pitch_yaw(rot_vec)[0]
+# ------------------------------------
+
+
+_analyzer = None
+# FaceMesh graphs are not thread-safe and Flask may serve several uploads at once:
+# guards both the analyzer's creation and every batch it runs
+_analyzer_lock = threading.Lock()
+
+def get_video_analyzer():
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = VideoAnalyzer(registry.get("fer"), registry.get("face_mesh"))
+        return _analyzer
+
+def video_duration(video_path):
+    """Duration in seconds from container metadata, or None when it is unreliable."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        native_fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    finally:
+        cap.release()
+    if 0 < native_fps <= 240 and frame_count > 0:
+        return round(frame_count / native_fps, 3)
+    return None
+
+def iter_row_batches(video_path, fps_target=1, batch_size=BATCH_SIZE):
+    """Yield (last sampled t_s, TimeseriesItem rows) for each batch of sampled frames.
+
+    Only one batch of frames is held in memory at a time, so peak memory does
+    not depend on video length.
+    """
+    analyzer = get_video_analyzer()
+    for batch in iter_batches(sample_frames(video_path, fps_target), batch_size):
+        with _analyzer_lock:
+            rows = analyzer.analyze_batch(batch)
+        yield batch[-1][0], rows
+
+def iter_timeseries(video_path, fps_target=1, batch_size=BATCH_SIZE):
+    """Stream TimeseriesItem rows as each batch of sampled frames is analyzed."""
+    for _, rows in iter_row_batches(video_path, fps_target, batch_size):
+        yield from rows
+
+def process_video(video_path, fps_target=1, batch_size=BATCH_SIZE):
+    return list(iter_timeseries(video_path, fps_target, batch_size))
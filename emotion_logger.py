@@ -1,139 +1,227 @@
 import os
-import cv2
+import sys
 import time
-import json
-import subprocess
+import argparse
+import cv2
 import numpy as np
-import threading
-from datetime import datetime
 from dotenv import load_dotenv
 from fer.fer import FER
 import mediapipe as mp
 
+# Shared client modules live in scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from session_log import SessionLog, IntervalRecorder, migrate_legacy_log
+from frame_pipeline import LatestFrame, CaptureThread, InferenceWorker
+from face_analyzer import FaceAnalyzer
+from room_tracker import RoomAnalyzer
+from live_client import LiveUploader
+from sync_backends import get_sync_backend
+from profiler import StageProfiler
+from head_pose import HeadPoseEstimator, is_distracted
+from adaptive_scheduler import AdaptiveScheduler
+
+parser = argparse.ArgumentParser(description="Webcam emotion + attention logger")
+parser.add_argument("--profile", action="store_true",
+                    help="record per-stage latency histograms and dropped frames to a metrics sidecar")
+parser.add_argument("--overlay", action="store_true", help="with --profile, draw the stage latencies on the preview")
+args = parser.parse_args()
+
 # 1. Setup Environment
 load_dotenv()
-TOKEN = os.getenv("GITHUB_TOKEN")
-USER = os.getenv("GITHUB_USER")
-REPO = os.getenv("GITHUB_REPO")
 
 # Organize data into a subfolder
 DATA_FOLDER = "user_data"
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
 USER_ID = os.getenv("USER_ID") or input("Enter User ID: ").strip().replace(" ", "_")
-JSON_FILE = os.path.join(DATA_FOLDER, f"emotion_data_{USER_ID}.json")
-
-def submit_to_github():
-    """Syncs user_data folder using Token authentication."""
-    def upload_task():
-        if not all([TOKEN, USER, REPO]):
-            print("[Git] Error: Missing .env credentials.")
-            return
-
-        remote_url = f"https://{TOKEN}@github.com/{USER}/{REPO}.git"
-        try:
-            # Update remote with token for seamless push
-            subprocess.run(["git", "remote", "set-url", "origin", remote_url], check=True)
-            subprocess.run(["git", "add", DATA_FOLDER], check=True)
-            msg = f"Update {USER_ID}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            subprocess.run(["git", "commit", "-m", msg], check=True)
-            
-            # Rebase ensures we don't have merge conflicts with other users' files
-            subprocess.run(["git", "pull", "--rebase", "origin", "main"], check=True)
-            subprocess.run(["git", "push", "origin", "main"], check=True)
-            print(f"[Git] Successfully pushed data for {USER_ID}")
-        except Exception as e:
-            print(f"[Git] Sync failed: {e}")
-            
-    thread = threading.Thread(target=upload_task, daemon=True)
-    thread.start()
+LEGACY_JSON_FILE = os.path.join(DATA_FOLDER, f"emotion_data_{USER_ID}.json")
+LOG_FILE = os.path.join(DATA_FOLDER, f"emotion_data_{USER_ID}.jsonl")
+# Kept out of DATA_FOLDER so it is neither synced nor merged as session data
+METRICS_FILE = f"metrics_{USER_ID}.json"
+METRICS_WRITE_INTERVAL = 10.0
+profiler = StageProfiler(enabled=args.profile)
 
 # 2. Parameters & Initialization
 camera_matrix = np.array([[617.0, 0., 327.4], [0., 616.4, 245.7], [0., 0., 1.]], dtype="double")
 dist_coeffs = np.zeros((4,1))
-MODEL_POINTS = np.array([
-    [0.0, 0.0, 0.0], [0.0, -330.0, -65.0], [-225.0, 170.0, -135.0],
-    [225.0, 170.0, -135.0], [-150.0, -150.0, -125.0], [150.0, -150.0, -125.0]
-], dtype=np.float32)
-LANDMARK_IDS = [1, 152, 263, 33, 287, 57]
-
-def get_image_points(landmarks, w, h):
-    return np.array([(int(landmarks.landmark[idx].x * w), int(landmarks.landmark[idx].y * h)) 
-                     for idx in LANDMARK_IDS], dtype=np.float32)
+# Head pose: smoothing filter (one_euro, ema or none), sideways limit, and FaceMesh iris refinement
+# (not needed for the 6 pose landmarks, so off by default)
+POSE_FILTER = os.getenv("POSE_FILTER", "one_euro")
+YAW_LIMIT = float(os.getenv("YAW_LIMIT", "35"))
+REFINE_LANDMARKS = os.getenv("REFINE_LANDMARKS", "false").lower() == "true"
 
 mp_face_mesh = mp.solutions.face_mesh
 detector = FER(mtcnn=False)
 cap = cv2.VideoCapture(0)
 
-last_update_time = time.time()
+# Pipeline tuning: cap inference rate (0 = unlimited) and analyze every (FRAME_SKIP+1)-th frame
+INFERENCE_FPS = float(os.getenv("INFERENCE_FPS", "0"))
+FRAME_SKIP = int(os.getenv("FRAME_SKIP", "0"))
+# Run FaceMesh every KEYFRAME_INTERVAL analyzed frames; track landmarks with optical flow in between
+KEYFRAME_INTERVAL = int(os.getenv("KEYFRAME_INTERVAL", "5"))
+# Room-camera mode: track up to ROOM_FACES attendees from one camera (0 = single user)
+ROOM_FACES = int(os.getenv("ROOM_FACES", "0"))
+
 interval = 1
-collected_emotions = []
-all_data_log = []
-
-if os.path.exists(JSON_FILE):
-    with open(JSON_FILE, 'r') as f:
-        try: all_data_log = json.load(f)
-        except: all_data_log = []
-
-print(f"Tracking: {USER_ID}. Press 'q' to quit.")
-
-# 3. Main Loop
-with mp_face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True) as face_mesh:
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success: break
-        
-        h, w, _ = frame.shape
-        current_time = time.time()
-
-        # --- PART A: Emotion Detection ---
-        emotion_results = detector.detect_emotions(frame)
-        if emotion_results: # Safety check for detected face
-            collected_emotions.append(emotion_results[0]["emotions"])
-            (ex, ey, ew, eh) = emotion_results[0]["box"]
-            cv2.rectangle(frame, (ex, ey), (ex + ew, ey + eh), (0, 255, 0), 2)
-
-        # --- PART B: Head Pose ---
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mesh_results = face_mesh.process(img_rgb)
-        status, status_color, pitch_val = "Focused", (0, 255, 0), 0.0
-        current_is_distracted = False
-
-        if mesh_results.multi_face_landmarks:
-            landmarks = mesh_results.multi_face_landmarks[0]
-            image_points = get_image_points(landmarks, w, h)
-            ok, rot_vec, _ = cv2.solvePnP(MODEL_POINTS, image_points, camera_matrix, dist_coeffs)
-            if ok:
-                rot_mat, _ = cv2.Rodrigues(rot_vec)
-                proj_mat = np.hstack((rot_mat, np.zeros((3, 1))))
-                _, _, _, _, _, _, euler = cv2.decomposeProjectionMatrix(proj_mat)
-                pitch_val = -euler.flatten()[0]
-                if pitch_val < -20.0:
-                    status, status_color, current_is_distracted = "DISTRACTED", (0, 0, 255), True
-
-        # --- PART C: Logging ---
-        if current_time - last_update_time >= interval:
-            # Only log if we successfully captured emotions in this interval
-            if collected_emotions:
-                avg_scores = {k: float(np.mean([f[k] for f in collected_emotions])) for k in collected_emotions[0].keys()}
-                top_3 = sorted(avg_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-
-                all_data_log.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "user": USER_ID,
-                    "distracted": current_is_distracted,
-                    "pitch": round(pitch_val, 2),
-                    "top_emotions": [{"emotion": e, "score": round(s, 4)} for e, s in top_3],
-                })
-                with open(JSON_FILE, 'w') as f:
-                    json.dump(all_data_log, f, indent=4)
-                collected_emotions = [] # Reset for next interval
-            last_update_time = current_time
-
-        cv2.putText(frame, f"User: {USER_ID} | {status}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-        cv2.imshow('Multi-User Tracker', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'): break
+
+# Adaptive inference: skip near-static frames and slow down while emotions are stable,
+# using at most CPU_BUDGET of wall time for inference (0 = no limit)
+ADAPTIVE_INFERENCE = os.getenv("ADAPTIVE_INFERENCE", "false").lower() == "true"
+CPU_BUDGET = float(os.getenv("CPU_BUDGET", "0.5"))
+scheduler = None
+if ADAPTIVE_INFERENCE:
+    scheduler = AdaptiveScheduler(max_interval=interval / 2, cpu_budget=CPU_BUDGET,
+                                  emotions_of=lambda faces: [face["emotions"] for face in faces])
+
+# Live dashboard: also post each interval record to the host's ingest endpoint while the talk runs
+LIVE_INGEST_URL = os.getenv("LIVE_INGEST_URL")   # e.g. http://host:5000/live/records
+live_uploader = LiveUploader(LIVE_INGEST_URL) if LIVE_INGEST_URL else None
+
+# Records are appended line by line; older sessions saved as a JSON array are converted once
+migrate_legacy_log(LEGACY_JSON_FILE, LOG_FILE)
+recorders = {}  # track_id (None in single-user mode) -> IntervalRecorder
+pose_estimators = {}  # track_id -> HeadPoseEstimator (keeps the previous pose and filter state)
+log_paths = []  # every log written this session, including those of tracks that have left
+
+def get_recorder(track_id):
+    """Single-user mode logs to LOG_FILE; room mode gives each track its own per-user log."""
+    if track_id not in recorders:
+        if track_id is None:
+            user, path = USER_ID, LOG_FILE
+        else:
+            user = f"{USER_ID}-{track_id}"
+            path = os.path.join(DATA_FOLDER, f"emotion_data_{user}.jsonl")
+        recorders[track_id] = IntervalRecorder(SessionLog(path), user, interval)
+        log_paths.append(path)
+    return recorders[track_id]
+
+def close_recorder(recorder):
+    """Log the recorder's partial last interval and close its file."""
+    record = recorder.flush()
+    if record and live_uploader:
+        live_uploader.add(record)
+    recorder.log.close()
+
+def release_track(track_id):
+    """A face left the room: write out its last interval and forget its per-track state."""
+    recorder = recorders.pop(track_id, None)
+    if recorder:
+        close_recorder(recorder)
+    pose_estimators.pop(track_id, None)
+
+def estimate_pose(track_id, pose_points, t):
+    """Smoothed (pitch, yaw) for one track, or None when there is no usable pose this frame."""
+    estimator = pose_estimators.get(track_id)
+    if estimator is None:
+        estimator = pose_estimators[track_id] = HeadPoseEstimator(camera_matrix, dist_coeffs, POSE_FILTER)
+    if pose_points is None:
+        estimator.reset()
+        return None
+    with profiler.stage("solvePnP"):
+        return estimator.estimate(pose_points, t)
+
+def analyze_frame(frame):
+    """Emotion + head pose for every tracked face. Runs on the inference thread only."""
+    # --- PART A: Face (shared FaceMesh pass) + Emotion on the face ROI(s) ---
+    if ROOM_FACES:
+        faces = analyzer.analyze(frame)
+    else:
+        faces = [dict(analyzer.analyze(frame), track_id=None)]
+
+    # --- PART B: Head Pose (smoothed per track) ---
+    now = time.time()
+    for face in faces:
+        pose = estimate_pose(face["track_id"], face["pose_points"], now)
+        face["pitch"], face["yaw"] = pose if pose else (None, None)
+        face["distracted"] = bool(pose) and is_distracted(*pose, yaw_limit=YAW_LIMIT)
+    return faces
+
+def log_result(frame_time, faces):
+    """--- PART C: Logging --- averages every analyzed frame within each interval (distraction included)."""
+    for face in faces:
+        with profiler.stage("log_write"):
+            record = get_recorder(face["track_id"]).add(frame_time, face["emotions"], face["pitch"],
+                                                        face["distracted"], face["yaw"])
+        if record and live_uploader:
+            live_uploader.add(record)
+    if ROOM_FACES:
+        for track_id in analyzer.tracker.dropped:
+            release_track(track_id)
+
+mode = f"room mode, up to {ROOM_FACES} faces" if ROOM_FACES else "single user"
+print(f"Tracking: {USER_ID} ({mode}). Press 'q' to quit.")
+
+# 3. Main Loop: capture thread -> inference worker (latest frame only) -> render loop
+with mp_face_mesh.FaceMesh(max_num_faces=max(1, ROOM_FACES), refine_landmarks=REFINE_LANDMARKS) as face_mesh:
+    if ROOM_FACES:
+        analyzer = RoomAnalyzer(detector, face_mesh, profiler=profiler)
+    else:
+        analyzer = FaceAnalyzer(detector, face_mesh, keyframe_interval=KEYFRAME_INTERVAL, profiler=profiler)
+    slot = LatestFrame()
+    capture = CaptureThread(cap, slot, profiler=profiler)
+    inference = InferenceWorker(slot, analyze_frame, on_result=log_result,
+                                target_fps=INFERENCE_FPS, frame_skip=FRAME_SKIP, profiler=profiler,
+                                scheduler=scheduler)
+    capture.start()
+    inference.start()
+    if live_uploader:
+        live_uploader.start()
+
+    last_id = 0
+    last_metrics_write = time.time()
+    while not slot.closed:
+        last_id, _, frame = slot.wait_newer(last_id)
+        if frame is None:
+            continue
+        frame = frame.copy()
+
+        status, status_color = "Focused", (0, 255, 0)
+        for face in inference.latest or []:
+            color = (0, 0, 255) if face["distracted"] else (0, 255, 0)
+            if face["box"]:
+                (ex, ey, ew, eh) = face["box"]
+                cv2.rectangle(frame, (ex, ey), (ex + ew, ey + eh), color, 2)
+                if face["track_id"] is not None:
+                    cv2.putText(frame, f"#{face['track_id']}", (ex, ey - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+            if face["distracted"] and face["track_id"] is None:
+                status, status_color = "DISTRACTED", (0, 0, 255)
+
+        label = f"{len(inference.latest or [])} faces" if ROOM_FACES else status
+        cv2.putText(frame, f"User: {USER_ID} | {label}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
+        cv2.putText(frame, f"Capture {capture.rate.rate():.1f} fps | Inference {inference.rate.rate():.1f} fps",
+                    (20, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+        if args.profile and args.overlay:
+            for i, line in enumerate(profiler.overlay_lines()):
+                cv2.putText(frame, line, (20, 100 + 18 * i), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
+        with profiler.stage("imshow"):
+            cv2.imshow('Multi-User Tracker', frame)
+            key = cv2.waitKey(1) & 0xFF
+        if key == ord('q'): break
+
+        if args.profile and time.time() - last_metrics_write >= METRICS_WRITE_INTERVAL:
+            profiler.write(METRICS_FILE)
+            last_metrics_write = time.time()
+
+    capture.stop()
+    inference.stop()
+    capture.join(timeout=2)
+    inference.join(timeout=5)
+    print(f"[Pipeline] Capture {capture.rate.rate():.1f} fps, inference {inference.rate.rate():.1f} fps")
+    if scheduler:
+        print(f"[Adaptive] Skipped {scheduler.saved_fraction():.0%} of frames that reached the scheduler")
+
+if args.profile:
+    profiler.write(METRICS_FILE)
+    analyze_p95 = profiler.summary()["stages"].get("analyze", {}).get("p95_ms", 0)
+    print(f"[Profile] Stage latencies written to {METRICS_FILE}")
+    if analyze_p95:
+        print(f"[Profile] analyze p95 {analyze_p95:.1f} ms -> INFERENCE_FPS up to {1000 / analyze_p95:.1f} is sustainable")
 
 cap.release()
 cv2.destroyAllWindows()
-submit_to_github()
\ No newline at end of file
+for recorder in recorders.values():
+    close_recorder(recorder)
+if live_uploader:
+    live_uploader.stop()
+# Upload this session's logs (SYNC_BACKEND=git pushes to GitHub, http posts to SYNC_URL)
+get_sync_backend(DATA_FOLDER, USER_ID).upload_async(log_paths)
\ No newline at end of file
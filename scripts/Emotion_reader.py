@@ -2,6 +2,8 @@ import cv2
 import time
 from fer.fer import FER
 import numpy as np
+from room_tracker import FaceTracker
+from adaptive_scheduler import AdaptiveScheduler
 
 # Initialize detector
 detector = FER(mtcnn=False)
@@ -10,8 +12,13 @@ cap = cv2.VideoCapture(0)
 # Tracking variables
 last_update_time = time.time()
 interval = 0.5  # Half-second window
-collected_frames_emotions = []  # List to store emotion dicts for the interval
-display_top_3 = []              # What we actually show on screen
+tracker = FaceTracker()         # Stable IDs so each face is averaged on its own
+collected_frames_emotions = {}  # track_id -> emotion dicts for the interval
+display_top_3 = {}              # track_id -> what we actually show on screen
+# Skip FER on near-static frames; at least one inference per quarter second so every window has samples
+scheduler = AdaptiveScheduler(max_interval=interval / 2,
+                              emotions_of=lambda results: [r["emotions"] for r in results])
+results, track_ids = [], []
 
 print("Starting... Averaging every 0.5s. Press 'q' to quit.")
 
@@ -20,40 +27,48 @@ while True:
     if not ret: break
 
     current_time = time.time()
-    results = detector.detect_emotions(frame)
+    # 1. Collect data for every face in this frame (boxes from the last analyzed frame otherwise)
+    if scheduler.should_analyze(frame, current_time):
+        start = time.perf_counter()
+        results = detector.detect_emotions(frame)
+        scheduler.observe(current_time, results, time.perf_counter() - start)
 
-    # 1. Collect data for this frame
-    if results:
-        # We'll track the first face detected for the average
-        collected_frames_emotions.append(results[0]["emotions"])
-        
-        # Draw the box for the current face regardless of the average
-        (x, y, w, h) = results[0]["box"]
+        track_ids = tracker.update([r["box"] for r in results])
+        for track_id, result in zip(track_ids, results):
+            collected_frames_emotions.setdefault(track_id, []).append(result["emotions"])
+
+    # Draw the box for the current face regardless of the average
+    for result in results:
+        (x, y, w, h) = result["box"]
         cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
 
     # 2. Check if 0.5 seconds have passed
     if current_time - last_update_time >= interval:
-        if collected_frames_emotions:
+        for track_id, frames_emotions in collected_frames_emotions.items():
+            if not frames_emotions:
+                continue
             # Calculate mean for each emotion key
             avg_emotions = {}
-            keys = collected_frames_emotions[0].keys()
-            
+            keys = frames_emotions[0].keys()
+
             for key in keys:
-                avg_emotions[key] = np.mean([f[key] for f in collected_frames_emotions])
-            
+                avg_emotions[key] = np.mean([f[key] for f in frames_emotions])
+
             # Sort and get top 3
-            display_top_3 = sorted(avg_emotions.items(), key=lambda x: x[1], reverse=True)[:3]
-            
-            # Reset for next interval
-            collected_frames_emotions = []
-        
+            display_top_3[track_id] = sorted(avg_emotions.items(), key=lambda x: x[1], reverse=True)[:3]
+
+        # Reset for next interval (and forget faces that left the frame)
+        collected_frames_emotions = {}
+        display_top_3 = {k: v for k, v in display_top_3.items() if k in tracker.tracks}
         last_update_time = current_time
 
     # 3. Display the "Averaged" results
-    if results and display_top_3:
-        (x, y, w, h) = results[0]["box"]
-        for i, (emotion, score) in enumerate(display_top_3):
-            text = f"AVG {emotion}: {score:.2f}"
+    for track_id, result in zip(track_ids, results):
+        if track_id not in display_top_3:
+            continue
+        (x, y, w, h) = result["box"]
+        for i, (emotion, score) in enumerate(display_top_3[track_id]):
+            text = f"#{track_id} AVG {emotion}: {score:.2f}"
             cv2.putText(frame, text, (x, y - 10 - (i * 25)), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
 
@@ -61,5 +76,6 @@ while True:
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
+print(f"Skipped inference on {scheduler.saved_fraction():.0%} of frames.")
 cap.release()
 cv2.destroyAllWindows()
@@ -1,20 +1,78 @@
 import os
 import json
 import glob
+import shutil
+import itertools
 from git import Repo
 from dotenv import load_dotenv
+from session_log import SessionLog, LogCursor, SortedMerge, iter_records
+from columnar_store import append_store, open_store
+from time_index import update_index, rewind_index, index_path
 
 # 1. Setup
 load_dotenv()
 TOKEN = os.getenv("GITHUB_TOKEN")
 USER = os.getenv("GITHUB_USER")
 REPO_NAME = os.getenv("GITHUB_REPO")
-DATA_FOLDER = "user_data"
-MASTER_FILE = "master_emotion_data.json"
+# With SYNC_BACKEND=http clients upload straight to the backend, so point DATA_FOLDER at its SYNC_DATA_DIR
+SYNC_BACKEND = os.getenv("SYNC_BACKEND", "git")
+DATA_FOLDER = os.getenv("DATA_FOLDER", "user_data")
+# All users' records in (timestamp, user) order, one JSON object per line
+MASTER_FILE = "master_emotion_data.jsonl"
+# Per-file watermarks of what has already been merged into MASTER_FILE, plus its last sort key
+MERGE_STATE_FILE = "master_merge_state.json"
+MERGE_STATE_VERSION = 2   # 2 = time-ordered master
+# Late data rewrites only the master's tail: the merged tail is staged here (first line: the byte
+# offset it replaces the master from) and applied by truncating and appending, even after a crash
+TAIL_FILE = MASTER_FILE + ".tail"
+# Optional memory-mappable copy of the master file for aggregate.py --store (only changed rows are re-encoded)
+MASTER_STORE = os.getenv("MASTER_STORE")   # e.g. master_emotion_data.emo
+
+def _cursor_records(cursor):
+    """A cursor's records; a read error ends that file's stream at the last good line."""
+    try:
+        yield from cursor.records()
+    except Exception as e:
+        print(f"[Error] Could not read {cursor.path}: {e}")
+
+def _write_master(records, path=MASTER_FILE, truncate=False):
+    """Stream records into the master JSONL (flushed as it goes); returns how many were written."""
+    if truncate:
+        open(path, 'w').close()
+    written = 0
+    with SessionLog(path) as master:
+        for record in records:
+            master.append(record)
+            written += 1
+    return written
+
+def _master_records(offset):
+    """Master records from byte `offset` on."""
+    with open(MASTER_FILE, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def _apply_tail():
+    """Replace the master from the staged tail's offset on with the staged records."""
+    with open(TAIL_FILE, 'rb') as tail:
+        offset = json.loads(tail.readline())["offset"]
+        with open(MASTER_FILE, 'r+b') as master:
+            master.truncate(offset)
+            master.seek(offset)
+            shutil.copyfileobj(tail, master)
+            master.flush()
+            os.fsync(master.fileno())
+    os.remove(TAIL_FILE)
 
 def sync_and_merge():
     # 2. Pull latest data from GitHub
-    if os.path.exists(".git"):
+    if SYNC_BACKEND == "http":
+        print(f"[Sync] HTTP uploads: merging {DATA_FOLDER} without pulling.")
+    elif os.path.exists(".git"):
         print("[Git] Pulling latest changes...")
         repo = Repo(".")
         # Update remote URL with token if needed for private repos
@@ -25,33 +83,105 @@ def sync_and_merge():
         print("[Error] No git repository found in this directory.")
         return
 
-    # 3. Merge all JSON files in user_data
-    master_list = []
-    json_pattern = os.path.join(DATA_FOLDER, "*.json")
-    files = glob.glob(json_pattern)
-    
+    # 3. Merge only new records from the JSONL logs (and any legacy JSON-array files) in user_data
+    if os.path.exists(TAIL_FILE):
+        print("[Merge] Finishing an interrupted late-data merge.")
+        _apply_tail()
+    state = {}
+    if os.path.exists(MERGE_STATE_FILE) and os.path.exists(MASTER_FILE):
+        with open(MERGE_STATE_FILE, 'r') as f:
+            state = json.load(f)
+    # Masters written before the time-ordered merge are rebuilt once
+    if state.get("version") != MERGE_STATE_VERSION:
+        state = {}
+    watermarks = state.get("files", {})
+
+    files = sorted(glob.glob(os.path.join(DATA_FOLDER, "*.jsonl")) +
+                   glob.glob(os.path.join(DATA_FOLDER, "*.json")))
+    # Skip the master file if it happens to be in the same folder
+    files = [path for path in files if MASTER_FILE not in path]
+    cursors = [LogCursor(path, watermarks.get(path)) for path in files]
+
+    # A rewritten or deleted user file means rebuilding the master file from scratch
+    rebuild = not watermarks or any(c.reset for c in cursors) or bool(set(watermarks) - set(files))
+    if rebuild:
+        if watermarks:
+            print("[Merge] A user file was rewritten or removed; rebuilding the master file.")
+        cursors = [LogCursor(path) for path in files]
+
     print(f"[Merge] Found {len(files)} files to consolidate.")
 
-    for file_path in files:
-        # Skip the master file if it happens to be in the same folder
-        if MASTER_FILE in file_path:
-            continue
-            
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    master_list.extend(data)
-                else:
-                    master_list.append(data)
-        except Exception as e:
-            print(f"[Error] Could not read {file_path}: {e}")
-
-    # 4. Save the master file
-    with open(MASTER_FILE, 'w') as f:
-        json.dump(master_list, f, indent=4)
-    
-    print(f"[Success] Master file created: {MASTER_FILE} ({len(master_list)} total entries)")
+    merge = SortedMerge(_cursor_records(c) for c in cursors)
+    new_records = iter(merge)
+    last_key = tuple(state["last_key"]) if state.get("last_key") else None
+    # Master rows from `changed_row` (at byte `changed_offset`) on are new or rewritten; None = unchanged
+    changed_row = changed_offset = None
+    if rebuild:
+        # Written straight into the master file, so readers can follow it while the merge runs
+        added, last_key = _write_master(new_records, truncate=True), merge.last_key
+        changed_row = changed_offset = 0
+    else:
+        first = next(new_records, None)
+        if first is None:
+            added = 0
+        elif last_key is None or merge.last_key > last_key:
+            # Everything new is later than the master's tail: append in order
+            changed_row, changed_offset = state.get("count", 0), os.path.getsize(MASTER_FILE)
+            added, last_key = _write_master(itertools.chain([first], new_records)), merge.last_key
+        else:
+            # Late data (e.g. a client that synced after the talk): only the master's tail from the
+            # index block holding the earliest new record on is re-merged
+            tail = rewind_index(MASTER_FILE, merge.last_key[0])
+            new_records = itertools.chain([first], new_records)
+            if tail is None:
+                # No usable index: re-merge everything into a temp file and swap it in
+                master_merge = SortedMerge([iter_records(MASTER_FILE), new_records])
+                total = _write_master(master_merge, path=MASTER_FILE + ".tmp", truncate=True)
+                os.replace(MASTER_FILE + ".tmp", MASTER_FILE)
+                changed_row = changed_offset = 0
+            else:
+                changed_offset, changed_row = tail
+                master_merge = SortedMerge([_master_records(changed_offset), new_records])
+                with open(TAIL_FILE + ".tmp", 'w') as f:
+                    f.write(json.dumps({"offset": changed_offset}) + "\n")
+                total = changed_row + _write_master(master_merge, path=TAIL_FILE + ".tmp")
+                os.replace(TAIL_FILE + ".tmp", TAIL_FILE)
+                _apply_tail()
+            added = total - state.get("count", 0)
+            merge.duplicates += master_merge.duplicates
+            last_key = master_merge.last_key
+
+    # 4. Save the watermarks only once the merged records are on disk
+    new_state = {
+        "version": MERGE_STATE_VERSION,
+        # Everything up to each cursor's offset has been merged, even after a read error
+        "files": {cursor.path: cursor.watermark() for cursor in cursors},
+        "last_key": list(last_key) if last_key else None,
+        "count": (0 if rebuild else state.get("count", 0)) + added,
+    }
+    tmp_path = MERGE_STATE_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(new_state, f)
+    os.replace(tmp_path, MERGE_STATE_FILE)
+
+    print(f"[Success] Master file updated: {MASTER_FILE} ({added} new entries, "
+          f"{merge.duplicates} duplicates dropped)")
+    if merge.out_of_order:
+        print(f"[Merge] {merge.out_of_order} records were too far out of order to sort into place.")
+
+    # Sidecar time/session index for range queries (time_index.py, backend /data/* endpoints)
+    index = update_index(MASTER_FILE)
+    print(f"[Success] Index updated: {index_path(MASTER_FILE)} ({len(index['sessions'])} sessions)")
+
+    if MASTER_STORE:
+        # The store mirrors the master row for row: only the changed rows are re-encoded,
+        # unless the store is missing or out of step with the master
+        stored = len(open_store(MASTER_STORE)) if os.path.exists(os.path.join(MASTER_STORE, "meta.json")) else 0
+        if changed_row is None and stored != new_state["count"] or changed_row is not None and stored < changed_row:
+            changed_row = changed_offset = 0
+        if changed_row is not None:
+            store = append_store(MASTER_STORE, _master_records(changed_offset), keep=changed_row)
+            print(f"[Success] Columnar store updated: {MASTER_STORE} ({len(store)} entries)")
 
 if __name__ == "__main__":
     sync_and_merge()
@@ -0,0 +1,104 @@
+import cv2
+import numpy as np
+from session_log import EMOTION_ORDER
+
+
+class AdaptiveScheduler:
+    """Decides which captured frames get a full emotion inference.
+
+    Two cheap signals drive it:
+
+    * scene motion: mean absolute difference (0-255) between a small
+      grayscale thumbnail of the frame and the one of the last analyzed frame;
+    * emotion shift: total variation distance (0-1) between the last two
+      analyzed score vectors (faces averaged in room mode).
+
+    The analysis interval moves between `min_interval` and `max_interval`
+    seconds: it halves when the scores shift by more than `shift_threshold`
+    and grows by `backoff` while they stay stable. A frame whose motion
+    reaches `motion_threshold` is analyzed as soon as `min_interval` has
+    passed; a static one waits for the full interval. `cpu_budget` is the
+    share of wall time inference may take (0 = no limit): the interval never
+    drops below the smoothed inference cost divided by it.
+
+    `emotions_of(result)` turns an analyze() result into a list of FER score
+    dicts (None entries are ignored). Keep `max_interval` below the logging
+    interval so every logged interval still gets at least one sample.
+    """
+
+    def __init__(self, min_interval=0.1, max_interval=0.5, motion_threshold=3.0, shift_threshold=0.1,
+                 backoff=1.25, cpu_budget=0.5, thumb_size=(32, 24), emotions_of=lambda result: result):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold
+        self.shift_threshold = shift_threshold
+        self.backoff = backoff
+        self.cpu_budget = cpu_budget
+        self.thumb_size = thumb_size
+        self.emotions_of = emotions_of
+        self.interval = min_interval
+        self.cost = 0.0          # smoothed seconds per inference
+        self.last_motion = 0.0
+        self.last_shift = 0.0
+        self.analyzed = 0
+        self.skipped = 0
+        self._last_time = None
+        self._thumb = None       # thumbnail of the last analyzed frame
+        self._candidate = None   # thumbnail of the frame just let through
+        self._scores = None
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def floor(self):
+        """Shortest interval allowed by `min_interval` and the CPU budget."""
+        if self.cpu_budget <= 0:
+            return self.min_interval
+        return max(self.min_interval, self.cost / self.cpu_budget)
+
+    def should_analyze(self, frame, now):
+        """True if `frame` (captured at `now`) should be analyzed; call observe() after analyzing it."""
+        thumb = self._thumbnail(frame)
+        if self._last_time is None:
+            self._candidate = thumb
+            return True
+        self.last_motion = float(np.abs(thumb - self._thumb).mean())
+        elapsed = now - self._last_time
+        floor = self.floor()
+        due = elapsed >= max(self.interval, floor)
+        moved = self.last_motion >= self.motion_threshold and elapsed >= floor
+        if due or moved:
+            self._candidate = thumb
+            return True
+        self.skipped += 1
+        return False
+
+    def observe(self, now, result, cost):
+        """Feed back the result of an analyzed frame and how long inference took (seconds)."""
+        emotions = [e for e in self.emotions_of(result) or [] if e]
+        scores = np.mean([[e.get(k, 0.0) for k in EMOTION_ORDER] for e in emotions], axis=0) if emotions else None
+
+        if scores is None and self._scores is None:
+            self.last_shift = 0.0    # still no face: nothing to follow closely
+        elif scores is None or self._scores is None:
+            self.last_shift = 1.0    # a face appeared or was lost
+        else:
+            self.last_shift = float(np.abs(scores - self._scores).sum() / 2)
+        if self.last_shift > self.shift_threshold:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+
+        self.cost = cost if not self.analyzed else 0.8 * self.cost + 0.2 * cost
+        self.analyzed += 1
+        self._scores = scores
+        self._thumb = self._candidate if self._candidate is not None else self._thumb
+        self._last_time = now
+
+    def saved_fraction(self):
+        """Share of offered frames that were not analyzed."""
+        total = self.analyzed + self.skipped
+        return self.skipped / total if total else 0.0
@@ -1,21 +1,246 @@
 import glob
 import json
-from collections import Counter
+import argparse
+import os
+import concurrent.futures
+from collections import Counter, defaultdict
 from datetime import datetime
+import numpy as np
+from session_log import iter_records, LogCursor, record_time_sec, record_emotion
+from columnar_store import open_store
+
+# Watermarks and partial counters for --incremental runs
+STATE_FILE = "aggregate_state.json"
+
+def prepare_record(record):
+    # convert timestamp to seconds (float) for easier bucket
+    record['timestamp_sec'] = record_time_sec(record)
+    record['emotion'] = record_emotion(record)
+    return record
 
 def load_data(data_dir="client_data"):
     """Yield all emotion records from all .jsonl files in the given directory."""
-    for filepath in glob.glob(f"{data_dir}/*.jsonl"):   # <-- changed to .jsonl
-        with open(filepath, "r") as f:
-            for line in f:
-                record = json.loads(line.strip())
-                # convert timestamp to seconds (float) for easier bucket
-                record['timestamp_sec'] = record['timestamp'] / 1000.0
-                yield record
-
-def aggregate():
-    records = list(load_data())
-    if not records:
+    for filepath in glob.glob(f"{data_dir}/*.jsonl"):
+        for record in iter_records(filepath):
+            yield prepare_record(record)
+
+def iter_range_records(path, start, end):
+    """Yield the JSONL records whose line starts inside the byte range [start, end).
+
+    Ranges of one file can be read independently: a reader starting mid-line
+    skips ahead to the next line, and the line straddling `end` belongs to
+    this range. Unparseable lines are skipped, as in iter_records.
+    """
+    with open(path, "rb") as f:
+        if start:
+            # Step back one byte so a range starting exactly on a line keeps that line
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def _first_seen_counts(values):
+    """(value, count) pairs of an integer array, in order of first appearance."""
+    keys, first, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    return zip(keys[order].tolist(), counts[order].tolist())
+
+class TimelineAggregator:
+    """Single-pass, streaming emotion aggregation at one or more bucket sizes.
+
+    Each record is assigned to its bucket arithmetically (floor(ts / size)),
+    so only per-bucket emotion counters are kept in memory and the cost is
+    O(records) regardless of session length. Buckets are aligned to multiples
+    of the bucket size since the epoch, which means a record's bucket is known
+    without first scanning for the session start.
+    """
+
+    def __init__(self, bucket_sizes=(30,)):
+        self.bucket_sizes = tuple(bucket_sizes)
+        self.total = 0
+        self.overall = Counter()
+        self.buckets = {size: defaultdict(Counter) for size in self.bucket_sizes}
+
+    def add(self, timestamp_sec, emotion):
+        self.total += 1
+        self.overall[emotion] += 1
+        for size, buckets in self.buckets.items():
+            buckets[int(timestamp_sec // size)][emotion] += 1
+
+    def add_records(self, records):
+        for record in records:
+            self.add(record['timestamp_sec'], record['emotion'])
+        return self
+
+    def add_columns(self, timestamp_ms, emotion_codes, emotion_names):
+        """Vectorized add() over columnar data (int64 epoch-ms, uint8 emotion codes).
+
+        Counts are inserted in order of first appearance, so ties for the
+        dominant emotion break exactly as they do in add().
+        """
+        if not len(timestamp_ms):
+            return self
+        codes = np.asarray(emotion_codes, dtype=np.int64)
+        self.total += len(codes)
+        for code, count in _first_seen_counts(codes):
+            self.overall[emotion_names[code]] += count
+        for size, buckets in self.buckets.items():
+            # One int64 key per (bucket, emotion) pair, counted in a single np.unique
+            keys = (np.asarray(timestamp_ms) // (size * 1000)) * 256 + codes
+            for key, count in _first_seen_counts(keys):
+                buckets[key >> 8][emotion_names[key & 0xFF]] += count
+        return self
+
+    def merge(self, other):
+        """Fold another aggregator (same bucket sizes) into this one."""
+        self.total += other.total
+        self.overall.update(other.overall)
+        for size, buckets in other.buckets.items():
+            mine = self.buckets[size]
+            for index, counts in buckets.items():
+                mine[index].update(counts)
+        return self
+
+    def to_state(self):
+        """JSON-serializable counters, restored by from_state()."""
+        return {
+            "bucket_sizes": list(self.bucket_sizes),
+            "total": self.total,
+            "overall": dict(self.overall),
+            "buckets": {str(size): {str(index): dict(counts) for index, counts in buckets.items()}
+                        for size, buckets in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        aggregator = cls(state["bucket_sizes"])
+        aggregator.total = state["total"]
+        aggregator.overall = Counter(state["overall"])
+        for size, buckets in state["buckets"].items():
+            target = aggregator.buckets[int(size)]
+            for index, counts in buckets.items():
+                target[int(index)] = Counter(counts)
+        return aggregator
+
+    def timeline(self, bucket_size):
+        buckets = self.buckets[bucket_size]
+        if not buckets:
+            return []
+        timeline = []
+        # Empty buckets between the first and last one are reported too
+        for index in range(min(buckets), max(buckets) + 1):
+            counts = buckets.get(index, Counter())
+            start = index * bucket_size
+            timeline.append({
+                "start": start,
+                "end": start + bucket_size,
+                "dominant_emotion": counts.most_common(1)[0][0] if counts else None,
+                "distribution": dict(counts),
+                "count": sum(counts.values()),
+                "start_str": datetime.fromtimestamp(start).strftime("%H:%M:%S"),
+                "end_str": datetime.fromtimestamp(start + bucket_size).strftime("%H:%M:%S"),
+            })
+        return timeline
+
+    def summary(self):
+        summary = {
+            "overall": {
+                "total_samples": self.total,
+                "distribution": {emotion: count / self.total for emotion, count in self.overall.items()},
+            },
+            # The first bucket size is the primary timeline read by test_gemini.py and the dashboard
+            "timeline": self.timeline(self.bucket_sizes[0]),
+        }
+        if len(self.bucket_sizes) > 1:
+            summary["timelines"] = {str(size): self.timeline(size) for size in self.bucket_sizes}
+        return summary
+
+def shard_ranges(paths, shard_bytes):
+    """Split files into (path, start, end) byte ranges of at most ~shard_bytes each."""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), shard_bytes):
+            shards.append((path, start, min(start + shard_bytes, size)))
+    return shards
+
+def _aggregate_shard(shard, bucket_sizes):
+    path, start, end = shard
+    records = (prepare_record(r) for r in iter_range_records(path, start, end))
+    return TimelineAggregator(bucket_sizes).add_records(records)
+
+def aggregate_parallel(data_dir="client_data", bucket_sizes=(30,), workers=None, shard_mb=64):
+    """Map-reduce version of TimelineAggregator().add_records(load_data(data_dir)).
+
+    Each file (or ~shard_mb slice of a large file) is parsed and pre-aggregated
+    in a worker process; the partial aggregators are merged in file and offset
+    order, so the summary is identical to the serial one.
+    """
+    shards = shard_ranges(glob.glob(f"{data_dir}/*.jsonl"), int(shard_mb * 1024 * 1024))
+    aggregator = TimelineAggregator(bucket_sizes)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_aggregate_shard, shards, [bucket_sizes] * len(shards)):
+            aggregator.merge(partial)
+    return aggregator
+
+def aggregate_incremental(data_dir="client_data", bucket_sizes=(30,), state_path=STATE_FILE):
+    """Aggregate using per-file watermarks and partial counters kept in `state_path`.
+
+    Only bytes appended since the last run are parsed; a file that was
+    rewritten is re-read from the start and its partial counters rebuilt.
+    Files that disappeared are dropped. The cost of a re-run is therefore the
+    new data plus the (small) per-bucket counters, not the whole history.
+    """
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r") as f:
+            state = json.load(f)
+    if state.get("bucket_sizes") != list(bucket_sizes):
+        state = {"bucket_sizes": list(bucket_sizes), "files": {}}
+
+    files = {}
+    aggregator = TimelineAggregator(bucket_sizes)
+    for filepath in glob.glob(f"{data_dir}/*.jsonl"):
+        entry = state["files"].get(filepath)
+        cursor = LogCursor(filepath, entry and entry["watermark"])
+        if entry and not cursor.reset:
+            partial = TimelineAggregator.from_state(entry["partial"])
+        else:
+            partial = TimelineAggregator(bucket_sizes)
+        partial.add_records(prepare_record(r) for r in cursor.records())
+        files[filepath] = {"watermark": cursor.watermark(), "partial": partial.to_state()}
+        aggregator.merge(partial)
+
+    state["files"] = files
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp_path, state_path)
+    return aggregator
+
+def aggregate(data_dir="client_data", bucket_sizes=(30,), workers=1, incremental=False, store=None):
+    if store:
+        columns = open_store(store)
+        aggregator = TimelineAggregator(bucket_sizes).add_columns(columns.timestamp, columns.dominant(),
+                                                                  columns.emotions)
+    elif incremental:
+        aggregator = aggregate_incremental(data_dir, bucket_sizes)
+    elif workers == 1:
+        aggregator = TimelineAggregator(bucket_sizes).add_records(load_data(data_dir))
+    else:
+        aggregator = aggregate_parallel(data_dir, bucket_sizes, workers)
+    if not aggregator.total:
         print("❌ No data found. Check that client_data folder exists and contains .jsonl files.")
         # Optionally save an error file
         error_summary = {"error": "No data found"}
@@ -23,51 +248,7 @@ def aggregate():
             json.dump(error_summary, f, indent=2)
         return error_summary
 
-    # 1. overall sentiment distribution
-    emotions = [r['emotion'] for r in records]
-    total = len(emotions)
-    emotion_counts = Counter(emotions)
-    overall_dist = {emotion: count / total for emotion, count in emotion_counts.items()}
-
-    # 2. timeline (30-second buckets)
-    timestamps = [r['timestamp_sec'] for r in records]
-    start_time = min(timestamps)
-    end_time = max(timestamps)
-    bucket_size = 30  # seconds
-
-    buckets = []
-    current = start_time
-    while current < end_time:
-        bucket_end = current + bucket_size
-        bucket_emotions = [r['emotion'] for r in records if current <= r['timestamp_sec'] < bucket_end]
-        if bucket_emotions:
-            dominant = Counter(bucket_emotions).most_common(1)[0][0]
-            dist = dict(Counter(bucket_emotions))
-        else:
-            dominant = None
-            dist = {}
-        buckets.append({
-            "start": current,
-            "end": bucket_end,
-            "dominant_emotion": dominant,
-            "distribution": dist,
-            "count": len(bucket_emotions),      # <-- comma now present
-        })
-        current = bucket_end
-
-    # format start/end as readable time strings
-    for b in buckets:
-        b['start_str'] = datetime.fromtimestamp(b['start']).strftime("%H:%M:%S")
-        b['end_str'] = datetime.fromtimestamp(b['end']).strftime("%H:%M:%S")
-
-    summary = {
-        "overall": {
-            "total_samples": total,
-            "distribution": overall_dist        # <-- removed leading underscore
-        },
-        "timeline": buckets
-    }
-
+    summary = aggregator.summary()
     with open("aggregated_summary.json", "w") as f:
         json.dump(summary, f, indent=2)
 
@@ -75,4 +256,14 @@ def aggregate():
     return summary
 
 if __name__ == "__main__":
-    aggregate()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Aggregate client emotion logs into aggregated_summary.json")
+    parser.add_argument("--data-dir", default="client_data")
+    parser.add_argument("--bucket", type=int, action="append",
+                        help="bucket size in seconds; repeat for several resolutions (default: 30)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for parsing; 0 uses every core (default: 1, serial)")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only parse data appended since the last run (state kept in {STATE_FILE})")
+    parser.add_argument("--store", help="read a columnar store (see columnar_store.py) instead of --data-dir")
+    args = parser.parse_args()
+    aggregate(args.data_dir, tuple(args.bucket or (30,)), args.workers or None, args.incremental, args.store)
@@ -0,0 +1,58 @@
+"""Timeline aggregation throughput: the old per-bucket rescans vs. TimelineAggregator.
+
+Usage: python bench_aggregate.py [--records 10000000] [--legacy-records 50000]
+Records are synthetic (one sample every 0.5 s); the legacy quadratic version
+is only run on the smaller count.
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from aggregate import TimelineAggregator
+
+EMOTIONS = ["happy", "neutral", "sad", "surprised", "confused"]
+
+
+def synthetic_records(count, start=1_700_000_000.0, step=0.5):
+    rng = random.Random(0)
+    for i in range(count):
+        yield {'timestamp_sec': start + i * step, 'emotion': rng.choice(EMOTIONS)}
+
+
+def legacy_timeline(data, bucket_size=30):
+    """The previous aggregate(): every bucket rescans every record."""
+    min_ts = min(r['timestamp_sec'] for r in data)
+    max_ts = max(r['timestamp_sec'] for r in data)
+    timeline = []
+    current = min_ts
+    while current < max_ts:
+        bucket_end = current + bucket_size
+        in_bucket = [r['emotion'] for r in data if current <= r['timestamp_sec'] < bucket_end]
+        if in_bucket:
+            timeline.append(Counter(in_bucket).most_common(1)[0][0])
+        current = bucket_end
+    return timeline
+
+
+def bench(name, count, step):
+    start = time.perf_counter()
+    step()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {count:>11,} records  {elapsed:8.2f}s  {count / elapsed:12,.0f} rec/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000_000)
+    parser.add_argument("--legacy-records", type=int, default=50_000)
+    args = parser.parse_args()
+
+    small = list(synthetic_records(args.legacy_records))
+    bench("legacy (rescan per bucket)", len(small), lambda: legacy_timeline(small))
+    bench("single pass, 30s", len(small), lambda: TimelineAggregator().add_records(small).summary())
+    bench("single pass, 30s+60s+300s", args.records,
+          lambda: TimelineAggregator((30, 60, 300)).add_records(synthetic_records(args.records)).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Size and load time of the columnar store vs. the JSON formats it replaces.
+
+Usage: python bench_columnar.py [--records 200000]
+Synthetic logger records (top-3 emotions, pitch, distracted, 50 users) are
+written as indented JSON (like master_emotion_data.json), JSONL and a
+columnar store; "load" means getting timestamps and dominant emotions.
+"""
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from datetime import datetime
+from session_log import iter_records, record_time_sec, TIMESTAMP_FORMAT
+from columnar_store import write_store, open_store
+
+EMOTIONS = ["neutral", "happy", "sad", "angry", "fear", "surprise", "disgust"]
+
+
+def synthetic_records(count, users=50, start=1_700_000_000.0):
+    rng = random.Random(0)
+    for i in range(count):
+        scores = sorted((round(rng.random(), 4) for _ in EMOTIONS), reverse=True)[:3]
+        yield {
+            "timestamp": datetime.fromtimestamp(start + i / users).strftime(TIMESTAMP_FORMAT)[:-3],
+            "user": str(i % users),
+            "distracted": rng.random() < 0.2,
+            "pitch": round(rng.uniform(-40, 20), 2),
+            "top_emotions": [{"emotion": e, "score": s} for e, s in zip(rng.sample(EMOTIONS, 3), scores)],
+        }
+
+
+def size_of(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def bench(name, path, load):
+    start = time.perf_counter()
+    n = len(load()[0])
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {size_of(path) / 2**20:9.2f} MB  load {elapsed * 1000:9.1f} ms  ({n:,} records)")
+
+
+def load_json(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    return [record_time_sec(r) for r in data], [r["top_emotions"][0]["emotion"] for r in data]
+
+def load_jsonl(path):
+    records = list(iter_records(path))
+    return [record_time_sec(r) for r in records], [r["top_emotions"][0]["emotion"] for r in records]
+
+def load_store(path):
+    store = open_store(path)
+    # np.array() reads every page of the memory map, so the timing includes the I/O
+    return np.array(store.timestamp), np.array(store.dominant())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+
+    records = list(synthetic_records(args.records))
+    folder = tempfile.mkdtemp()
+    try:
+        json_path = os.path.join(folder, "master.json")
+        jsonl_path = os.path.join(folder, "master.jsonl")
+        store_path = os.path.join(folder, "master.emo")
+        with open(json_path, "w") as f:
+            json.dump(records, f, indent=4)
+        with open(jsonl_path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        write_store(store_path, records)
+
+        bench("JSON (indent=4)", json_path, lambda: load_json(json_path))
+        bench("JSONL", jsonl_path, lambda: load_jsonl(jsonl_path))
+        bench("columnar (memmap)", store_path, lambda: load_store(store_path))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Frames/sec of the shared-detection FaceAnalyzer vs. the old FER + FaceMesh path.
+
+Usage: python bench_face_analyzer.py [--video talk.mp4] [--frames 300]
+Without --video the default webcam is used.
+"""
+import argparse
+import time
+import cv2
+import mediapipe as mp
+from fer.fer import FER
+from face_analyzer import FaceAnalyzer
+
+
+def read_frames(source, count):
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def bench(name, frames, step):
+    start = time.perf_counter()
+    faces = sum(1 for frame in frames if step(frame))
+    elapsed = time.perf_counter() - start
+    fps = len(frames) / elapsed if elapsed else 0.0
+    print(f"{name:<28} {fps:7.1f} fps  ({faces}/{len(frames)} frames with a face)")
+    return fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default=0, help="video file (default: webcam 0)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--keyframe-interval", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        print("❌ No frames read from source.")
+        return
+    print(f"Benchmarking on {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    detector = FER(mtcnn=False)
+    face_mesh_cls = mp.solutions.face_mesh.FaceMesh
+
+    with face_mesh_cls(max_num_faces=1, refine_landmarks=True) as face_mesh:
+        def baseline(frame):
+            emotions = detector.detect_emotions(frame)
+            face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            return bool(emotions)
+        base_fps = bench("FER + FaceMesh (baseline)", frames, baseline)
+
+    with face_mesh_cls(max_num_faces=1, refine_landmarks=True) as face_mesh:
+        analyzer = FaceAnalyzer(detector, face_mesh, keyframe_interval=args.keyframe_interval)
+        shared_fps = bench("FaceAnalyzer (shared pass)", frames,
+                           lambda frame: analyzer.analyze(frame)["emotions"] is not None)
+
+    if base_fps:
+        print(f"Speedup: {shared_fps / base_fps:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
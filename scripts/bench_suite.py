@@ -0,0 +1,344 @@
+"""End-to-end benchmarks on synthetic load from loadgen.py.
+
+Benchmarks:
+  generate   write the sessions in every on-disk format
+  read       parse each format (JSONL, JSON array, CSV, columnar store)
+  merge      Host.py merge into the master file: full, no-op, after an append and after late data
+  aggregate  aggregate.py serial, parallel, incremental and from the columnar store
+  flags      backend detect_flags + compute_metrics over the generated samples
+  analyze    POST /analyze with a synthetic video and wait for the job (needs --backend-url)
+
+Each run appends one JSON line to --results (parameters, git commit, machine
+and per-benchmark timings), so runs can be compared over time; --compare
+prints the change against the last earlier run with the same parameters.
+
+Usage: python bench_suite.py [--users 200] [--duration 3600] [--rate 1] [--only merge --only aggregate]
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import urllib.request
+import cv2
+import numpy as np
+from loadgen import generate, session_records, user_ids, FORMATS
+from session_log import iter_records, read_score_matrix, record_time_sec, EMOTION_ORDER
+from columnar_store import open_store, read_csv
+from aggregate import TimelineAggregator, load_data, aggregate_parallel, aggregate_incremental
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+BENCHMARKS = ("generate", "read", "merge", "aggregate", "flags", "analyze")
+BUCKET_SIZES = (30, 60, 300)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def throughput(seconds, records):
+    return {"seconds": round(seconds, 4), "records": records,
+            "records_per_s": round(records / seconds) if seconds else None}
+
+
+# ---------- BENCHMARKS ----------
+def bench_generate(ctx):
+    seconds, result = timed(generate, ctx["data_dir"], ctx["users"], ctx["duration"], ctx["rate"], FORMATS,
+                            "scores", ctx["seed"])
+    ctx["records"] = result["records"]
+    return dict(throughput(seconds, result["records"]), bytes=result["bytes"])
+
+
+def bench_read(ctx):
+    def count(records):
+        return sum(1 for _ in records)
+
+    def read_store(path):
+        store = open_store(path)
+        # Sum the columns so the memmapped pages are actually read
+        float(np.asarray(store.timestamp).sum()) + float(np.nansum(store.scores))
+        return len(store)
+
+    readers = {
+        "jsonl": lambda: count(r for path in _paths(ctx, "jsonl") for r in iter_records(path)),
+        "json": lambda: count(r for path in _paths(ctx, "json") for r in iter_records(path)),
+        "csv": lambda: count(r for path in _paths(ctx, "csv") for r in read_csv(path)),
+        "store": lambda: read_store(os.path.join(ctx["data_dir"], "store")),
+        "store_records": lambda: count(open_store(os.path.join(ctx["data_dir"], "store")).records()),
+    }
+    return {name: throughput(*timed(reader)) for name, reader in readers.items()}
+
+
+def bench_merge(ctx):
+    """Host.sync_and_merge() over the JSONL logs, run from a scratch directory."""
+    os.environ["SYNC_BACKEND"] = "http"          # merge the folder as-is, no git pull
+    os.environ["DATA_FOLDER"] = os.path.join(ctx["data_dir"], "jsonl")
+    os.environ.pop("MASTER_STORE", None)
+    import Host
+
+    def merge():
+        with contextlib.redirect_stdout(io.StringIO()):
+            Host.sync_and_merge()
+
+    results = {}
+    with _chdir(ctx["work_dir"]):
+        for name in ("master_emotion_data.jsonl", "master_merge_state.json"):
+            if os.path.exists(name):
+                os.remove(name)
+        results["full"] = throughput(timed(merge)[0], ctx["records"])
+        results["noop"] = throughput(timed(merge)[0], 0)
+        appended = _append_records(ctx)
+        results["append"] = throughput(timed(merge)[0], appended)
+        # A client syncing after the talk: its records land inside the merged range
+        late_path, late = _late_records(ctx)
+        try:
+            results["late"] = throughput(timed(merge)[0], late)
+        finally:
+            os.remove(late_path)
+    return results
+
+
+def bench_aggregate(ctx):
+    jsonl_dir = os.path.join(ctx["data_dir"], "jsonl")
+    state_path = os.path.join(ctx["work_dir"], "aggregate_state.json")
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    n = sum(_count_lines(path) for path in _paths(ctx, "jsonl"))
+    store = open_store(os.path.join(ctx["data_dir"], "store"))
+    runs = {
+        "serial": lambda: TimelineAggregator(BUCKET_SIZES).add_records(load_data(jsonl_dir)).summary(),
+        "parallel": lambda: aggregate_parallel(jsonl_dir, BUCKET_SIZES, ctx["workers"]).summary(),
+        "incremental_first": lambda: aggregate_incremental(jsonl_dir, BUCKET_SIZES, state_path).summary(),
+        "incremental_noop": lambda: aggregate_incremental(jsonl_dir, BUCKET_SIZES, state_path).summary(),
+        "store": lambda: TimelineAggregator(BUCKET_SIZES).add_columns(store.timestamp, store.dominant(),
+                                                                      store.emotions).summary(),
+    }
+    return {name: throughput(timed(run)[0], n if name != "store" else len(store)) for name, run in runs.items()}
+
+
+def bench_flags(ctx):
+    """All generated samples back to back as one long session (1 sample = 1 s, as in /analyze)."""
+    sys.path.insert(0, BACKEND_DIR)
+    from timeseries import Timeseries, EMOTIONS, detect_flags, compute_metrics
+
+    matrices = [read_score_matrix(path) for path in _paths(ctx, "jsonl")]
+    scores = np.concatenate([m["scores"] for m in matrices])
+    distracted = np.concatenate([m["distracted"] for m in matrices]).astype(np.float32)
+    order = [EMOTION_ORDER.index("angry" if e == "anger" else e) for e in EMOTIONS]
+    ts = Timeseries(np.arange(len(scores), dtype=np.float64), np.where(distracted > 0, 0.3, 0.85), distracted,
+                    np.concatenate([m["pitch"] for m in matrices]), scores[:, order])
+    seconds_flags, flags = timed(detect_flags, ts)
+    seconds_metrics = timed(compute_metrics, ts)[0]
+    return {"detect_flags": dict(throughput(seconds_flags, len(ts)), flags=len(flags)),
+            "compute_metrics": throughput(seconds_metrics, len(ts))}
+
+
+def bench_analyze(ctx):
+    if not ctx["backend_url"]:
+        return {"skipped": "no --backend-url"}
+    path = os.path.join(ctx["work_dir"], "synthetic.avi")
+    write_synthetic_video(path, ctx["video_seconds"])
+    base = ctx["backend_url"].rstrip("/")
+
+    start = time.perf_counter()
+    job = _post_video(base + "/analyze", path)
+    submitted = time.perf_counter() - start
+    status = job
+    while status.get("status") in ("queued", "running"):
+        time.sleep(0.5)
+        with urllib.request.urlopen(base + job["status_url"]) as response:
+            status = json.load(response)
+    seconds = time.perf_counter() - start
+    return {"status": status.get("status"), "video_s": ctx["video_seconds"], "seconds": round(seconds, 3),
+            "upload_s": round(submitted, 3), "realtime_factor": round(ctx["video_seconds"] / seconds, 2),
+            "error": status.get("error")}
+
+
+def write_synthetic_video(path, seconds, fps=30, size=(640, 480)):
+    """A drawn face drifting and nodding, with a changing mouth (MJPG .avi)."""
+    w, h = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    for i in range(int(seconds * fps)):
+        t = i / fps
+        frame = np.full((h, w, 3), 60, dtype=np.uint8)
+        cx, cy = int(w / 2 + 60 * np.sin(t / 3)), int(h / 2 + 25 * np.sin(t / 1.7))
+        cv2.ellipse(frame, (cx, cy), (90, 120), 0, 0, 360, (150, 180, 220), -1)
+        for dx in (-35, 35):
+            cv2.circle(frame, (cx + dx, cy - 30), 10, (40, 40, 40), -1)
+        smile = int(25 * np.sin(t / 2))
+        cv2.ellipse(frame, (cx, cy + 50), (40, abs(smile) + 2), 0, 0 if smile >= 0 else 180,
+                    180 if smile >= 0 else 360, (30, 30, 120), 3)
+        writer.write(frame)
+    writer.release()
+
+
+# ---------- HELPERS ----------
+def _paths(ctx, fmt):
+    folder = os.path.join(ctx["data_dir"], fmt)
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder))
+
+
+def _count_lines(path):
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _edge_record(path, last=True):
+    """First or last record of a JSONL log, reading only the end that is needed."""
+    with open(path, "rb") as f:
+        if last:
+            f.seek(max(0, os.path.getsize(path) - 64 * 1024))
+            lines = f.read().splitlines()
+        else:
+            lines = [f.readline()]
+    return json.loads(next(line for line in reversed(lines) if line.strip()))
+
+
+def _write_records(path, records, mode="a"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.writelines(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+
+
+def _append_records(ctx, fraction=0.01):
+    """Continue every user's JSONL log by ~`fraction` more session time; returns the records added."""
+    extra_s = max(1.0, ctx["duration"] * fraction)
+    added = 0
+    for i, (user, path) in enumerate(zip(user_ids(ctx["users"]), _paths(ctx, "jsonl"))):
+        start = record_time_sec(_edge_record(path)) + 1.0 / ctx["rate"]
+        records = session_records(user, extra_s, ctx["rate"], start, ctx["seed"] + 10_000 + i)
+        _write_records(path, records)
+        added += len(records)
+    return added
+
+
+def _late_records(ctx, fraction=0.01):
+    """A new user's log covering ~`fraction` of the session from its midpoint; returns (path, records)."""
+    first = min(record_time_sec(_edge_record(path, last=False)) for path in _paths(ctx, "jsonl"))
+    records = session_records("late", max(1.0, ctx["duration"] * fraction), ctx["rate"],
+                              first + ctx["duration"] / 2, ctx["seed"] + 20_000)
+    path = os.path.join(ctx["data_dir"], "jsonl", "emotion_data_late.jsonl")
+    _write_records(path, records, mode="w")
+    return path, len(records)
+
+
+def _post_video(url, path):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        video = f.read()
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"video\"; filename=\"synthetic.avi\"\r\n"
+            f"Content-Type: video/x-msvideo\r\n\r\n").encode() + video + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(url, data=body, method="POST",
+                                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(run, history_path):
+    """Print each timing's change against the last run in `history_path` with the same parameters."""
+    previous = None
+    if os.path.exists(history_path):
+        with open(history_path, "r") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["params"] == run["params"]:
+                    previous = entry
+    if previous is None:
+        print("No earlier run with the same parameters to compare against.")
+        return
+    print(f"Compared with {previous['git_commit'] or '?'} ({previous['started']}):")
+    for name, result in run["results"].items():
+        for key, before, after in _seconds(name, previous["results"].get(name, {}), result):
+            change = (after - before) / before if before else 0.0
+            print(f"  {key:<32} {before:9.3f}s -> {after:9.3f}s  {change:+7.1%}")
+
+
+def _seconds(prefix, before, after):
+    if isinstance(after, dict):
+        if "seconds" in after and "seconds" in before:
+            yield prefix, before["seconds"], after["seconds"]
+        for key, value in after.items():
+            if isinstance(value, dict):
+                yield from _seconds(f"{prefix}.{key}", before.get(key, {}), value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=3600, help="session length in seconds")
+    parser.add_argument("--rate", type=float, default=1.0, help="records per second per user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes for the parallel aggregate")
+    parser.add_argument("--only", action="append", choices=BENCHMARKS, help="run only these (repeatable)")
+    parser.add_argument("--backend-url", help="e.g. http://localhost:5000 for the analyze benchmark")
+    parser.add_argument("--video-seconds", type=float, default=60)
+    parser.add_argument("--work-dir", help="keep the generated data here (default: a temp dir, removed)")
+    parser.add_argument("--results", default="bench_results.jsonl", help="JSON-lines history to append to")
+    parser.add_argument("--compare", action="store_true", help="print the change against the previous run")
+    args = parser.parse_args()
+
+    work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix="bench_suite_"))
+    ctx = {"users": args.users, "duration": args.duration, "rate": args.rate, "seed": args.seed,
+           "workers": args.workers, "backend_url": args.backend_url, "video_seconds": args.video_seconds,
+           "work_dir": work_dir, "data_dir": os.path.join(work_dir, "data"), "records": 0}
+    selected = [name for name in BENCHMARKS if not args.only or name in args.only]
+    # Everything else runs on the generated data
+    if "generate" not in selected:
+        selected.insert(0, "generate")
+
+    run = {
+        "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "git_commit": _git_commit(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "params": {k: ctx[k] for k in ("users", "duration", "rate", "seed")},
+        "results": {},
+    }
+    try:
+        for name in selected:
+            print(f"[Bench] {name}...", flush=True)
+            try:
+                run["results"][name] = globals()[f"bench_{name}"](ctx)
+            except Exception as e:
+                # Keep going so one broken stage doesn't hide the others' numbers
+                run["results"][name] = {"error": f"{type(e).__name__}: {e}"}
+            print(json.dumps(run["results"][name], indent=2))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.compare:
+        compare(run, args.results)
+    with open(args.results, "a") as f:
+        f.write(json.dumps(run, separators=(",", ":")) + "\n")
+    print(f"✅ Results appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Binary columnar store for emotion records.
+
+A store is a directory of NumPy .npy columns plus a small meta.json:
+
+    timestamp.npy   int64    epoch milliseconds
+    user.npy        uint16   index into meta["users"]
+    emotion.npy     uint8    (N, top_k) indices into meta["emotions"], 255 = none
+    score.npy       float32  (N, top_k) scores, NaN = none (float16 on request)
+    pitch.npy       float32  NaN = not recorded
+    distracted.npy  uint8    0/1, 255 = not recorded
+    scores.npy      float32  (N, 7) full score vector in EMOTION_ORDER, NaN = not recorded
+
+`open_store()` memory-maps every column, so readers get NumPy arrays without
+parsing or copying. Writers build the new store in a temporary directory and
+swap it in, so a reader never maps a half-written column. JSON, JSONL and CSV import/export are kept so the store
+can always be converted back to the logger's record format.
+"""
+import os
+import csv
+import json
+import shutil
+import argparse
+from datetime import datetime
+import numpy as np
+from session_log import iter_records, record_time_sec, TIMESTAMP_FORMAT, EMOTION_ORDER
+
+FORMAT_VERSION = 2   # 2 added scores.npy
+TOP_K = 3
+NO_EMOTION = 255
+NOT_RECORDED = 255
+COLUMNS = ("timestamp", "user", "emotion", "score", "pitch", "distracted", "scores")
+
+
+class EmotionColumns:
+    """Read-only view of a store: each column is a np.memmap (or array)."""
+
+    def __init__(self, meta, columns):
+        self.meta = meta
+        self.users = meta["users"]
+        self.emotions = meta["emotions"]
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def dominant(self):
+        """Code of each row's top emotion (index into `.emotions`)."""
+        return self.emotion[:, 0]
+
+    def records(self, start=0, stop=None):
+        """Decode rows back into logger-style record dicts."""
+        string_time = self.meta.get("timestamp_style") == "string"
+        for i in range(start, len(self) if stop is None else stop):
+            ts = int(self.timestamp[i])
+            record = {"timestamp": datetime.fromtimestamp(ts / 1000).strftime(TIMESTAMP_FORMAT)[:-3]
+                      if string_time else ts}
+            user = self.users[self.user[i]]
+            if user is not None:
+                record["user"] = user
+            if self.distracted[i] != NOT_RECORDED:
+                record["distracted"] = bool(self.distracted[i])
+            if not np.isnan(self.pitch[i]):
+                record["pitch"] = round(float(self.pitch[i]), 2)
+            codes, scores = self.emotion[i], self.score[i]
+            if not np.isnan(self.scores[i, 0]):
+                record["scores"] = [round(float(s), 4) for s in self.scores[i]]
+            elif np.isnan(scores[0]):
+                record["emotion"] = self.emotions[codes[0]]
+            else:
+                record["top_emotions"] = [
+                    {"emotion": self.emotions[c], "score": round(float(s), 4)}
+                    for c, s in zip(codes, scores) if c != NO_EMOTION]
+            yield record
+
+
+def _columns_from_records(records, top_k=TOP_K, score_dtype=np.float32, users=(), emotions=(), string_time=None):
+    """Encode records; `users` / `emotions` are codes already in use, new names get the next ones."""
+    users = {name: code for code, name in enumerate(users)}
+    emotions = {name: code for code, name in enumerate(emotions)}
+    timestamp, user, pitch, distracted, emotion, score, vectors = [], [], [], [], [], [], []
+    no_vector = [np.nan] * len(EMOTION_ORDER)
+    for record in records:
+        if string_time is None:
+            string_time = isinstance(record["timestamp"], str)
+        timestamp.append(round(record_time_sec(record) * 1000))
+        user.append(users.setdefault(record.get("user"), len(users)))
+        pitch.append(record.get("pitch", np.nan))
+        distracted.append(int(record["distracted"]) if "distracted" in record else NOT_RECORDED)
+        vectors.append(record.get("scores", no_vector))
+        if "scores" in record:
+            top = sorted(zip(EMOTION_ORDER, record["scores"]), key=lambda x: x[1], reverse=True)[:top_k]
+            codes = [emotions.setdefault(e, len(emotions)) for e, _ in top]
+            scores = [s for _, s in top]
+        elif "top_emotions" in record:
+            top = record["top_emotions"][:top_k]
+            codes = [emotions.setdefault(e["emotion"], len(emotions)) for e in top]
+            scores = [e["score"] for e in top]
+        else:
+            codes, scores = [emotions.setdefault(record["emotion"], len(emotions))], [np.nan]
+        emotion.append(codes + [NO_EMOTION] * (top_k - len(codes)))
+        score.append(scores + [np.nan] * (top_k - len(scores)))
+
+    if len(emotions) >= NO_EMOTION or len(users) > np.iinfo(np.uint16).max:
+        raise ValueError("Too many distinct emotions or users for the columnar format")
+    n = len(timestamp)
+    meta = {
+        "version": FORMAT_VERSION,
+        "count": n,
+        "top_k": top_k,
+        "timestamp_style": "string" if string_time else "ms",
+        "users": list(users),
+        "emotions": list(emotions),
+    }
+    columns = {
+        "timestamp": np.array(timestamp, dtype=np.int64),
+        "user": np.array(user, dtype=np.uint16),
+        "emotion": np.array(emotion, dtype=np.uint8).reshape(n, top_k),
+        "score": np.array(score, dtype=score_dtype).reshape(n, top_k),
+        "pitch": np.array(pitch, dtype=np.float32),
+        "distracted": np.array(distracted, dtype=np.uint8),
+        "scores": np.array(vectors, dtype=np.float32).reshape(n, len(EMOTION_ORDER)),
+    }
+    return meta, columns
+
+
+def write_store(path, records, top_k=TOP_K, score_dtype=np.float32):
+    """Encode `records` (any iterable of record dicts) into a store directory at `path`.
+
+    float32 scores round-trip the logger's 4-decimal values exactly; float16
+    halves that column but keeps only ~3 significant digits.
+    """
+    meta, columns = _columns_from_records(records, top_k, score_dtype)
+    _save_store(path, meta, columns)
+    return EmotionColumns(meta, columns)
+
+
+def append_store(path, records, keep=None):
+    """Append `records` to the store at `path`, after its first `keep` rows (default: all of them).
+
+    Only the new records are encoded; the kept rows are copied as binary
+    columns, and their user/emotion codes stay valid because new names are
+    coded after the existing ones. Without a store at `path` this is
+    write_store().
+    """
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return write_store(path, records)
+    old = open_store(path)
+    keep = len(old) if keep is None else min(keep, len(old))
+    meta, new = _columns_from_records(records, old.meta["top_k"], old.score.dtype, old.users, old.emotions,
+                                      old.meta.get("timestamp_style") == "string")
+    meta["count"] += keep
+    columns = {name: np.concatenate([getattr(old, name)[:keep], new[name]]) for name in COLUMNS}
+    _save_store(path, meta, columns)
+    return EmotionColumns(meta, columns)
+
+
+def _save_store(path, meta, columns):
+    """Write a store next to `path` and swap it in, so readers only ever see a complete store."""
+    tmp_path, old_path = path + ".tmp", path + ".old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in columns.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    # Open memory maps keep the replaced files alive until their readers drop them
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def open_store(path, mmap_mode="r"):
+    """Memory-map a store written by write_store()."""
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta.get("version") not in (1, FORMAT_VERSION):
+        raise ValueError(f"Unsupported columnar store version: {meta.get('version')}")
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+               for name in COLUMNS if name != "scores" or meta["version"] >= 2}
+    if "scores" not in columns:
+        columns["scores"] = np.full((meta["count"], len(EMOTION_ORDER)), np.nan, dtype=np.float32)
+    return EmotionColumns(meta, columns)
+
+
+# ---------- JSON / CSV import & export ----------
+def import_file(src, path):
+    """Build a store from a .json array, .jsonl log or .csv export."""
+    records = read_csv(src) if src.endswith(".csv") else iter_records(src)
+    return write_store(path, records)
+
+def export_json(store, dst):
+    """Write the store as JSONL (.jsonl) or as a JSON array (.json)."""
+    with open(dst, "w", encoding="utf-8") as f:
+        if dst.endswith(".jsonl"):
+            for record in store.records():
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        else:
+            json.dump(list(store.records()), f, indent=4)
+
+def _csv_header(top_k):
+    header = ["timestamp", "user", "distracted", "pitch"]
+    for k in range(1, top_k + 1):
+        header += [f"emotion_{k}", f"score_{k}"]
+    # Full score vectors (newer logs) go in one column per emotion
+    return header + list(EMOTION_ORDER)
+
+def export_csv(store, dst):
+    write_csv(store.records(), dst, store.meta["top_k"])
+
+def write_csv(records, dst, top_k=TOP_K):
+    """Write record dicts in the export_csv() layout."""
+    with open(dst, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(_csv_header(top_k))
+        for record in records:
+            row = [record["timestamp"], record.get("user", ""), record.get("distracted", ""), record.get("pitch", "")]
+            if "scores" in record:
+                writer.writerow(row + ["", ""] * top_k + record["scores"])
+                continue
+            top = record.get("top_emotions") or [{"emotion": record["emotion"], "score": ""}]
+            for k in range(top_k):
+                row += [top[k]["emotion"], top[k]["score"]] if k < len(top) else ["", ""]
+            writer.writerow(row + [""] * len(EMOTION_ORDER))
+
+def read_csv(src):
+    """Yield records from a CSV written by export_csv()."""
+    with open(src, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            ts = row["timestamp"]
+            record = {"timestamp": ts if not ts.replace(".", "", 1).isdigit() else float(ts)}
+            if row.get("user"):
+                record["user"] = row["user"]
+            if row.get("distracted"):
+                record["distracted"] = row["distracted"] == "True"
+            if row.get("pitch"):
+                record["pitch"] = float(row["pitch"])
+            if row.get(EMOTION_ORDER[0]):
+                record["scores"] = [float(row[e]) for e in EMOTION_ORDER]
+                yield record
+                continue
+            top = []
+            k = 1
+            while row.get(f"emotion_{k}"):
+                top.append({"emotion": row[f"emotion_{k}"], "score": row[f"score_{k}"]})
+                k += 1
+            if top and top[0]["score"] == "":
+                record["emotion"] = top[0]["emotion"]
+            else:
+                record["top_emotions"] = [{"emotion": e["emotion"], "score": float(e["score"])} for e in top]
+            yield record
+# ------------------------------------
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert emotion records to and from the columnar store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="JSON/JSONL/CSV -> store")
+    imp.add_argument("src")
+    imp.add_argument("store")
+    exp = sub.add_parser("export", help="store -> JSON/JSONL/CSV (by extension)")
+    exp.add_argument("store")
+    exp.add_argument("dst")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = import_file(args.src, args.store)
+        print(f"✅ {len(store)} records written to {args.store}")
+    else:
+        store = open_store(args.store)
+        (export_csv if args.dst.endswith(".csv") else export_json)(store, args.dst)
+        print(f"✅ {len(store)} records exported to {args.dst}")
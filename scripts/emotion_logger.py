@@ -1,19 +1,20 @@
 import cv2
 import time
-import json
 import os
 import subprocess
 import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
 from fer.fer import FER
+from session_log import SessionLog, migrate_legacy_log, EMOTION_ORDER
 
 # 1. Setup Environment & JSON File
 load_dotenv()
 TOKEN = os.getenv("GITHUB_TOKEN")
 USER = os.getenv("GITHUB_USER")
 REPO = os.getenv("GITHUB_REPO")
-JSON_FILE = "emotion_data.json"
+LEGACY_JSON_FILE = "emotion_data.json"
+JSON_FILE = "emotion_data.jsonl"
 
 if not all([TOKEN, USER, REPO]):
     print(f"❌ ERROR: .env variables missing! USER={USER}, REPO={REPO}")
@@ -35,16 +36,13 @@ detector = FER(mtcnn=False)
 cap = cv2.VideoCapture(0)
 last_update_time = time.time()
 interval = 0.5 
-collected_emotions = []
-all_data_log = [] # List to hold all session records
+# Per-interval sum of the score vectors (EMOTION_ORDER) and number of frames with a face
+score_sums = np.zeros(len(EMOTION_ORDER))
+scored_frames = 0
 
-# Load existing data if file exists to append to it
-if os.path.exists(JSON_FILE):
-    with open(JSON_FILE, 'r') as f:
-        try:
-            all_data_log = json.load(f)
-        except json.JSONDecodeError:
-            all_data_log = []
+# Append to the existing JSONL log, converting an old JSON-array file once
+migrate_legacy_log(LEGACY_JSON_FILE, JSON_FILE)
+session_log = SessionLog(JSON_FILE)
 
 print(f"Recording to {JSON_FILE}... Press 'q' to quit.")
 
@@ -56,30 +54,25 @@ while True:
     results = detector.detect_emotions(frame)
 
     if results:
-        collected_emotions.append(results[0]["emotions"])
+        emotions = results[0]["emotions"]
+        score_sums += np.fromiter((emotions[k] for k in EMOTION_ORDER), float, len(EMOTION_ORDER))
+        scored_frames += 1
         (x, y, w, h) = results[0]["box"]
         cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
 
     # 3. Process Half-Second Average
     if current_time - last_update_time >= interval:
-        if collected_emotions:
-            keys = collected_emotions[0].keys()
-            avg_scores = {k: float(np.mean([f[k] for f in collected_emotions])) for k in keys}
-            top_3 = sorted(avg_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-
-            # Create JSON Entry
+        if scored_frames:
+            # Create JSON Entry: the mean score vector, in EMOTION_ORDER
             entry = {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                "top_emotions": [{"emotion": e, "score": round(s, 4)} for e, s in top_3],
-                "all_scores": {k: round(v, 4) for k, v in avg_scores.items()}
+                "scores": np.round(score_sums / scored_frames, 4).tolist(),
             }
-            all_data_log.append(entry)
-            
-            # Save locally every interval to prevent data loss
-            with open(JSON_FILE, 'w') as f:
-                json.dump(all_data_log, f, indent=4)
+            # Appended and flushed periodically to prevent data loss
+            session_log.append(entry)
 
-            collected_emotions = []
+            score_sums.fill(0.0)
+            scored_frames = 0
         last_update_time = current_time
 
     cv2.imshow('Emotion JSON Logger', frame)
@@ -87,4 +80,5 @@ while True:
 
 cap.release()
 cv2.destroyAllWindows()
+session_log.close()
 submit_to_github()
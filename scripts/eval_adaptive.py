@@ -0,0 +1,144 @@
+"""CPU saved vs. accuracy lost by the adaptive inference scheduler, on recorded video.
+
+The video is streamed twice through the logger's FaceAnalyzer: once analyzing
+every frame (baseline) and once through AdaptiveScheduler. Frames are decoded
+as they are replayed, never held in memory, and only the scheduler and
+inference count towards each run's CPU time. Frame times come
+from the video's frame rate, so the replay is deterministic however fast the
+machine is. Both runs are averaged into `--interval` windows like the logger
+does, and the adaptive windows are compared against the baseline ones.
+
+Usage: python eval_adaptive.py --video talk.mp4 [--cpu-budget 0.5] [--json result.json]
+"""
+import json
+import time
+import argparse
+import cv2
+import numpy as np
+import mediapipe as mp
+from fer.fer import FER
+from face_analyzer import FaceAnalyzer
+from adaptive_scheduler import AdaptiveScheduler
+from session_log import EMOTION_ORDER
+
+
+def iter_frames(path, max_frames=0, fps=None):
+    """Stream (timestamp, frame) pairs; timestamps from the container fps unless `fps` is given."""
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+        count = 0
+        while not max_frames or count < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield count / fps, frame
+            count += 1
+    finally:
+        cap.release()
+
+
+def replay(frames, analyze, scheduler=None):
+    """Run `analyze` over streamed frames.
+
+    Returns ({frame index: (timestamp, scores)}, frames seen, seconds of
+    video, CPU seconds spent in the scheduler and `analyze`).
+    """
+    results = {}
+    cpu = 0.0
+    count, t = 0, 0.0
+    for count, (t, frame) in enumerate(frames, 1):
+        cpu_start = time.process_time()
+        if scheduler and not scheduler.should_analyze(frame, t):
+            cpu += time.process_time() - cpu_start
+            continue
+        start = time.perf_counter()
+        emotions = analyze(frame)
+        if scheduler:
+            scheduler.observe(t, [emotions], time.perf_counter() - start)
+        cpu += time.process_time() - cpu_start
+        if emotions:
+            results[count - 1] = (t, [emotions.get(k, 0.0) for k in EMOTION_ORDER])
+    return results, count, t, cpu
+
+
+def window_means(results, interval):
+    """Mean score vector per `interval`-second window (windows without a face are left out)."""
+    windows = {}
+    for t, scores in results.values():
+        windows.setdefault(int(t // interval), []).append(scores)
+    return {w: np.mean(v, axis=0) for w, v in windows.items()}
+
+
+def compare(baseline, adaptive):
+    both = sorted(set(baseline) & set(adaptive))
+    errors = np.array([np.abs(baseline[w] - adaptive[w]) for w in both]).reshape(-1, len(EMOTION_ORDER))
+    agree = sum(int(np.argmax(baseline[w]) == np.argmax(adaptive[w])) for w in both)
+    return {
+        "windows": len(baseline),
+        "windows_missing": len(set(baseline) - set(adaptive)),
+        "mean_abs_error": round(float(errors.mean()), 4) if len(both) else None,
+        "max_abs_error": round(float(errors.max()), 4) if len(both) else None,
+        "dominant_agreement": round(agree / len(both), 4) if both else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", required=True, help="recorded session video")
+    parser.add_argument("--frames", type=int, default=0, help="stop after this many frames (0 = all)")
+    parser.add_argument("--fps", type=float, default=None, help="override the container frame rate")
+    parser.add_argument("--interval", type=float, default=1.0, help="logging window in seconds")
+    parser.add_argument("--cpu-budget", type=float, default=0.5)
+    parser.add_argument("--motion-threshold", type=float, default=3.0)
+    parser.add_argument("--shift-threshold", type=float, default=0.1)
+    parser.add_argument("--keyframe-interval", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    detector = FER(mtcnn=False)
+    runs = {}
+    for name in ("baseline", "adaptive"):
+        scheduler = None
+        if name == "adaptive":
+            scheduler = AdaptiveScheduler(max_interval=args.interval / 2, cpu_budget=args.cpu_budget,
+                                          motion_threshold=args.motion_threshold,
+                                          shift_threshold=args.shift_threshold)
+        with mp.solutions.face_mesh.FaceMesh(max_num_faces=1) as face_mesh:
+            analyzer = FaceAnalyzer(detector, face_mesh, keyframe_interval=args.keyframe_interval)
+            results, frames, seconds, cpu = replay(iter_frames(args.video, args.frames, args.fps),
+                                                   lambda frame: analyzer.analyze(frame)["emotions"], scheduler)
+        if not frames:
+            print("❌ No frames read from video.")
+            return
+        if name == "baseline":
+            print(f"Replayed {frames} frames ({seconds:.1f} s of video)")
+        analyzed = scheduler.analyzed if scheduler else frames
+        runs[name] = {"results": results, "cpu_s": cpu, "analyzed": analyzed}
+        print(f"{name:<9} {analyzed:6d}/{frames} frames analyzed, {cpu:7.2f} s CPU")
+
+    base, adaptive = runs["baseline"], runs["adaptive"]
+    report = {
+        "video": args.video,
+        "frames": frames,
+        "settings": {k: getattr(args, k) for k in ("interval", "cpu_budget", "motion_threshold", "shift_threshold")},
+        "baseline": {"analyzed": base["analyzed"], "cpu_s": round(base["cpu_s"], 3)},
+        "adaptive": {"analyzed": adaptive["analyzed"], "cpu_s": round(adaptive["cpu_s"], 3)},
+        "cpu_saved": round(1 - adaptive["cpu_s"] / base["cpu_s"], 4) if base["cpu_s"] else None,
+        "accuracy": compare(window_means(base["results"], args.interval),
+                            window_means(adaptive["results"], args.interval)),
+    }
+    accuracy = report["accuracy"]
+    print(f"CPU saved: {report['cpu_saved']:.1%}" if report["cpu_saved"] is not None else "CPU saved: n/a")
+    print(f"Windows: {accuracy['windows']} ({accuracy['windows_missing']} without an adaptive sample)")
+    if accuracy["mean_abs_error"] is not None:
+        print(f"Score error per emotion: mean {accuracy['mean_abs_error']:.4f}, max {accuracy['max_abs_error']:.4f}")
+        print(f"Dominant emotion agreement: {accuracy['dominant_agreement']:.1%}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
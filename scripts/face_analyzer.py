@@ -0,0 +1,123 @@
+import math
+import cv2
+import numpy as np
+from profiler import NULL_PROFILER
+
+# FaceMesh indices used for head pose (nose tip, chin, eye corners, mouth corners)
+POSE_LANDMARK_IDS = [1, 152, 263, 33, 287, 57]
+# Extra stable points (brows, cheeks, forehead) that make optical-flow tracking robust
+TRACK_LANDMARK_IDS = POSE_LANDMARK_IDS + [10, 67, 297, 123, 352, 168, 6, 199]
+RIGHT_EYE_OUTER, LEFT_EYE_OUTER = 33, 263
+
+
+def landmark_points(face_landmarks, w, h):
+    """TRACK_LANDMARK_IDS of one FaceMesh face as an (N, 2) float32 pixel array."""
+    lm = face_landmarks.landmark
+    return np.array([(lm[i].x * w, lm[i].y * h) for i in TRACK_LANDMARK_IDS], dtype=np.float32)
+
+
+def face_box(points, w, h, margin=0.15):
+    """Bounding box (x, y, w, h) of the landmark points, padded by `margin` and clipped."""
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    mx, my = (x1 - x0) * margin, (y1 - y0) * margin
+    x0, y0 = max(0, int(x0 - mx)), max(0, int(y0 - my))
+    x1, y1 = min(w, int(x1 + mx)), min(h, int(y1 + my))
+    return (x0, y0, max(1, x1 - x0), max(1, y1 - y0))
+
+
+class FaceAnalyzer:
+    """One face-detection pass shared by FaceMesh and the FER classifier.
+
+    On keyframes FaceMesh locates the face; the landmark extents give the face
+    box and the eye corners give the roll angle used to align the crop. Only
+    that aligned ROI is passed to FER (`face_rectangles=`), so FER's own Haar
+    cascade never runs. Between keyframes the landmarks are tracked with
+    pyramidal Lucas-Kanade optical flow instead of running FaceMesh again.
+
+    `analyze(frame)` returns a dict with `box` (x, y, w, h in frame pixels),
+    `emotions` (FER score dict) and `pose_points` (the 6 POSE_LANDMARK_IDS in
+    pixels, for solvePnP), each None when no face is found.
+    """
+
+    def __init__(self, detector, face_mesh, keyframe_interval=5, min_tracked=0.7, margin=0.15,
+                 profiler=NULL_PROFILER):
+        self.detector = detector
+        self.profiler = profiler
+        self.face_mesh = face_mesh
+        self.keyframe_interval = keyframe_interval
+        self.min_tracked = min_tracked
+        self.margin = margin
+        self._frames_since_key = 0
+        self._prev_gray = None
+        self._points = None
+
+    def analyze(self, frame):
+        h, w, _ = frame.shape
+        with self.profiler.stage("cvtColor"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        points = None
+        if self._points is not None and self._frames_since_key < self.keyframe_interval:
+            points = self._track(gray)
+        if points is None:
+            points = self._detect(frame, w, h)
+            self._frames_since_key = 0
+        else:
+            self._frames_since_key += 1
+
+        self._prev_gray = gray
+        self._points = points
+        if points is None:
+            return {"box": None, "emotions": None, "pose_points": None}
+
+        box = face_box(points, w, h, self.margin)
+        return {
+            "box": box,
+            "emotions": self._classify(frame, box, points),
+            "pose_points": points[:len(POSE_LANDMARK_IDS)],
+        }
+
+    def reset(self):
+        self._points = self._prev_gray = None
+
+    # --- Keyframe: FaceMesh landmarks ---
+    def _detect(self, frame, w, h):
+        with self.profiler.stage("cvtColor"):
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with self.profiler.stage("face_mesh"):
+            mesh_results = self.face_mesh.process(rgb)
+        if not mesh_results.multi_face_landmarks:
+            return None
+        return landmark_points(mesh_results.multi_face_landmarks[0], w, h)
+
+    # --- In-between frames: Lucas-Kanade tracking of the previous landmarks ---
+    def _track(self, gray):
+        with self.profiler.stage("optical_flow"):
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                self._prev_gray, gray, self._points.reshape(-1, 1, 2), None,
+                winSize=(21, 21), maxLevel=2)
+        status = status.reshape(-1).astype(bool)
+        if status.mean() < self.min_tracked:
+            return None
+        new_points = new_points.reshape(-1, 2)
+        # Lost points follow the median motion of the ones that were tracked
+        shift = np.median(new_points[status] - self._points[status], axis=0)
+        new_points[~status] = self._points[~status] + shift
+        return new_points
+
+    # --- FER on the aligned ROI only ---
+    def _classify(self, frame, box, points):
+        x, y, bw, bh = box
+        roi = frame[y:y + bh, x:x + bw]
+        if roi.size == 0:
+            return None
+        right_eye = points[TRACK_LANDMARK_IDS.index(RIGHT_EYE_OUTER)]
+        left_eye = points[TRACK_LANDMARK_IDS.index(LEFT_EYE_OUTER)]
+        roll = math.degrees(math.atan2(left_eye[1] - right_eye[1], left_eye[0] - right_eye[0]))
+        if abs(roll) > 3.0:
+            rot = cv2.getRotationMatrix2D((bw / 2, bh / 2), roll, 1.0)
+            roi = cv2.warpAffine(roi, rot, (bw, bh), borderMode=cv2.BORDER_REPLICATE)
+        with self.profiler.stage("detect_emotions"):
+            results = self.detector.detect_emotions(roi, face_rectangles=[(0, 0, bw, bh)])
+        return results[0]["emotions"] if results else None
@@ -0,0 +1,161 @@
+import time
+import threading
+from collections import deque
+from profiler import NULL_PROFILER
+
+
+class RateMeter:
+    """Events per second over a sliding window of recent timestamps."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._times.append(now)
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+
+    def rate(self):
+        with self._lock:
+            if len(self._times) < 2:
+                return 0.0
+            span = self._times[-1] - self._times[0]
+            return (len(self._times) - 1) / span if span > 0 else 0.0
+
+
+class LatestFrame:
+    """Single-slot frame buffer: a new frame overwrites the previous one.
+
+    Consumers never queue up behind stale frames, so slow inference lowers the
+    inference rate without lowering the capture rate.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_id = 0
+        self._timestamp = 0.0
+        self.closed = False
+
+    def put(self, frame, timestamp):
+        with self._cond:
+            self._frame = frame
+            self._timestamp = timestamp
+            self._frame_id += 1
+            self._cond.notify_all()
+
+    def get(self):
+        """Return (frame_id, timestamp, frame) without waiting."""
+        with self._cond:
+            return self._frame_id, self._timestamp, self._frame
+
+    def wait_newer(self, frame_id, timeout=1.0):
+        """Block until a frame newer than `frame_id` arrives (or the slot closes)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame_id > frame_id or self.closed, timeout)
+            return self._frame_id, self._timestamp, self._frame
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from a cv2.VideoCapture as fast as the camera delivers them."""
+
+    def __init__(self, cap, slot, profiler=NULL_PROFILER):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.slot = slot
+        self.profiler = profiler
+        self.rate = RateMeter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set() and self.cap.isOpened():
+            with self.profiler.stage("cap.read"):
+                success, frame = self.cap.read()
+            if not success:
+                break
+            now = time.time()
+            self.slot.put(frame, now)
+            self.rate.tick(now)
+        self.slot.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class InferenceWorker(threading.Thread):
+    """Runs `analyze(frame)` on the latest captured frame.
+
+    `target_fps` caps the inference rate (0 = as fast as possible) and
+    `frame_skip` analyzes only every (frame_skip + 1)-th captured frame.
+    Each result is passed to `on_result(timestamp, result)` on this thread and
+    kept in `latest` for the render loop. Captured frames that were replaced
+    before this worker got to them are counted as "frames_dropped" (and
+    frames left out on purpose by `frame_skip` as "frames_skipped").
+    An optional `scheduler` (adaptive_scheduler.AdaptiveScheduler) can also
+    pass over near-static frames; those are counted as "frames_static".
+    """
+
+    def __init__(self, slot, analyze, on_result=None, target_fps=0.0, frame_skip=0, profiler=NULL_PROFILER,
+                 scheduler=None):
+        super().__init__(daemon=True)
+        self.slot = slot
+        self.analyze = analyze
+        self.on_result = on_result
+        self.min_period = 1.0 / target_fps if target_fps > 0 else 0.0
+        self.frame_skip = max(0, int(frame_skip))
+        self.profiler = profiler
+        self.scheduler = scheduler
+        self.rate = RateMeter()
+        self.latest = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        last_id, last_start = 0, 0.0
+        while not self._stop_event.is_set():
+            frame_id, timestamp, frame = self.slot.wait_newer(last_id)
+            if frame_id == last_id:
+                if self.slot.closed:
+                    break
+                continue
+            if self.frame_skip and frame_id % (self.frame_skip + 1):
+                self.profiler.count("frames_dropped", frame_id - last_id - 1)
+                self.profiler.count("frames_skipped")
+                last_id = frame_id
+                continue
+
+            wait = self.min_period - (time.time() - last_start)
+            if wait > 0:
+                time.sleep(wait)
+                # Pick up whatever arrived while throttling
+                frame_id, timestamp, frame = self.slot.get()
+
+            self.profiler.count("frames_dropped", frame_id - last_id - 1)
+            if self.scheduler and not self.scheduler.should_analyze(frame, timestamp):
+                self.profiler.count("frames_static")
+                last_id = frame_id
+                continue
+
+            self.profiler.count("frames_analyzed")
+            last_id, last_start = frame_id, time.time()
+            with self.profiler.stage("analyze"):
+                start = time.perf_counter()
+                result = self.analyze(frame)
+            if self.scheduler:
+                self.scheduler.observe(timestamp, result, time.perf_counter() - start)
+            self.latest = result
+            self.rate.tick()
+            if self.on_result:
+                with self.profiler.stage("on_result"):
+                    self.on_result(timestamp, result)
+
+    def stop(self):
+        self._stop_event.set()
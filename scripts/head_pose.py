@@ -0,0 +1,141 @@
+import math
+import cv2
+import numpy as np
+
+# Generic 3D face model matching POSE_LANDMARK_IDS (nose tip, chin, eye corners, mouth corners)
+MODEL_POINTS = np.array([
+    [0.0, 0.0, 0.0], [0.0, -330.0, -65.0], [-225.0, 170.0, -135.0],
+    [225.0, 170.0, -135.0], [-150.0, -150.0, -125.0], [150.0, -150.0, -125.0]
+], dtype=np.float32)
+
+
+def pitch_yaw(rot_vec):
+    """Pitch and yaw in degrees straight from a Rodrigues rotation vector.
+
+    Only the bottom row of the rotation matrix is needed, so it is built in
+    closed form instead of via cv2.Rodrigues + decomposeProjectionMatrix.
+    Signs match the old estimate: pitch < 0 is looking down.
+    """
+    rx, ry, rz = (float(v) for v in np.ravel(rot_vec))
+    theta = math.sqrt(rx * rx + ry * ry + rz * rz)
+    if theta < 1e-9:
+        return 0.0, 0.0
+    kx, ky, kz = rx / theta, ry / theta, rz / theta
+    c, s = math.cos(theta), math.sin(theta)
+    r20 = (1 - c) * kz * kx - s * ky
+    r21 = (1 - c) * kz * ky + s * kx
+    r22 = c + (1 - c) * kz * kz
+    pitch = math.degrees(math.atan2(r21, r22))
+    yaw = math.degrees(math.atan2(-r20, math.hypot(r21, r22)))
+    return -pitch, yaw
+
+
+class EMAFilter:
+    """Exponential moving average; `alpha` is the weight of the newest sample."""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.value = None
+
+    def __call__(self, t, x):
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al.): heavy smoothing when still, little lag when moving.
+
+    `min_cutoff` (Hz) sets the jitter suppression at rest, `beta` how fast the
+    cutoff rises with the speed of the signal.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = None
+        self._dx = 0.0
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, t, x):
+        if self.value is None or t <= self._t:
+            self.value, self._t = x, t
+            return x
+        dt = t - self._t
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx = a_d * (x - self.value) / dt + (1 - a_d) * self._dx
+        a = self._alpha(self.min_cutoff + self.beta * abs(self._dx), dt)
+        self.value = a * x + (1 - a) * self.value
+        self._t = t
+        return self.value
+
+
+def _wrap(angle):
+    """Angle in degrees mapped to [-180, 180)."""
+    return (angle + 180.0) % 360.0 - 180.0
+
+def make_filter(kind):
+    if kind == "ema":
+        return EMAFilter()
+    if kind == "one_euro":
+        return OneEuroFilter()
+    if kind == "none":
+        return lambda t, x: x
+    raise ValueError(f"Unknown pose filter: {kind}")
+
+
+class HeadPoseEstimator:
+    """Smoothed pitch/yaw for one tracked face.
+
+    solvePnP starts from the previous frame's pose (`useExtrinsicGuess`), so
+    it usually converges in a couple of iterations; the guess is dropped
+    after a frame without a face. Pitch and yaw then go through `filter_kind`
+    ("one_euro", "ema" or "none"). Angles are unwrapped against the previous
+    smoothed value before filtering, so a jump across ±180° is not averaged
+    through 0.
+    """
+
+    def __init__(self, camera_matrix, dist_coeffs, filter_kind="one_euro", model_points=MODEL_POINTS):
+        self.camera_matrix = camera_matrix
+        self.dist_coeffs = dist_coeffs
+        self.model_points = model_points
+        self.filter_kind = filter_kind
+        self.reset()
+
+    def reset(self):
+        self._rvec = self._tvec = None
+        self._pitch_filter = make_filter(self.filter_kind)
+        self._yaw_filter = make_filter(self.filter_kind)
+
+    def estimate(self, pose_points, t):
+        """Smoothed (pitch, yaw) in degrees, or None if solvePnP fails."""
+        pose_points = np.asarray(pose_points, dtype=np.float32)
+        if self._rvec is None:
+            ok, rvec, tvec = cv2.solvePnP(self.model_points, pose_points, self.camera_matrix, self.dist_coeffs)
+        else:
+            ok, rvec, tvec = cv2.solvePnP(self.model_points, pose_points, self.camera_matrix, self.dist_coeffs,
+                                          self._rvec, self._tvec, useExtrinsicGuess=True)
+        if not ok:
+            self.reset()
+            return None
+        self._rvec, self._tvec = rvec, tvec
+        pitch, yaw = pitch_yaw(rvec)
+        return self._smooth(self._pitch_filter, t, pitch), self._smooth(self._yaw_filter, t, yaw)
+
+    @staticmethod
+    def _smooth(angle_filter, t, angle):
+        previous = getattr(angle_filter, "value", None)
+        if previous is not None:
+            # Nearest equivalent of `angle` to the filter state
+            angle = previous + _wrap(angle - previous)
+        return _wrap(angle_filter(t, angle))
+
+
+def is_distracted(pitch, yaw, pitch_limit=-20.0, yaw_limit=35.0):
+    """Looking down past `pitch_limit` or sideways past `yaw_limit` degrees."""
+    return pitch < pitch_limit or abs(yaw) > yaw_limit
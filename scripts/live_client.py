@@ -0,0 +1,65 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from collections import deque
+
+
+class LiveUploader(threading.Thread):
+    """Posts interval records to the live ingest endpoint in batches.
+
+    Records are queued by `add()` and sent every `batch_interval` seconds from
+    this thread, so a slow or unreachable server never stalls the inference
+    loop. At most `max_pending` records are buffered (oldest dropped first).
+    A failed batch is kept and re-sent; the server ignores records it has
+    already seen, so retries are safe.
+    """
+
+    def __init__(self, url, batch_interval=2.0, max_pending=600, timeout=5.0):
+        super().__init__(daemon=True)
+        self.url = url
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+        self.sent = 0
+        self.failures = 0
+        self._pending = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def add(self, record):
+        with self._lock:
+            self._pending.append(record)
+
+    def _post(self, batch):
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"records": batch}, separators=(",", ":")).encode(),
+            headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def flush(self):
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        if not batch:
+            return True
+        try:
+            self._post(batch)
+        except (urllib.error.URLError, OSError) as e:
+            with self._lock:
+                # Put the batch back in front of anything added meanwhile; the bound still applies
+                self._pending = deque(batch + list(self._pending), maxlen=self._pending.maxlen)
+            self.failures += 1
+            if self.failures == 1 or self.failures % 30 == 0:
+                print(f"[Live] Upload failed ({self.failures}x): {e}")
+            return False
+        self.sent += len(batch)
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.batch_interval):
+            self.flush()
+
+    def stop(self):
+        self._stop_event.set()
+        self.flush()
@@ -0,0 +1,176 @@
+"""Synthetic load generator: multi-user emotion logs at production scale.
+
+Each user gets a `duration_s` session sampled at `rate_hz`:
+
+* emotions: a mood (dominant emotion, mostly neutral or happy) lasts an
+  exponentially distributed ~`mood_dwell_s` seconds before switching; each
+  sample's 7-score vector is drawn from a Dirichlet around that mood, so the
+  scores are noisy but sum to 1 like FER's;
+* head pose: pitch and yaw wander around the user's resting pose (smoothed
+  noise) with occasional look-down and look-away episodes, and `distracted`
+  comes from head_pose.is_distracted as in the logger.
+
+Records follow the logger / Host.py schema (string timestamp, user,
+distracted, pitch, yaw, scores); schema="top_emotions" writes the older top-3
+layout instead. Formats: "jsonl" (one log per user, what Host.py merges),
+"json" (legacy JSON arrays), "csv" (the columnar_store CSV layout) and
+"store" (one columnar store with every user), each in its own subfolder.
+
+Usage: python loadgen.py out_dir [--users 200] [--duration 3600] [--rate 1] [--format jsonl --format csv]
+"""
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+from session_log import EMOTION_ORDER
+from head_pose import is_distracted
+from columnar_store import write_store, write_csv
+
+FORMATS = ("jsonl", "json", "csv", "store")
+# How often each emotion is the mood of a stretch of the session
+MOOD_WEIGHTS = {"angry": 0.04, "disgust": 0.02, "fear": 0.04, "happy": 0.25,
+                "sad": 0.1, "surprise": 0.1, "neutral": 0.45}
+MOOD_SHARE = 0.55          # expected score of the mood emotion; the rest follows MOOD_WEIGHTS
+CONCENTRATION = 30.0       # Dirichlet concentration: higher = less frame-to-frame noise
+
+
+def _smoothed_noise(rng, n, scale, span):
+    """Zero-mean noise with ~`span`-sample correlation and std ~`scale`."""
+    kernel = np.exp(-np.arange(int(4 * span) + 1) / span)
+    kernel /= np.sqrt((kernel ** 2).sum())
+    return np.convolve(rng.normal(0, scale, n + len(kernel) - 1), kernel, mode="valid")
+
+
+def _episodes(rng, n, rate_hz, every_s, min_s, max_s, offset):
+    """Step signal: `offset` during random episodes, ~one every `every_s` seconds."""
+    signal = np.zeros(n)
+    for _ in range(rng.poisson(n / rate_hz / every_s)):
+        start = rng.integers(0, n)
+        length = int(rng.uniform(min_s, max_s) * rate_hz)
+        signal[start:start + length] = offset() if callable(offset) else offset
+    return signal
+
+
+def _mood_profiles():
+    weights = np.array([MOOD_WEIGHTS[e] for e in EMOTION_ORDER])
+    background = weights / weights.sum()
+    return np.array([MOOD_SHARE * np.eye(len(EMOTION_ORDER))[i] + (1 - MOOD_SHARE) * background
+                     for i in range(len(EMOTION_ORDER))]), background
+
+
+def session_records(user, duration_s=600, rate_hz=1.0, start=None, seed=0, schema="scores", mood_dwell_s=20.0):
+    """One user's records (list of dicts), oldest first."""
+    rng = np.random.default_rng(seed)
+    n = int(duration_s * rate_hz)
+    if n <= 0:
+        return []
+    start = time.time() - duration_s if start is None else start
+
+    # Mood stretches -> per-sample Dirichlet score vectors
+    profiles, background = _mood_profiles()
+    lengths = []
+    while sum(lengths) < n:
+        lengths.append(max(1, int(rng.exponential(mood_dwell_s * rate_hz))))
+    moods = np.repeat(rng.choice(len(EMOTION_ORDER), size=len(lengths), p=background), lengths)[:n]
+    scores = rng.gamma(profiles[moods] * CONCENTRATION)
+    scores /= scores.sum(axis=1, keepdims=True)
+
+    # Head pose around a per-user resting position
+    pitch = (rng.normal(-8, 4) + _smoothed_noise(rng, n, 3.0, 3 * rate_hz)
+             + _episodes(rng, n, rate_hz, 120, 3, 15, lambda: rng.uniform(-35, -15)))
+    yaw = (rng.normal(0, 6) + _smoothed_noise(rng, n, 4.0, 3 * rate_hz)
+           + _episodes(rng, n, rate_hz, 180, 2, 8, lambda: rng.choice([-1, 1]) * rng.uniform(30, 60)))
+
+    # Local wall-clock timestamps with a little capture jitter
+    offsets_ms = np.round((np.arange(n) / rate_hz + rng.uniform(0, 0.02, n)) * 1000).astype("timedelta64[ms]")
+    times = np.datetime64(datetime.fromtimestamp(start), "ms") + offsets_ms
+    timestamps = [t.replace("T", " ") for t in np.datetime_as_string(times, unit="ms")]
+
+    records = []
+    for ts, p, y, row in zip(timestamps, np.round(pitch, 2).tolist(), np.round(yaw, 2).tolist(),
+                             np.round(scores, 4).tolist()):
+        record = {"timestamp": ts, "user": user, "distracted": is_distracted(p, y), "pitch": p, "yaw": y}
+        if schema == "top_emotions":
+            top = sorted(zip(EMOTION_ORDER, row), key=lambda x: x[1], reverse=True)[:3]
+            record["top_emotions"] = [{"emotion": e, "score": s} for e, s in top]
+        else:
+            record["scores"] = row
+        records.append(record)
+    return records
+
+
+def user_ids(users):
+    return [f"user{i:04d}" for i in range(users)]
+
+
+def generate(out_dir, users=10, duration_s=600, rate_hz=1.0, formats=("jsonl",), schema="scores", seed=0,
+             start=None):
+    """Write every user's session in each of `formats` under `out_dir/<format>/`.
+
+    Returns {"records": total, "paths": {format: [paths]}, "bytes": {format: total bytes}}.
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown formats: {', '.join(sorted(unknown))}")
+    start = time.time() - duration_s if start is None else start
+    paths = {fmt: [] for fmt in formats}
+    total = 0
+    for fmt in formats:
+        os.makedirs(os.path.join(out_dir, fmt), exist_ok=True)
+
+    def sessions():
+        for i, user in enumerate(user_ids(users)):
+            # Users join within the first minute
+            yield user, session_records(user, duration_s, rate_hz, start + (i * 7.3) % 60, seed + i, schema)
+
+    for user, records in sessions():
+        total += len(records)
+        base = f"emotion_data_{user}"
+        if "jsonl" in formats:
+            path = os.path.join(out_dir, "jsonl", base + ".jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+            paths["jsonl"].append(path)
+        if "json" in formats:
+            path = os.path.join(out_dir, "json", base + ".json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=4)
+            paths["json"].append(path)
+        if "csv" in formats:
+            path = os.path.join(out_dir, "csv", base + ".csv")
+            write_csv(records, path)
+            paths["csv"].append(path)
+    if "store" in formats:
+        # Sessions are regenerated (same seeds) rather than held in memory for the store
+        path = os.path.join(out_dir, "store")
+        write_store(path, (r for _, records in sessions() for r in records))
+        paths["store"].append(path)
+
+    sizes = {fmt: sum(_disk_size(p) for p in fmt_paths) for fmt, fmt_paths in paths.items()}
+    return {"records": total, "paths": paths, "bytes": sizes}
+
+
+def _disk_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=600, help="session length in seconds")
+    parser.add_argument("--rate", type=float, default=1.0, help="records per second per user")
+    parser.add_argument("--format", action="append", choices=FORMATS,
+                        help="repeat for several formats (default: jsonl)")
+    parser.add_argument("--schema", choices=("scores", "top_emotions"), default="scores")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = generate(args.out_dir, args.users, args.duration, args.rate, tuple(args.format or ("jsonl",)),
+                      args.schema, args.seed)
+    sizes = ", ".join(f"{fmt} {size / 1e6:.1f} MB" for fmt, size in result["bytes"].items())
+    print(f"✅ {result['records']:,} records for {args.users} users written to {args.out_dir} ({sizes})")
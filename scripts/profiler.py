@@ -0,0 +1,125 @@
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds: 20 log-spaced buckets per decade from 10 µs to 10 s
+BUCKET_BOUNDS_S = [10 ** (-5 + i / 20) for i in range(121)]
+
+
+class LatencyHistogram:
+    """Fixed log-spaced latency histogram; percentiles are accurate to ~12%."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_S) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_S, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(BUCKET_BOUNDS_S[min(i, len(BUCKET_BOUNDS_S) - 1)], self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class StageProfiler:
+    """Per-stage latency histograms and event counters for the capture client.
+
+    Wrap a hot-path step in `with profiler.stage("name"):`. When the profiler
+    is disabled `stage()` hands back one shared no-op context, so leaving the
+    instrumentation in place costs a method call per stage. Counters
+    (`count()`) track events such as dropped frames.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.time()
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._noop = _NoopStage()
+
+    def stage(self, name):
+        if not self.enabled:
+            return self._noop
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        with self._lock:
+            return {
+                "elapsed_s": round(time.time() - self.started, 1),
+                "stages": {name: h.summary() for name, h in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+
+    def write(self, path):
+        """Write the summary as a JSON sidecar (e.g. next to the session log)."""
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def overlay_lines(self):
+        """Short 'stage p50/p95/p99' lines for drawing on the preview window."""
+        summary = self.summary()
+        lines = [f"{name:<12} {s['p50_ms']:6.1f} {s['p95_ms']:6.1f} {s['p99_ms']:6.1f} ms"
+                 for name, s in sorted(summary["stages"].items())]
+        lines += [f"{name}: {n}" for name, n in sorted(summary["counters"].items())]
+        return lines
+
+
+class _NoopStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# Shared disabled profiler: the default for modules that accept a `profiler`
+NULL_PROFILER = StageProfiler(enabled=False)
@@ -0,0 +1,105 @@
+import cv2
+from face_analyzer import face_box, landmark_points, POSE_LANDMARK_IDS
+from profiler import NULL_PROFILER
+
+
+def iou(a, b):
+    """Intersection-over-union of two (x, y, w, h) boxes."""
+    ax1, ay1, bx1, by1 = a[0] + a[2], a[1] + a[3], b[0] + b[2], b[1] + b[3]
+    iw = max(0, min(ax1, bx1) - max(a[0], b[0]))
+    ih = max(0, min(ay1, by1) - max(a[1], b[1]))
+    inter = iw * ih
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """Assigns stable integer track IDs to face boxes across frames.
+
+    Boxes are matched greedily to existing tracks by IoU; unmatched boxes start
+    new tracks and tracks unseen for more than `max_missed` frames are dropped.
+    The IDs dropped by the latest `update()` are in `dropped`.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=15):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = {}  # track_id -> [box, frames_missed]
+        self.dropped = []
+        self._next_id = 1
+
+    def update(self, boxes):
+        pairs = sorted(((iou(track[0], box), track_id, i)
+                        for track_id, track in self.tracks.items()
+                        for i, box in enumerate(boxes)), reverse=True)
+        ids = [None] * len(boxes)
+        matched = set()
+        for score, track_id, i in pairs:
+            if score < self.iou_threshold:
+                break
+            if track_id in matched or ids[i] is not None:
+                continue
+            ids[i] = track_id
+            matched.add(track_id)
+
+        for i, box in enumerate(boxes):
+            if ids[i] is None:
+                ids[i] = self._next_id
+                self._next_id += 1
+            self.tracks[ids[i]] = [box, 0]
+
+        self.dropped = []
+        for track_id in list(self.tracks):
+            if track_id in ids:
+                continue
+            self.tracks[track_id][1] += 1
+            if self.tracks[track_id][1] > self.max_missed:
+                del self.tracks[track_id]
+                self.dropped.append(track_id)
+        return ids
+
+
+class RoomAnalyzer:
+    """Multi-face analysis for one room camera.
+
+    FaceMesh (created with `max_num_faces=N`) finds every face, FaceTracker
+    gives each one a stable ID, and all face boxes go through FER in a single
+    `detect_emotions(frame, face_rectangles=boxes)` call, which classifies the
+    crops as one batched tensor.
+
+    `analyze(frame)` returns a list of dicts with `track_id`, `box`,
+    `emotions` and `pose_points`, one per visible face.
+    """
+
+    def __init__(self, detector, face_mesh, tracker=None, margin=0.15, profiler=NULL_PROFILER):
+        self.detector = detector
+        self.profiler = profiler
+        self.face_mesh = face_mesh
+        self.tracker = tracker or FaceTracker()
+        self.margin = margin
+
+    def analyze(self, frame):
+        h, w, _ = frame.shape
+        with self.profiler.stage("cvtColor"):
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with self.profiler.stage("face_mesh"):
+            mesh_results = self.face_mesh.process(rgb)
+        if not mesh_results.multi_face_landmarks:
+            self.tracker.update([])
+            return []
+
+        points = [landmark_points(face, w, h) for face in mesh_results.multi_face_landmarks]
+        boxes = [face_box(p, w, h, self.margin) for p in points]
+        track_ids = self.tracker.update(boxes)
+
+        # One batched classifier call for every face in the frame
+        with self.profiler.stage("detect_emotions"):
+            emotion_results = self.detector.detect_emotions(frame, face_rectangles=boxes)
+        emotions_by_box = {tuple(r["box"]): r["emotions"] for r in emotion_results}
+
+        return [{
+            "track_id": track_id,
+            "box": box,
+            "emotions": emotions_by_box.get(tuple(box)),
+            "pose_points": p[:len(POSE_LANDMARK_IDS)],
+        } for track_id, box, p in zip(track_ids, boxes, points)]
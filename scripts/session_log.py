@@ -0,0 +1,374 @@
+import os
+import json
+import time
+import heapq
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+
+# Local-time timestamps written by IntervalRecorder
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# Fixed order of the per-interval "scores" vector (FER's label order)
+EMOTION_ORDER = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+
+class SessionLog:
+    """Append-only, line-delimited (JSONL) session log.
+
+    Each record is written as one JSON object per line, so the cost of a write
+    does not depend on how long the session has been running. Writes are
+    buffered and flushed every `flush_interval` seconds; the file is fsync'd to
+    disk every `fsync_interval` seconds and on close.
+    """
+
+    def __init__(self, path, flush_interval=1.0, fsync_interval=10.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self._f = open(path, "a", encoding="utf-8")
+        self._last_flush = self._last_fsync = time.time()
+
+    def append(self, record):
+        self._f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        now = time.time()
+        if now - self._last_fsync >= self.fsync_interval:
+            self.sync()
+        elif now - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._f.flush()
+        self._last_flush = time.time()
+
+    def sync(self):
+        self.flush()
+        os.fsync(self._f.fileno())
+        self._last_fsync = self._last_flush
+
+    def close(self):
+        if self._f.closed:
+            return
+        self.sync()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class IntervalRecorder:
+    """Averages per-frame emotion scores over `interval` seconds for one user.
+
+    `add()` is called once per analyzed frame. When `interval` seconds have
+    passed since the last record, the mean scores of every frame with a face
+    in that interval are appended to `log` as a 7-float "scores" vector in
+    EMOTION_ORDER. Frames are summed into a preallocated accumulator, so
+    nothing grows with the frame rate. Intervals without any detected face
+    are not logged.
+
+    Pitch and yaw are averaged over the frames that had a head pose (and left
+    out of the record when none had), and the interval counts as distracted
+    when at least `distracted_fraction` of them were flagged, rather than
+    whatever the last frame happened to show.
+    """
+
+    def __init__(self, log, user, interval=1.0, start_time=None, distracted_fraction=0.5):
+        self.log = log
+        self.user = user
+        self.interval = interval
+        self.distracted_fraction = distracted_fraction
+        self.last_update_time = time.time() if start_time is None else start_time
+        self._sums = np.zeros(len(EMOTION_ORDER))
+        self._frames = 0
+        self._pose = np.zeros(3)   # pitch sum, yaw sum, distracted frames
+        self._pose_frames = 0
+        self._last_frame_time = None
+
+    def add(self, frame_time, emotions, pitch=None, distracted=False, yaw=None):
+        if emotions:
+            self._sums += np.fromiter((emotions[k] for k in EMOTION_ORDER), float, len(EMOTION_ORDER))
+            self._frames += 1
+        if pitch is not None:
+            self._pose += (pitch, yaw or 0.0, bool(distracted))
+            self._pose_frames += 1
+        self._last_frame_time = frame_time
+
+        if frame_time - self.last_update_time < self.interval:
+            return None
+        self.last_update_time = frame_time
+        return self._emit(frame_time)
+
+    def flush(self):
+        """Log the partial interval collected so far (e.g. when the tracked face leaves)."""
+        if self._last_frame_time is None:
+            return None
+        return self._emit(self._last_frame_time)
+
+    def _emit(self, frame_time):
+        frames, pose_frames = self._frames, self._pose_frames
+        scores = self._sums / max(1, frames)
+        pitch_mean, yaw_mean, distracted_share = self._pose / max(1, pose_frames)
+        # Reset for the next interval, whether or not this one is logged
+        self._sums.fill(0.0)
+        self._frames = 0
+        self._pose.fill(0.0)
+        self._pose_frames = 0
+        # Only log if we successfully captured emotions in this interval
+        if not frames:
+            return None
+
+        record = {
+            "timestamp": datetime.fromtimestamp(frame_time).strftime(TIMESTAMP_FORMAT)[:-3],
+            "user": self.user,
+            "distracted": bool(pose_frames and distracted_share >= self.distracted_fraction),
+            "scores": np.round(scores, 4).tolist(),
+        }
+        if pose_frames:
+            # Left out otherwise, so a missing pose is not mistaken for looking straight ahead
+            record["pitch"] = round(float(pitch_mean), 2)
+            record["yaw"] = round(float(yaw_mean), 2)
+        self.log.append(record)
+        return record
+
+
+def migrate_legacy_log(json_path, jsonl_path):
+    """One-time conversion of an old JSON-array log into JSONL.
+
+    The original file is kept as `<name>.json.migrated` so it is no longer
+    picked up by `*.json` globs but can still be inspected.
+    """
+    if not os.path.exists(json_path) or os.path.exists(jsonl_path):
+        return False
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            data = []
+    if not isinstance(data, list):
+        data = [data]
+
+    tmp_path = jsonl_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in data:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, jsonl_path)
+    os.replace(json_path, json_path + ".migrated")
+    print(f"[Log] Migrated {len(data)} records from {json_path} to {jsonl_path}")
+    return True
+
+
+def record_time_sec(record):
+    """Return a record's timestamp in epoch seconds.
+
+    Mock client data stores epoch milliseconds; emotion_logger.py stores a
+    local "%Y-%m-%d %H:%M:%S.%f" string.
+    """
+    ts = record['timestamp']
+    if isinstance(ts, str):
+        return datetime.strptime(ts, TIMESTAMP_FORMAT).timestamp()
+    return ts / 1000.0
+
+def record_emotion(record):
+    """Return the dominant emotion of a record in any client schema."""
+    if 'emotion' in record:
+        return record['emotion']
+    if 'scores' in record:
+        scores = record['scores']
+        return EMOTION_ORDER[scores.index(max(scores))]
+    return record['top_emotions'][0]['emotion']
+
+def record_scores(record):
+    """A record's scores as a list in EMOTION_ORDER.
+
+    Older top-3 records only know three scores; the rest are NaN. Mock
+    records with a bare "emotion" get 1.0 for it and NaN elsewhere.
+    """
+    if 'scores' in record:
+        return record['scores']
+    scores = [float("nan")] * len(EMOTION_ORDER)
+    top = record.get('top_emotions') or [{"emotion": record['emotion'], "score": 1.0}]
+    for entry in top:
+        if entry['emotion'] in EMOTION_ORDER:
+            scores[EMOTION_ORDER.index(entry['emotion'])] = entry['score']
+    return scores
+
+
+def iter_records(path):
+    """Stream records from a JSONL log (or a legacy JSON-array file).
+
+    A partially written last line (e.g. after a crash) is skipped rather than
+    aborting the whole read.
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield from (data if isinstance(data, list) else [data])
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+WATERMARK_TAIL_BYTES = 4096
+
+def _tail_sha256(f, offset, size=WATERMARK_TAIL_BYTES):
+    start = max(0, offset - size)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+class LogCursor:
+    """Reads only what was appended to a log since a stored watermark.
+
+    A watermark is {"offset", "mtime", "size", "tail_sha256"}: the byte offset
+    just past the last complete line consumed, the file's mtime and size at
+    that point, and a hash of the bytes just before the offset. If the file
+    shrank or those bytes changed, it was rewritten (e.g. by a git rebase),
+    `reset` is set and reading starts again from byte 0. Legacy .json array
+    files cannot be appended to, so any change to one is a reset.
+
+    Iterate `records()` to the end, then store `watermark()` for the next run.
+    """
+
+    def __init__(self, path, watermark=None):
+        self.path = path
+        self.offset = 0
+        self.reset = False
+        if watermark is None:
+            return
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime) == (watermark["size"], watermark["mtime"]):
+            self.offset = watermark["offset"]
+        elif not path.endswith(".json") and st.st_size >= watermark["offset"]:
+            with open(path, "rb") as f:
+                if _tail_sha256(f, watermark["offset"]) == watermark["tail_sha256"]:
+                    self.offset = watermark["offset"]
+        self.reset = self.offset == 0 and watermark["offset"] > 0
+
+    def records(self):
+        if self.path.endswith(".json"):
+            size = os.path.getsize(self.path)
+            if self.offset < size:
+                yield from iter_records(self.path)
+                self.offset = size
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written; picked up on the next run
+                self.offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def watermark(self):
+        with open(self.path, "rb") as f:
+            tail = _tail_sha256(f, self.offset)
+            st = os.fstat(f.fileno())
+        return {"offset": self.offset, "mtime": st.st_mtime, "size": st.st_size, "tail_sha256": tail}
+
+
+# SortedMerge bounds: records buffered per input to undo local disorder, and
+# recently merged (user, timestamp) keys remembered for deduplication
+MERGE_REORDER_WINDOW = 256
+MERGE_DEDUPE_KEYS = 100_000
+
+def merge_key(record):
+    """Sort key of a record in merged output: (epoch seconds, user)."""
+    return record_time_sec(record), str(record.get("user", ""))
+
+def _reordered(records, window):
+    """(key, seq, record) in key order, for input that is sorted up to `window` records of disorder."""
+    heap = []
+    for seq, record in enumerate(records):
+        try:
+            key = merge_key(record)
+        except (KeyError, TypeError, ValueError):
+            continue  # no usable timestamp
+        heapq.heappush(heap, (key, seq, record))
+        if len(heap) > window:
+            yield heapq.heappop(heap)
+    while heap:
+        yield heapq.heappop(heap)
+
+
+class SortedMerge:
+    """Streaming k-way merge of record streams by (timestamp, user).
+
+    Each input (e.g. one user's log) is expected to be roughly time-ordered:
+    a heap of `window` records per input undoes local disorder, and a heap
+    over the inputs yields the globally earliest record next, so memory is
+    bounded by `window` records per input whatever the total size. Records
+    displaced further than that are still yielded (counted in `out_of_order`).
+
+    A (user, timestamp) pair seen within the last `dedupe_keys` records is
+    dropped as a duplicate (counted in `duplicates`), e.g. lines committed
+    twice by a retried git rebase. `last_key` is the largest merge_key()
+    yielded so far.
+    """
+
+    def __init__(self, streams, window=MERGE_REORDER_WINDOW, dedupe_keys=MERGE_DEDUPE_KEYS):
+        self.streams = list(streams)
+        self.window = window
+        self.dedupe_keys = dedupe_keys
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.last_key = None
+
+    def __iter__(self):
+        inputs = [((key, i, seq, record) for key, seq, record in _reordered(stream, self.window))
+                  for i, stream in enumerate(self.streams)]
+        recent = OrderedDict()
+        for key, _, _, record in heapq.merge(*inputs):
+            identity = (record.get("user"), record["timestamp"])
+            if identity in recent:
+                self.duplicates += 1
+                continue
+            recent[identity] = None
+            if len(recent) > self.dedupe_keys:
+                recent.popitem(last=False)
+            if self.last_key is not None and key < self.last_key:
+                self.out_of_order += 1
+            else:
+                self.last_key = key
+            yield record
+
+
+def read_score_matrix(path):
+    """Load a log as arrays for vectorized analysis.
+
+    Returns a dict of `timestamp` (epoch seconds, float64), `scores`
+    (N x 7 float32, columns in EMOTION_ORDER), `pitch` (float32, NaN when not
+    recorded) and `distracted` (bool).
+    """
+    timestamp, scores, pitch, distracted = [], [], [], []
+    for record in iter_records(path):
+        timestamp.append(record_time_sec(record))
+        scores.append(record_scores(record))
+        pitch.append(record.get("pitch", np.nan))
+        distracted.append(bool(record.get("distracted", False)))
+    return {
+        "timestamp": np.array(timestamp, dtype=np.float64),
+        "scores": np.array(scores, dtype=np.float32).reshape(len(timestamp), len(EMOTION_ORDER)),
+        "pitch": np.array(pitch, dtype=np.float32),
+        "distracted": np.array(distracted, dtype=bool),
+    }
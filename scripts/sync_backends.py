@@ -0,0 +1,174 @@
+import os
+import gzip
+import json
+import time
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import datetime
+from session_log import LogCursor
+
+
+class SyncBackend:
+    """Uploads a client's session logs to wherever the host collects them.
+
+    `upload(paths)` does the work and returns True on success;
+    `upload_async(paths)` runs it on a background thread so the logger can
+    exit its render loop immediately.
+    """
+
+    name = "base"
+
+    def upload(self, paths):
+        raise NotImplementedError
+
+    def upload_async(self, paths):
+        thread = threading.Thread(target=self.upload, args=(list(paths),))
+        thread.start()
+        return thread
+
+
+class GitSyncBackend(SyncBackend):
+    """Commits the data folder and pushes it to a shared GitHub repo (the original flow)."""
+
+    name = "git"
+
+    def __init__(self, token, user, repo, data_folder, user_id):
+        self.token, self.user, self.repo = token, user, repo
+        self.data_folder = data_folder
+        self.user_id = user_id
+
+    def upload(self, paths):
+        if not all([self.token, self.user, self.repo]):
+            print("[Git] Error: Missing .env credentials.")
+            return False
+
+        remote_url = f"https://{self.token}@github.com/{self.user}/{self.repo}.git"
+        try:
+            # Update remote with token for seamless push
+            subprocess.run(["git", "remote", "set-url", "origin", remote_url], check=True)
+            subprocess.run(["git", "add", self.data_folder], check=True)
+            msg = f"Update {self.user_id}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            subprocess.run(["git", "commit", "-m", msg], check=True)
+
+            # Rebase ensures we don't have merge conflicts with other users' files
+            subprocess.run(["git", "pull", "--rebase", "origin", "main"], check=True)
+            subprocess.run(["git", "push", "origin", "main"], check=True)
+            print(f"[Git] Successfully pushed data for {self.user_id}")
+            return True
+        except Exception as e:
+            print(f"[Git] Sync failed: {e}")
+            return False
+
+
+class HttpSyncBackend(SyncBackend):
+    """Sends log records straight to the host's /sync/batches endpoint.
+
+    Each log is read from its last uploaded watermark (see LogCursor) and
+    sent in gzip-compressed batches of up to `batch_size` records, with the
+    shared `token` as a bearer token. Each batch carries the byte offset of
+    its first record, and the server keys batches by (user, file, offset), so
+    a retried or resumed batch that already arrived is acknowledged without
+    being stored twice (Idempotency-Key carries the same key). The
+    watermark is saved in `state_path` after every acknowledged batch, so an
+    interrupted upload resumes where it stopped. Failed requests are retried
+    with exponential backoff.
+    """
+
+    name = "http"
+
+    def __init__(self, url, user_id, state_path, token, batch_size=5000, retries=5, backoff_s=0.5, timeout=30.0):
+        self.url = url
+        self.user_id = user_id
+        self.state_path = state_path
+        self.token = token
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.timeout = timeout
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _send(self, source, offset, records, reset):
+        body = gzip.compress(json.dumps(
+            {"user": self.user_id, "source": source, "offset": offset, "reset": reset, "records": records},
+            separators=(",", ":")).encode())
+        request = urllib.request.Request(self.url, data=body, method="POST", headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Authorization": f"Bearer {self.token}",
+            "Idempotency-Key": f"{self.user_id}/{source}/{offset}",
+        })
+        for attempt in range(self.retries + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.load(response)
+            except urllib.error.HTTPError as e:
+                if e.code < 500 and e.code != 429:
+                    raise
+                error = e
+            except (urllib.error.URLError, OSError) as e:
+                error = e
+            if attempt < self.retries:
+                time.sleep(self.backoff_s * 2 ** attempt)
+        raise error
+
+    def _upload_file(self, path, state):
+        source = os.path.basename(path)
+        cursor = LogCursor(path, state.get(source))
+        # A rewritten log replaces what the server holds for it
+        reset = cursor.reset
+        batch = []
+        sent = 0
+        offset = cursor.offset   # where the batch being filled starts in the log
+        for record in cursor.records():
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._send(source, offset, batch, reset)
+                sent += len(batch)
+                batch, reset = [], False
+                offset = cursor.offset
+                state[source] = cursor.watermark()
+                self._save_state(state)
+        if batch or reset:
+            self._send(source, offset, batch, reset)
+            sent += len(batch)
+        state[source] = cursor.watermark()
+        self._save_state(state)
+        return sent
+
+    def upload(self, paths):
+        start = time.perf_counter()
+        state = self._load_state()
+        try:
+            sent = sum(self._upload_file(path, state) for path in paths)
+        except Exception as e:
+            print(f"[Sync] Upload failed, will resume from the last acknowledged batch: {e}")
+            return False
+        print(f"[Sync] Uploaded {sent} records for {self.user_id} in {time.perf_counter() - start:.2f}s")
+        return True
+
+
+def get_sync_backend(data_folder, user_id, backend=None):
+    """SYNC_BACKEND=git (default) pushes to GitHub; SYNC_BACKEND=http posts to SYNC_URL with SYNC_TOKEN."""
+    backend = backend or os.getenv("SYNC_BACKEND", "git")
+    if backend == "http":
+        url = os.getenv("SYNC_URL", "http://localhost:5000/sync/batches")
+        return HttpSyncBackend(url, user_id, os.path.join(data_folder, f".sync_state_{user_id}.json"),
+                               os.getenv("SYNC_TOKEN"))
+    if backend == "git":
+        return GitSyncBackend(os.getenv("GITHUB_TOKEN"), os.getenv("GITHUB_USER"), os.getenv("GITHUB_REPO"),
+                              data_folder, user_id)
+    raise ValueError(f"Unknown SYNC_BACKEND: {backend}")
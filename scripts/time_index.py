@@ -0,0 +1,329 @@
+"""Sidecar time index over the merged master JSONL, for range queries without a full parse.
+
+The master file (Host.py) is in (timestamp, user) order, so the index only
+keeps one entry per block of BLOCK_ROWS rows: its byte offset, first row
+number and min/max time. A time range maps to a run of blocks found by
+bisection, and only those bytes are read. Sessions (one user's records with
+no gap longer than SESSION_GAP_S) are indexed with their time span, row count
+and block range, so "this user's session" or "the minute around a flag" is a
+short seek + scan.
+
+The index is written next to the master as `<master>.index.json` and is
+extended incrementally: a LogCursor watermark on the master tells whether it
+was only appended to (index the new lines) or rewritten (re-index). A merge
+that rewrites only the master's tail calls rewind_index() first, so only the
+rewritten rows are indexed again.
+
+Usage: python time_index.py master_emotion_data.jsonl [--sessions] [--start T --end T --user U]
+"""
+import os
+import json
+import bisect
+import argparse
+import numpy as np
+from session_log import LogCursor, record_time_sec, record_scores, EMOTION_ORDER
+
+INDEX_VERSION = 1
+BLOCK_ROWS = 1024
+SESSION_GAP_S = 300   # a longer silence from a user starts a new session
+
+
+def index_path(master_path):
+    return master_path + ".index.json"
+
+
+def _empty_index(block_rows, session_gap_s):
+    return {
+        "version": INDEX_VERSION,
+        "block_rows": block_rows,
+        "session_gap_s": session_gap_s,
+        "rows": 0,
+        "blocks": {"offset": [], "row": [], "min": [], "max": []},
+        "sessions": [],
+        "watermark": None,
+    }
+
+
+def _load_index(master_path, block_rows=BLOCK_ROWS, session_gap_s=SESSION_GAP_S):
+    path = index_path(master_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        index = json.load(f)
+    if (index.get("version"), index.get("block_rows"), index.get("session_gap_s")) != \
+            (INDEX_VERSION, block_rows, session_gap_s):
+        return None
+    return index
+
+
+def _save_index(master_path, index):
+    path = index_path(master_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def update_index(master_path, block_rows=BLOCK_ROWS, session_gap_s=SESSION_GAP_S):
+    """Build or extend the sidecar index of `master_path`; returns the index dict."""
+    index = _load_index(master_path, block_rows, session_gap_s)
+    cursor = LogCursor(master_path, index and index["watermark"])
+    if index is None or cursor.reset:
+        index = _empty_index(block_rows, session_gap_s)
+        cursor = LogCursor(master_path)
+
+    blocks, sessions = index["blocks"], index["sessions"]
+    open_sessions = {}   # user -> index of their latest session
+    per_user = {}
+    for i, session in enumerate(sessions):
+        open_sessions[session["user"]] = i
+        per_user[session["user"]] = per_user.get(session["user"], 0) + 1
+
+    rows = index["rows"]
+    line_start = cursor.offset
+    for record in cursor.records():
+        try:
+            t = record_time_sec(record)
+        except (KeyError, TypeError, ValueError):
+            line_start = cursor.offset
+            continue
+        if rows % block_rows == 0:
+            blocks["offset"].append(line_start)
+            blocks["row"].append(rows)
+            blocks["min"].append(t)
+            blocks["max"].append(t)
+        else:
+            blocks["min"][-1] = min(blocks["min"][-1], t)
+            blocks["max"][-1] = max(blocks["max"][-1], t)
+        block = len(blocks["offset"]) - 1
+
+        user = record.get("user")
+        current = open_sessions.get(user)
+        session = sessions[current] if current is not None else None
+        if session is None or t - session["end"] > session_gap_s:
+            per_user[user] = per_user.get(user, 0) + 1
+            session = {"id": f"{user}#{per_user[user]}", "user": user, "start": t, "end": t,
+                       "rows": 0, "blocks": [block, block]}
+            open_sessions[user] = len(sessions)
+            sessions.append(session)
+        session["start"] = min(session["start"], t)
+        session["end"] = max(session["end"], t)
+        session["rows"] += 1
+        session["blocks"][1] = block
+
+        rows += 1
+        line_start = cursor.offset
+
+    index["rows"] = rows
+    index["watermark"] = cursor.watermark()
+    _save_index(master_path, index)
+    return index
+
+
+def _block_users(f, start, stop):
+    """(user, epoch seconds) of the records between two byte offsets of the master."""
+    f.seek(start)
+    remaining = stop - start
+    while remaining > 0:
+        line = f.readline()
+        if not line:
+            break
+        remaining -= len(line)
+        try:
+            record = json.loads(line)
+            yield record.get("user"), record_time_sec(record)
+        except (ValueError, KeyError, TypeError):
+            continue
+
+
+def rewind_index(master_path, start):
+    """Cut the index back to the first block that may hold records at or after `start`.
+
+    For a merge that is about to rewrite the master from that block on:
+    returns (byte offset, row) of the block, and the saved index then covers
+    exactly the rows before it, so the next update_index() indexes only the
+    rewritten tail. Sessions that started in the cut blocks are dropped;
+    one still open across the cut keeps only its earlier rows. Returns None,
+    leaving the index alone, if it is missing or behind the master.
+    """
+    index = _load_index(master_path)
+    if index is None or not index["watermark"] or index["watermark"]["offset"] != os.path.getsize(master_path):
+        return None
+    blocks = index["blocks"]
+    block = TimeIndex(master_path, index)._block_range(start, None)[0]
+    if block >= len(blocks["offset"]):
+        return index["watermark"]["offset"], index["rows"]
+    offset, row = blocks["offset"][block], blocks["row"][block]
+
+    kept = [s for s in index["sessions"] if s["blocks"][0] < block]
+    cut_rows = {}   # user -> their rows from the cut on, minus those of dropped sessions
+    for s in index["sessions"][len(kept):]:
+        cut_rows[s["user"]] = cut_rows.get(s["user"], 0) - s["rows"]
+    spanning = {s["user"]: s for s in kept if s["blocks"][1] >= block}
+    with open(master_path, "rb") as f:
+        for user, _ in _block_users(f, offset, index["watermark"]["offset"]):
+            cut_rows[user] = cut_rows.get(user, 0) + 1
+        # A spanning session now ends at its user's last record before the cut: scan back for it
+        unresolved = set(spanning)
+        for b in range(block - 1, -1, -1):
+            if not unresolved:
+                break
+            ends = {}
+            for user, t in _block_users(f, blocks["offset"][b], blocks["offset"][b + 1]):
+                if user in unresolved:
+                    ends[user] = max(ends.get(user, t), t)
+            for user, t in ends.items():
+                spanning[user]["end"] = t
+                spanning[user]["blocks"][1] = b
+                unresolved.discard(user)
+    for user, s in spanning.items():
+        s["rows"] -= cut_rows.get(user, 0)
+
+    for key in blocks:
+        del blocks[key][block:]
+    index["sessions"] = kept
+    index["rows"] = row
+    cursor = LogCursor(master_path)
+    cursor.offset = offset
+    index["watermark"] = cursor.watermark()
+    _save_index(master_path, index)
+    return offset, row
+
+
+class TimeIndex:
+    """Range queries over an indexed master file.
+
+    Times are epoch seconds; ranges are half-open [start, end) and either
+    bound may be None. Rows appended after the index was last updated are
+    not visible until update_index() runs again.
+    """
+
+    def __init__(self, master_path, index):
+        self.master_path = master_path
+        self.index = index
+        blocks = index["blocks"]
+        self.offsets = blocks["offset"]
+        self.rows = index["rows"]
+        # Running max of block max / trailing min of block min: both non-decreasing, so
+        # bisection stays correct even if a few rows were merged out of order
+        self._max_upto = np.maximum.accumulate(blocks["max"]).tolist() if blocks["max"] else []
+        self._min_from = np.minimum.accumulate(blocks["min"][::-1])[::-1].tolist() if blocks["min"] else []
+        self._end_offset = index["watermark"]["offset"] if index["watermark"] else 0
+
+    @classmethod
+    def open(cls, master_path):
+        with open(index_path(master_path), "r") as f:
+            return cls(master_path, json.load(f))
+
+    def sessions(self, user=None, start=None, end=None):
+        """Session summaries (id, user, start, end, rows, blocks) overlapping the range."""
+        return [s for s in self.index["sessions"]
+                if (user is None or s["user"] == user)
+                and (start is None or s["end"] >= start) and (end is None or s["start"] < end)]
+
+    def session(self, session_id):
+        for session in self.index["sessions"]:
+            if session["id"] == session_id:
+                return session
+        raise KeyError(session_id)
+
+    def _block_range(self, start, end):
+        first = bisect.bisect_left(self._max_upto, start) if start is not None else 0
+        last = bisect.bisect_left(self._min_from, end) - 1 if end is not None else len(self.offsets) - 1
+        return first, last
+
+    def slice(self, start=None, end=None, user=None, session=None, limit=None):
+        """Yield the records in [start, end), optionally of one user or session, in file order."""
+        first, last = self._block_range(start, end)
+        if session is not None:
+            s = self.session(session)
+            user = s["user"]
+            start = s["start"] if start is None else max(start, s["start"])
+            end = s["end"] + 1e-6 if end is None else min(end, s["end"] + 1e-6)
+            first, last = max(first, s["blocks"][0]), min(last, s["blocks"][1])
+        if first > last:
+            return
+        stop = self.offsets[last + 1] if last + 1 < len(self.offsets) else self._end_offset
+        produced = 0
+        with open(self.master_path, "rb") as f:
+            f.seek(self.offsets[first])
+            remaining = stop - self.offsets[first]
+            while remaining > 0:
+                line = f.readline()
+                if not line:
+                    break
+                remaining -= len(line)
+                try:
+                    record = json.loads(line)
+                    t = record_time_sec(record)
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if (start is not None and t < start) or (end is not None and t >= end):
+                    continue
+                if user is not None and record.get("user") != user:
+                    continue
+                if limit is not None and produced >= limit:
+                    return
+                yield record
+                produced += 1
+
+    def series(self, step, start=None, end=None, user=None, session=None):
+        """Downsampled columns over `step`-second buckets of the slice.
+
+        Returns {"step", "t" (bucket start), "count", "scores" (mean vector in
+        EMOTION_ORDER), "dominant", "pitch" (mean, None if not recorded),
+        "distracted" (share)}; empty buckets are left out.
+        """
+        buckets = {}
+        for record in self.slice(start, end, user, session):
+            key = int(record_time_sec(record) // step)
+            b = buckets.get(key)
+            if b is None:
+                b = buckets[key] = {
+                    "n": 0, "scores": np.zeros(len(EMOTION_ORDER)), "scored": np.zeros(len(EMOTION_ORDER)),
+                    "pitch": 0.0, "pitched": 0, "distracted": 0}
+            b["n"] += 1
+            scores = np.array(record_scores(record), dtype=float)
+            known = ~np.isnan(scores)
+            b["scores"][known] += scores[known]
+            b["scored"] += known
+            if record.get("pitch") is not None:
+                b["pitch"] += record["pitch"]
+                b["pitched"] += 1
+            b["distracted"] += bool(record.get("distracted"))
+
+        series = {"step": step, "t": [], "count": [], "scores": [], "dominant": [], "pitch": [], "distracted": []}
+        for key in sorted(buckets):
+            b = buckets[key]
+            means = np.where(b["scored"] > 0, b["scores"] / np.maximum(b["scored"], 1), 0.0)
+            series["t"].append(key * step)
+            series["count"].append(b["n"])
+            series["scores"].append(np.round(means, 4).tolist())
+            series["dominant"].append(EMOTION_ORDER[int(np.argmax(means))])
+            series["pitch"].append(round(b["pitch"] / b["pitched"], 2) if b["pitched"] else None)
+            series["distracted"].append(round(b["distracted"] / b["n"], 4))
+        return series
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("master")
+    parser.add_argument("--sessions", action="store_true", help="list the indexed sessions")
+    parser.add_argument("--start", type=float, help="epoch seconds")
+    parser.add_argument("--end", type=float, help="epoch seconds")
+    parser.add_argument("--user")
+    parser.add_argument("--step", type=float, help="print a downsampled series instead of records")
+    args = parser.parse_args()
+
+    index = update_index(args.master)
+    print(f"✅ Indexed {index['rows']} rows in {len(index['blocks']['offset'])} blocks, "
+          f"{len(index['sessions'])} sessions", flush=True)
+    time_index = TimeIndex(args.master, index)
+    if args.sessions:
+        for s in time_index.sessions(args.user, args.start, args.end):
+            print(json.dumps(s))
+    elif args.step:
+        print(json.dumps(time_index.series(args.step, args.start, args.end, args.user)))
+    elif args.start is not None or args.end is not None or args.user:
+        for record in time_index.slice(args.start, args.end, args.user):
+            print(json.dumps(record, separators=(",", ":")))
@@ -1,5 +1,8 @@
 import { TimeseriesItem, Flag, SessionMetrics, Emotion } from '../types';
 
+// Order of the logger's per-interval "scores" vector (EMOTION_ORDER in scripts/session_log.py)
+const SCORE_ORDER = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral'];
+
 export const processRealData = (rawData: any[]): TimeseriesItem[] => {
   if (!rawData || rawData.length === 0) return [];
 
@@ -26,7 +29,10 @@ export const processRealData = (rawData: any[]): TimeseriesItem[] => {
       happy: 0, neutral: 0, sad: 0, anger: 0, fear: 0, surprise: 0, disgust: 0
     };
 
-    item.top_emotions.forEach((e: any) => {
+    const scored = item.scores
+      ? item.scores.map((score: number, i: number) => ({ emotion: SCORE_ORDER[i], score }))
+      : item.top_emotions;
+    scored.forEach((e: any) => {
       const key = e.emotion === 'angry' ? 'anger' : e.emotion;
       if (key in emotions) emotions[key] = e.score;
     });
@@ -1,7 +1,9 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { SessionState, Flag, FlagBlurb } from '../types';
-import { Play, Square, Video, AlertCircle, Sparkles, ChevronLeft, ChevronRight } from 'lucide-react';
+import { Play, Square, Video, AlertCircle, Sparkles, ChevronLeft, ChevronRight, Users } from 'lucide-react';
 import { generateFlagBlurb } from '../services/geminiService';
+import { submitAnalysis, pollAnalysis, cancelAnalysis } from '../services/analysisService';
+import { subscribeLive, LiveSnapshot } from '../services/liveService';
 import { generateMockTimeseries, generateMockFlags, computeSessionMetrics } from '../data/mockData';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Cell } from 'recharts';
 import { motion, AnimatePresence } from 'motion/react';
@@ -28,6 +30,20 @@ export default function Home({ session, setSession }: HomeProps) {
   const chunksRef = useRef<Blob[]>([]);
 
   const fileInputRef = useRef<HTMLInputElement>(null);
+  const [analysisProgress, setAnalysisProgress] = useState<number | null>(null);
+  const jobIdRef = useRef<string | null>(null);
+  const analysisRunRef = useRef(0);
+  const [liveSnapshot, setLiveSnapshot] = useState<LiveSnapshot | null>(null);
+
+  // Audience reactions pushed by the backend while the talk is being recorded
+  useEffect(() => {
+    if (!isRecording) return;
+    const unsubscribe = subscribeLive(setLiveSnapshot);
+    return () => {
+      unsubscribe();
+      setLiveSnapshot(null);
+    };
+  }, [isRecording]);
 
   useEffect(() => {
     const video = videoRef.current;
@@ -73,6 +89,7 @@ export default function Home({ session, setSession }: HomeProps) {
         const url = URL.createObjectURL(blob);
         
         setSession(prev => ({ ...prev, videoUrl: url }));
+        analyzeVideo(blob, () => videoRef.current?.duration || 30);
       };
 
       mediaRecorder.start();
@@ -91,27 +108,61 @@ export default function Home({ session, setSession }: HomeProps) {
       if (videoRef.current) {
         videoRef.current.srcObject = null;
       }
-      
-      // Simulate analysis complete
-      setTimeout(() => {
-        const durationVal = videoRef.current?.duration || 30;
-        const newTs = generateMockTimeseries(Math.max(10, Math.floor(durationVal)));
-        const newFlags = generateMockFlags(newTs);
-        const newMetrics = computeSessionMetrics(newTs);
-        
-        setSession(prev => ({
-          ...prev,
-          timeseries: newTs,
-          flags: newFlags,
-          sessionMetrics: newMetrics,
-          flagBlurbs: {},
-          fullSummary: null
-        }));
-        
-        if (newFlags.length > 0) {
-          setSelectedFlag(newFlags[0]);
-        }
-      }, 1000); // Increased timeout to ensure onstop finishes
+    }
+  };
+
+  // Sends the video to the analysis backend, drawing the timeseries as batches arrive.
+  // Falls back to mock data when the backend is unreachable, like the initial load in App.
+  const analyzeVideo = async (video: Blob, fallbackDuration: () => number) => {
+    // A newer video supersedes any analysis still running
+    const run = ++analysisRunRef.current;
+    const isStale = () => analysisRunRef.current !== run;
+    if (jobIdRef.current) cancelAnalysis(jobIdRef.current);
+    jobIdRef.current = null;
+    setAnalysisProgress(0);
+    setSession(prev => ({ ...prev, timeseries: [], flags: [], sessionMetrics: null, flagBlurbs: {}, fullSummary: null }));
+    try {
+      const jobId = await submitAnalysis(video);
+      if (isStale()) {
+        cancelAnalysis(jobId);
+        return;
+      }
+      jobIdRef.current = jobId;
+      const result = await pollAnalysis(jobId, (timeseries, status) => {
+        if (isStale()) return;
+        setAnalysisProgress(status.progress);
+        setSession(prev => ({ ...prev, timeseries }));
+      });
+      if (isStale()) return;
+
+      setSession(prev => ({
+        ...prev,
+        timeseries: result.timeseries,
+        flags: result.flags,
+        sessionMetrics: result.metrics,
+        transcript: result.transcript,
+        transcriptSegments: result.transcript_segments,
+      }));
+      setSelectedFlag(result.flags[0] || null);
+    } catch (err) {
+      if (isStale()) return;
+      console.warn('Falling back to mock analysis:', err);
+      const newTs = generateMockTimeseries(Math.max(10, Math.floor(fallbackDuration())));
+      const newFlags = generateMockFlags(newTs);
+      const newMetrics = computeSessionMetrics(newTs);
+
+      setSession(prev => ({
+        ...prev,
+        timeseries: newTs,
+        flags: newFlags,
+        sessionMetrics: newMetrics,
+      }));
+      setSelectedFlag(newFlags[0] || null);
+    } finally {
+      if (!isStale()) {
+        jobIdRef.current = null;
+        setAnalysisProgress(null);
+      }
     }
   };
 
@@ -125,22 +176,7 @@ export default function Home({ session, setSession }: HomeProps) {
       
       const url = URL.createObjectURL(file);
       setSession(prev => ({ ...prev, videoUrl: url }));
-      
-      // Simulate analysis for uploaded video
-      setTimeout(() => {
-        const newTs = generateMockTimeseries(60); // Default 60s for upload
-        const newFlags = generateMockFlags(newTs);
-        const newMetrics = computeSessionMetrics(newTs);
-        
-        setSession(prev => ({
-          ...prev,
-          timeseries: newTs,
-          flags: newFlags,
-          sessionMetrics: newMetrics,
-          flagBlurbs: {},
-          fullSummary: null
-        }));
-      }, 500);
+      analyzeVideo(file, () => 60); // Default 60s for upload
     }
   };
 
@@ -206,6 +242,12 @@ export default function Home({ session, setSession }: HomeProps) {
                 REC
               </span>
             )}
+            {!isRecording && analysisProgress !== null && (
+              <span className="flex items-center gap-1.5 text-xs font-medium text-zinc-500">
+                <div className="w-3 h-3 border-2 border-rose-500 border-t-transparent rounded-full animate-spin" />
+                Analyzing{analysisProgress > 0 ? ` ${Math.round(analysisProgress * 100)}%` : '...'}
+              </span>
+            )}
           </div>
           <div className="flex-1 bg-zinc-900 relative aspect-video flex items-center justify-center">
             <video 
@@ -222,6 +264,9 @@ export default function Home({ session, setSession }: HomeProps) {
               </div>
             )}
           </div>
+          {isRecording && liveSnapshot && (
+            <LiveAudience snapshot={liveSnapshot} />
+          )}
           <div className="p-4 bg-zinc-50 flex flex-col gap-3">
             <div className="flex gap-3">
               {!isRecording ? (
@@ -487,6 +532,31 @@ function StatCard({ label, value, suffix = '', color = 'rose', isText = false }:
   );
 }
 
+function LiveAudience({ snapshot }: { snapshot: LiveSnapshot }) {
+  const latest = snapshot.timeline[snapshot.timeline.length - 1];
+
+  return (
+    <div className="px-4 py-3 border-t border-zinc-100 flex items-center justify-between text-xs">
+      <span className="flex items-center gap-1.5 font-medium text-zinc-600">
+        <Users className="w-3.5 h-3.5 text-rose-500" />
+        {snapshot.active_users} watching
+      </span>
+      {latest && (
+        <span className="flex items-center gap-3 text-zinc-500">
+          <span className="flex items-center gap-1.5 capitalize">
+            <span
+              className="w-2 h-2 rounded-full"
+              style={{ backgroundColor: EMOTION_COLORS[latest.dominant_emotion as keyof typeof EMOTION_COLORS] || '#6366f1' }}
+            />
+            {latest.dominant_emotion}
+          </span>
+          <span>{Math.round(latest.distracted_ratio * 100)}% distracted</span>
+        </span>
+      )}
+    </div>
+  );
+}
+
 const EMOTION_COLORS = {
   happy: '#10b981',
   neutral: '#fb7185', // rose-400
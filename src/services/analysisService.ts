@@ -0,0 +1,106 @@
+import { TimeseriesItem, Flag, SessionMetrics, TranscriptSegment } from "../types";
+
+const API_BASE = (import.meta as any).env?.VITE_ANALYSIS_API_URL || "http://localhost:5000";
+
+export interface AnalysisJobStatus {
+  job_id: string;
+  status: 'queued' | 'running' | 'done' | 'error' | 'cancelled';
+  progress: number | null;
+  processed_s: number;
+  duration_s: number | null;
+  rows: number;
+  error: string | null;
+}
+
+export interface AnalysisResult {
+  timeseries: TimeseriesItem[];
+  flags: Flag[];
+  metrics: SessionMetrics;
+  transcript: string;
+  transcript_segments: TranscriptSegment[];
+}
+
+export const submitAnalysis = async (video: Blob): Promise<string> => {
+  const body = new FormData();
+  body.append("video", video, "session.webm");
+  const response = await fetch(`${API_BASE}/jobs`, { method: "POST", body });
+  if (response.status === 429) {
+    throw new Error("The analysis server is busy. Please try again in a moment.");
+  }
+  if (!response.ok) throw new Error(`Upload failed (${response.status})`);
+  return (await response.json()).job_id;
+};
+
+export const cancelAnalysis = async (jobId: string): Promise<void> => {
+  await fetch(`${API_BASE}/jobs/${jobId}`, { method: "DELETE" });
+};
+
+// Polls the job, handing each batch of new timeseries rows to `onPartial` so charts can render
+// while the video is still being analyzed. Resolves with the complete result.
+export const pollAnalysis = async (
+  jobId: string,
+  onPartial: (timeseries: TimeseriesItem[], status: AnalysisJobStatus) => void,
+  intervalMs: number = 1500
+): Promise<AnalysisResult> => {
+  const timeseries: TimeseriesItem[] = [];
+  let since = 0;
+
+  while (true) {
+    const response = await fetch(`${API_BASE}/jobs/${jobId}/result?since=${since}`);
+    if (!response.ok) throw new Error(`Polling failed (${response.status})`);
+    const body = await response.json();
+
+    if (body.timeseries.length > 0) {
+      timeseries.push(...body.timeseries);
+      onPartial([...timeseries], body);
+    }
+    since = body.next;
+
+    if (body.status === "done") {
+      return {
+        timeseries,
+        flags: body.flags,
+        metrics: body.metrics,
+        transcript: body.transcript,
+        transcript_segments: body.transcript_segments,
+      };
+    }
+    if (body.status === "error" || body.status === "cancelled") {
+      throw new Error(body.error || `Analysis ${body.status}`);
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+};
+
+// One level of the backend's min/mean/max pyramid, decoded into chart-ready rows
+export interface TimeseriesLevel {
+  bucket_s: number;
+  count: number[];
+  min: TimeseriesItem[];
+  mean: TimeseriesItem[];
+  max: TimeseriesItem[];
+}
+
+// Fetches the finest resolution with at most `points` buckets between `start` and `end` (seconds),
+// so charts of long sessions get a few hundred buckets instead of every sample. The response is
+// column-major JSON (gzip-compressed; the browser decodes it).
+export const fetchTimeseriesLevel = async (
+  jobId: string,
+  range: { start?: number; end?: number; points?: number } = {}
+): Promise<TimeseriesLevel> => {
+  const params = new URLSearchParams();
+  Object.entries(range).forEach(([key, value]) => {
+    if (value !== undefined) params.set(key, String(value));
+  });
+  const response = await fetch(`${API_BASE}/jobs/${jobId}/timeseries?${params}`);
+  if (!response.ok) throw new Error(`Timeseries request failed (${response.status})`);
+  const body = await response.json();
+
+  const rows = (stat: "min" | "mean" | "max"): TimeseriesItem[] =>
+    body.t.map((t_s: number, i: number) => {
+      const item: Record<string, number> = { t_s };
+      body.fields.forEach((field: string, j: number) => { item[field] = body[stat][j][i]; });
+      return item as unknown as TimeseriesItem;
+    });
+  return { bucket_s: body.bucket_s, count: body.count, min: rows("min"), mean: rows("mean"), max: rows("max") };
+};
@@ -0,0 +1,27 @@
+const API_BASE = (import.meta as any).env?.VITE_ANALYSIS_API_URL || "http://localhost:5000";
+
+export interface LiveBucket {
+  start: number;
+  count: number;
+  dominant_emotion: string;
+  distribution: Record<string, number>;
+  distracted_ratio: number;
+}
+
+export interface LiveSnapshot {
+  version: number;
+  bucket_s: number;
+  active_users: number;
+  users: Record<string, { t: number; emotion: string; score: number; distracted: boolean }>;
+  timeline: LiveBucket[];
+}
+
+// Subscribes to the live aggregates pushed by the backend while the talk is running.
+// Returns a function that closes the stream; EventSource reconnects on its own after errors.
+export const subscribeLive = (onSnapshot: (snapshot: LiveSnapshot) => void): (() => void) => {
+  const source = new EventSource(`${API_BASE}/live/stream`);
+  source.addEventListener("snapshot", (event) => {
+    onSnapshot(JSON.parse((event as MessageEvent).data));
+  });
+  return () => source.close();
+};
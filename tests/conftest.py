@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scripts and the backend are run from their own folders, so import them the same way
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+sys.path.insert(0, os.path.join(REPO_DIR, "backend"))
@@ -0,0 +1,35 @@
+from live import LiveAggregator
+from session_log import EMOTION_ORDER
+
+
+NOW = 1_700_000_000.0
+
+
+def record(user, t, emotion="happy"):
+    scores = [0.0] * len(EMOTION_ORDER)
+    scores[EMOTION_ORDER.index(emotion)] = 1.0
+    return {"timestamp": t * 1000, "user": user, "scores": scores, "distracted": False}
+
+
+def test_far_future_record_does_not_evict_other_users():
+    live = LiveAggregator(bucket_s=5, window_s=60, user_history=10, max_skew_s=30)
+    assert live.ingest([record("alice", NOW - 10), record("bob", NOW - 5)], now=NOW) == 2
+    # A client whose clock is a day ahead
+    assert live.ingest([record("mallory", NOW + 86400)], now=NOW) == 0
+
+    snapshot = live.snapshot()
+    assert set(snapshot["users"]) == {"alice", "bob"}
+    assert sum(b["count"] for b in snapshot["timeline"]) == 2
+
+
+def test_prune_follows_server_clock():
+    live = LiveAggregator(bucket_s=5, window_s=60, user_history=10, max_skew_s=30)
+    live.ingest([record("alice", NOW)], now=NOW)
+    # Small skew is tolerated; alice has fallen out of the window by then
+    assert live.ingest([record("bob", NOW + 100)], now=NOW + 90) == 1
+    # Records already older than the window are dropped
+    assert live.ingest([record("carol", NOW)], now=NOW + 90) == 0
+
+    snapshot = live.snapshot()
+    assert set(snapshot["users"]) == {"bob"}
+    assert [b["start"] for b in snapshot["timeline"]] == [NOW + 100]
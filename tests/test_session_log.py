@@ -0,0 +1,53 @@
+from session_log import IntervalRecorder, EMOTION_ORDER
+
+
+class ListLog:
+    def __init__(self):
+        self.records = []
+
+    def append(self, record):
+        self.records.append(record)
+
+
+def emotions(happy):
+    scores = dict.fromkeys(EMOTION_ORDER, 0.0)
+    scores["happy"], scores["neutral"] = happy, 1.0 - happy
+    return scores
+
+
+def test_interval_without_emotions_does_not_leak_pose_into_the_next():
+    log = ListLog()
+    recorder = IntervalRecorder(log, "u1", interval=1.0, start_time=0.0)
+    # First interval: head pose (looking away) but no face scored
+    recorder.add(0.2, None, pitch=-40.0, distracted=True, yaw=50.0)
+    assert recorder.add(1.0, None, pitch=-40.0, distracted=True, yaw=50.0) is None
+    # Second interval: a normal, attentive reading
+    recorder.add(1.5, emotions(0.8), pitch=2.0, distracted=False, yaw=4.0)
+    record = recorder.add(2.0, emotions(0.6), pitch=4.0, distracted=False, yaw=6.0)
+
+    assert log.records == [record]
+    assert record["pitch"] == 3.0
+    assert record["yaw"] == 5.0
+    assert record["distracted"] is False
+    assert record["scores"][EMOTION_ORDER.index("happy")] == 0.7
+
+
+def test_interval_without_pose_leaves_pitch_and_yaw_out():
+    log = ListLog()
+    recorder = IntervalRecorder(log, "u1", interval=1.0, start_time=0.0)
+    recorder.add(0.5, emotions(1.0))
+    record = recorder.add(1.0, emotions(1.0))
+
+    assert "pitch" not in record and "yaw" not in record
+    assert record["distracted"] is False
+
+
+def test_flush_logs_the_partial_interval_once():
+    log = ListLog()
+    recorder = IntervalRecorder(log, "u1", interval=1.0, start_time=0.0)
+    recorder.add(0.3, emotions(0.5), pitch=1.0, yaw=1.0)
+    record = recorder.flush()
+
+    assert record is not None and record["pitch"] == 1.0
+    assert recorder.flush() is None
+    assert log.records == [record]
@@ -0,0 +1,52 @@
+import gzip
+import json
+from sync_store import SyncStore
+
+TOKEN = "test-token"
+AUTH = f"Bearer {TOKEN}"
+
+
+def batch(user, source, offset, records, reset=False):
+    return gzip.compress(json.dumps({"user": user, "source": source, "offset": offset, "reset": reset,
+                                     "records": records}).encode())
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_two_users_with_the_same_filename_do_not_share_a_file(tmp_path):
+    store = SyncStore(str(tmp_path), token=TOKEN)
+    mine = [{"timestamp": 1, "user": "alice"}, {"timestamp": 2, "user": "alice"}]
+    assert store.receive(batch("alice", "emotion_data.jsonl", 0, mine), "gzip", AUTH)[0] == 200
+
+    # Same filename and offset from another user, including a reset that would truncate the file
+    status, _ = store.receive(batch("bob", "emotion_data.jsonl", 0, [{"timestamp": 9, "user": "bob"}]), "gzip", AUTH)
+    assert status == 409
+    status, _ = store.receive(batch("bob", "emotion_data.jsonl", 0, [], reset=True), "gzip", AUTH)
+    assert status == 409
+    assert read_lines(tmp_path / "emotion_data.jsonl") == mine
+
+    # Ownership survives a restart; the owner can keep appending
+    store = SyncStore(str(tmp_path), token=TOKEN)
+    assert store.receive(batch("bob", "emotion_data.jsonl", 40, []), "gzip", AUTH)[0] == 409
+    more = [{"timestamp": 3, "user": "alice"}]
+    assert store.receive(batch("alice", "emotion_data.jsonl", 40, more), "gzip", AUTH)[0] == 200
+    assert read_lines(tmp_path / "emotion_data.jsonl") == mine + more
+
+
+def test_resent_batch_is_stored_once(tmp_path):
+    store = SyncStore(str(tmp_path), token=TOKEN)
+    records = [{"timestamp": 1, "user": "alice"}]
+    assert store.receive(batch("alice", "a.jsonl", 0, records), "gzip", AUTH)[1]["status"] == "stored"
+    assert store.receive(batch("alice", "a.jsonl", 0, records), "gzip", AUTH)[1]["status"] == "duplicate"
+    assert read_lines(tmp_path / "a.jsonl") == records
+
+
+def test_upload_without_the_token_is_refused(tmp_path):
+    store = SyncStore(str(tmp_path), token=TOKEN)
+    body = batch("alice", "a.jsonl", 0, [{"timestamp": 1}])
+    assert store.receive(body, "gzip", None)[0] == 401
+    assert store.receive(body, "gzip", "Bearer wrong")[0] == 401
+    assert not (tmp_path / "a.jsonl").exists()